@@ -24,7 +24,7 @@ from __future__ import (absolute_import, division, print_function,
 import math
 
 from backtrader import Analyzer
-from backtrader.mathsupport import average, standarddev
+from backtrader.mathsupport import Welford
 from backtrader.utils import AutoOrderedDict
 
 
@@ -62,20 +62,20 @@ class SQN(Analyzer):
 
     def start(self):
         super(SQN, self).start()
-        self.pnl = list()
+        self.pnl = Welford()  # incremental mean/stddev of the pnl
         self.count = 0
 
     def notify_trade(self, trade):
         if trade.status == trade.Closed:
-            self.pnl.append(trade.pnlcomm)
+            self.pnl.add(trade.pnlcomm)
             self.count += 1
 
     def stop(self):
         if self.count > 1:
-            pnl_av = average(self.pnl)
-            pnl_stddev = standarddev(self.pnl)
+            pnl_av = self.pnl.mean
+            pnl_stddev = self.pnl.stddev()
             try:
-                sqn = math.sqrt(len(self.pnl)) * pnl_av / pnl_stddev
+                sqn = math.sqrt(self.count) * pnl_av / pnl_stddev
             except ZeroDivisionError:
                 sqn = None
         else:
@@ -23,6 +23,7 @@ from __future__ import (absolute_import, division, print_function,
 
 
 import collections
+import operator
 
 import backtrader as bt
 from backtrader import Order, Position
@@ -68,7 +69,9 @@ class Transactions(bt.Analyzer):
             self.rets[self.p._pfheaders[0]] = [list(self.p._pfheaders[1:])]
 
         self._positions = collections.defaultdict(Position)
-        self._idnames = list(enumerate(self.strategy.getdatanames()))
+        # name -> index: only the datas with executions are looked up in next
+        self._idnames = dict((dname, i) for i, dname in
+                             enumerate(self.strategy.getdatanames()))
 
     def notify_order(self, order):
         # An order could have several partial executions per cycle (unlikely
@@ -90,14 +93,15 @@ class Transactions(bt.Analyzer):
     def next(self):
         # super(Transactions, self).next()  # let dtkey update
         entries = []
-        for i, dname in self._idnames:
-            pos = self._positions.get(dname, None)
-            if pos is not None:
+        for dname, pos in self._positions.items():
+            i = self._idnames.get(dname, None)
+            if i is not None:
                 size, price = pos.size, pos.price
                 if size:
                     entries.append([size, price, i, dname, -size * price])
 
         if entries:
+            entries.sort(key=operator.itemgetter(2))  # order of the datas
             self.rets[self.strategy.datetime.datetime()] = entries
 
         self._positions.clear()
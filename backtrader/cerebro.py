@@ -46,6 +46,7 @@ from .strategy import Strategy, SignalStrategy
 from .tradingcal import (TradingCalendarBase, TradingCalendar,
                          PandasMarketCalendar)
 from .timer import Timer
+from .store import LiveMux
 
 # Defined here to make it pickable. Ideally it could be defined inside Cerebro
 
@@ -181,6 +182,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
         print to stdout. It will be added to the strategy (in addition to any
         other writers added by the user code)
 
+        ``WriterBuffered`` can be added with ``addwriter`` to have the csv
+        stream formatted and written out in batches in a background thread
+
       - ``tradehistory`` (default: ``False``)
 
         If set to ``True``, it will activate update event logging in each trade
@@ -269,6 +273,77 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
         Set to ``False`` for compatibility. May be changed to ``True``
 
+      - ``statsonly`` (default: ``None``)
+
+        Memory saving scheme for observers when the results will not be
+        plotted. When active:
+
+          - Observers which only serve a plotting purpose (those with the
+            class attribute ``_plotonly`` set to ``True``, like ``BuySell``,
+            ``Trades`` and ``DataTrades``) will not be added to the strategies
+
+          - The lines of the remaining observers will be put in ``qbuffer``
+            mode, keeping only the minimum amount of values in memory
+
+        Possible values:
+
+          - ``None``: automatically activated when optimizing with
+            ``optreturn`` set to ``True``, because the returned results
+            cannot be plotted
+
+          - ``True``: always activated. Plotting will be deactivated
+
+          - ``False``: never activated
+
+      - ``liveqsize`` (default: ``0``)
+
+        Live feeds from the stores deliver their data through queues which
+        are multiplexed, to wake up the system as soon as data arrives for any
+        of them (instead of waiting ``qcheck`` for each feed in turn).
+
+        If greater than ``0`` it is the maximum size of each queue. Producers
+        will then block until the system has consumed data (back-pressure).
+        Use it with care with stores in which a single thread delivers the
+        data of all feeds
+
+      - ``oncewindow`` (default: ``0``)
+
+        If greater than ``0`` and ``preload`` and ``runonce`` are active, the
+        datas are not fully preloaded. They are loaded in windows of up to
+        ``oncewindow`` bars, the indicators are calculated in vectorized
+        (``once``) mode for each window and the strategies then run over it.
+
+        Only the values needed by the minimum periods are carried over from
+        one window to the next, which keeps memory usage bounded while keeping
+        the speed of ``runonce``
+
+        If lines deliver values from future bars (``line(ago)`` with a positive
+        ``ago``, like the ``chikou_span`` of ``Ichimoku``), as many additional
+        bars are loaded and the strategies stay as many bars behind, to see the
+        same values as with ``runonce``
+
+          - As with ``exactbars``, **plotting** is deactivated
+
+          - Data clones (``clone``, ``copyas``) cannot be loaded in windows
+            and make the run fall back to full preloading
+
+      - ``bufferwarmup`` (default: ``0``)
+
+        Only meaningful if ``exactbars`` is active. If greater than ``0`` the
+        memory saving buffers are not sized with the minimum periods only.
+        During the first ``bufferwarmup`` bars all values are kept and the
+        largest look-back actually requested from each line (for example
+        ``self.data.close[-300]`` in ``next``) is recorded.
+
+        The buffers are then reduced to keep exactly what was requested (and
+        at least the minimum period), which allows strategies to look back
+        further than the minimum period with ``exactbars``. The resulting
+        sizes can be seen with ``Strategy.getbufferreport``
+
+          - The warm-up must cover all look-backs which happen later in the
+            run. Else the look-backs which exceed it fail with an
+            ``IndexError`` or deliver values from a wrong position
+
     '''
 
     params = (
@@ -291,11 +366,18 @@ class Cerebro(with_metaclass(MetaParams, object)):
         ('cheat_on_open', False),
         ('broker_coo', True),
         ('quicknotify', False),
+        ('statsonly', None),
+        ('liveqsize', 0),
+        ('oncewindow', 0),
+        ('bufferwarmup', 0),
     )
 
     def __init__(self):
         self._dolive = False
         self._doreplay = False
+        self._dooncewindow = 0
+        self._dowarmup = 0
+        self._warmup = 0
         self._dooptimize = False
         self.stores = list()
         self.feeds = list()
@@ -500,6 +582,10 @@ class Cerebro(with_metaclass(MetaParams, object)):
             `datetime.date`` instance and returns ``True`` if the date is
             allowed for timers or else returns ``False``
 
+            If ``preload`` and ``runonce`` are active, the dates at which the
+            timer fires are precomputed before the run starts and the callback
+            is invoked ahead of time
+
           - ``tzdata`` which can be either ``None`` (default), a ``pytz``
             instance or a ``data feed`` instance.
 
@@ -972,7 +1058,7 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
         ``tight``: only save actual content and not the frame of the figure
         '''
-        if self._exactbars > 0:
+        if self._exactbars > 0 or self._statsonly or self._dooncewindow:
             return
 
         if not plotter:
@@ -1020,6 +1106,7 @@ class Cerebro(with_metaclass(MetaParams, object)):
         rv = vars(self).copy()
         if 'runstrats' in rv:
             del(rv['runstrats'])
+        rv.pop('_livemux', None)  # locks cannot be pickled
         return rv
 
     def runstop(self):
@@ -1067,6 +1154,11 @@ class Cerebro(with_metaclass(MetaParams, object)):
             self._dorunonce = False  # something is saving memory, no runonce
             self._dopreload = self._dopreload and self._exactbars < 1
 
+        # buffers sized after recording the look-backs during a warm-up
+        self._dowarmup = 0
+        if self._exactbars and not self.p.oldsync:
+            self._dowarmup = self.p.bufferwarmup
+
         self._doreplay = self._doreplay or any(x.replaying for x in self.datas)
         if self._doreplay:
             # preloading is not supported with replay. full timeframe bars
@@ -1078,6 +1170,21 @@ class Cerebro(with_metaclass(MetaParams, object)):
             self._dorunonce = False
             self._dopreload = False
 
+        # windowed once: load the datas and calculate the indicators in
+        # windows to keep memory bounded
+        self._dooncewindow = 0
+        if self._dopreload and self._dorunonce and not self.p.oldsync:
+            if not any(data._clone for data in self.datas):
+                self._dooncewindow = self.p.oncewindow
+
+        if self._dooncewindow:
+            self._dopreload = False
+
+        self._statsonly = self.p.statsonly
+        if self._statsonly is None:
+            # optreturn results carry no lines and cannot be plotted
+            self._statsonly = self._dooptimize and self.p.optreturn
+
         self.runwriters = list()
 
         # Add the system default writer if requested
@@ -1175,6 +1282,8 @@ class Cerebro(with_metaclass(MetaParams, object)):
         self._init_stcount()
 
         self.runningstrats = runstrats = list()
+        # inbound queues of the live feeds, created before stores/datas start
+        self._livemux = LiveMux(maxsize=self.p.liveqsize)
         for store in self.stores:
             store.start()
 
@@ -1239,20 +1348,25 @@ class Cerebro(with_metaclass(MetaParams, object)):
             # loop separated for clarity
             defaultsizer = self.sizers.get(None, (None, None, None))
             for idx, strat in enumerate(runstrats):
+                stdobs = list()
                 if self.p.stdstats:
-                    strat._addobserver(False, observers.Broker)
+                    stdobs.append((False, observers.Broker, (), {}))
                     if self.p.oldbuysell:
-                        strat._addobserver(True, observers.BuySell)
+                        stdobs.append((True, observers.BuySell, (), {}))
                     else:
-                        strat._addobserver(True, observers.BuySell,
-                                           barplot=True)
+                        stdobs.append((True, observers.BuySell, (),
+                                       dict(barplot=True)))
 
                     if self.p.oldtrades or len(self.datas) == 1:
-                        strat._addobserver(False, observers.Trades)
+                        stdobs.append((False, observers.Trades, (), {}))
                     else:
-                        strat._addobserver(False, observers.DataTrades)
+                        stdobs.append((False, observers.DataTrades, (), {}))
+
+                for multi, obscls, obsargs, obskwargs in \
+                        itertools.chain(stdobs, self.observers):
+                    if self._statsonly and obscls._plotonly:
+                        continue  # results will not be plotted
 
-                for multi, obscls, obsargs, obskwargs in self.observers:
                     strat._addobserver(multi, obscls, *obsargs, **obskwargs)
 
                 for indcls, indargs, indkwargs in self.indicators:
@@ -1272,35 +1386,56 @@ class Cerebro(with_metaclass(MetaParams, object)):
                     if writer.p.csv:
                         writer.addheaders(strat.getwriterheaders())
 
-            if not predata:
-                for strat in runstrats:
-                    strat.qbuffer(self._exactbars, replaying=self._doreplay)
+            try:
+                if not predata:
+                    if self._dowarmup:  # qbuffer once look-backs are known
+                        self._warmup = self._dowarmup
+                        for strat in runstrats:
+                            strat._probe(True)
+                    else:
+                        for strat in runstrats:
+                            strat.qbuffer(self._exactbars,
+                                          replaying=self._doreplay)
 
-            for writer in self.runwriters:
-                writer.start()
+                if self._statsonly and \
+                   not (self._dopreload and self._dorunonce):
+                    # with runonce it will be done after the vectorized phase
+                    for strat in runstrats:
+                        strat._qbuffer_observers()
+
+                for writer in self.runwriters:
+                    writer.start()
 
-            # Prepare timers
-            self._timers = []
-            self._timerscheat = []
-            for timer in self._pretimers:
-                # preprocess tzdata if needed
-                timer.start(self.datas[0])
+                # Prepare timers
+                self._timers = []
+                self._timerscheat = []
+                for timer in self._pretimers:
+                    # preprocess tzdata if needed
+                    timer.start(self.datas[0])
 
-                if timer.params.cheat:
-                    self._timerscheat.append(timer)
-                else:
-                    self._timers.append(timer)
+                    if timer.params.cheat:
+                        self._timerscheat.append(timer)
+                    else:
+                        self._timers.append(timer)
 
-            if self._dopreload and self._dorunonce:
-                if self.p.oldsync:
-                    self._runonce_old(runstrats)
-                else:
-                    self._runonce(runstrats)
-            else:
-                if self.p.oldsync:
-                    self._runnext_old(runstrats)
+                if (self._dopreload or self._dooncewindow) and self._dorunonce:
+                    if self.p.oldsync:
+                        self._runonce_old(runstrats)
+                    else:
+                        self._runonce(runstrats)
                 else:
-                    self._runnext(runstrats)
+                    if self.p.oldsync:
+                        self._runnext_old(runstrats)
+                    else:
+                        self._runnext(runstrats)
+
+                if self._warmup:  # run shorter than the warm-up
+                    self._endwarmup(runstrats)
+            finally:
+                if self._warmup:  # the run failed during the warm-up
+                    self._warmup = 0
+                    for strat in runstrats:
+                        strat._probe(False)
 
             for strat in runstrats:
                 strat._stop()
@@ -1448,6 +1583,8 @@ class Cerebro(with_metaclass(MetaParams, object)):
         '''
         for strat in runstrats:
             strat._once()
+            if self._statsonly:
+                strat._qbuffer_observers()
 
         # The default once for strategies does nothing and therefore
         # has not moved forward all datas/indicators/observers that
@@ -1495,6 +1632,14 @@ class Cerebro(with_metaclass(MetaParams, object)):
         '''API for lineiterators to disable runonce (see HeikinAshi)'''
         self._dorunonce = False
 
+    def _endwarmup(self, runstrats):
+        '''Stops recording look-backs and puts the strategies in memory
+        saving mode with buffers sized after the recorded look-backs'''
+        self._warmup = 0
+        for strat in runstrats:
+            strat._probe(False)
+            strat.qbuffer(self._exactbars, replaying=self._doreplay)
+
     def _runnext(self, runstrats):
         '''
         Actual implementation of run in full next mode. All objects have its
@@ -1517,6 +1662,8 @@ class Cerebro(with_metaclass(MetaParams, object)):
         ldatas = len(datas)
         ldatas_noclones = ldatas - clonecount
         lastqcheck = False
+        livemux = self._livemux
+        qcheck = max(d.p.qcheck for d in datas)
         dt0 = date2num(datetime.datetime.max) - 2  # default at max
         while d0ret or d0ret is None:
             # if any has live data in the buffer, no data will wait anything
@@ -1527,6 +1674,13 @@ class Cerebro(with_metaclass(MetaParams, object)):
                 livecount = sum(d._laststatus == d.LIVE for d in datas)
                 newqcheck = not livecount or livecount == ldatas_noclones
 
+            if livemux.active:
+                # wait once for data arriving to any of the feeds, waking up
+                # as soon as it arrives. The datas need not wait any longer
+                if newqcheck:
+                    livemux.wait(qcheck)
+                newqcheck = False
+
             lastret = False
             # Notify anything from the store even before moving datas
             # because datas may not move due to an error reported by the store
@@ -1638,6 +1792,9 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                     self._next_writers(runstrats)
 
+                if self._warmup and len(runstrats[0]) >= self._warmup:
+                    self._endwarmup(runstrats)
+
         # Last notification chance before stopping
         self._datanotify()
         if self._event_stop:  # stop if requested
@@ -1653,9 +1810,12 @@ class Cerebro(with_metaclass(MetaParams, object)):
         Strategies are still invoked on a pseudo-event mode in which ``next``
         is called for each data arrival
         '''
-        for strat in runstrats:
-            strat._once()
-            strat.reset()  # strat called next by next - reset lines
+        if not self._dooncewindow:
+            for strat in runstrats:
+                strat._once()
+                strat.reset()  # strat called next by next - reset lines
+                if self._statsonly:
+                    strat._qbuffer_observers()
 
         # The default once for strategies does nothing and therefore
         # has not moved forward all datas/indicators/observers that
@@ -1664,10 +1824,43 @@ class Cerebro(with_metaclass(MetaParams, object)):
         datas = sorted(self.datas,
                        key=lambda x: (x._timeframe, x._compression))
 
+        if self._dooncewindow:
+            # Only the values needed by the minimum periods are carried over
+            # from one window to the next
+            keep = max(max([strat._minperiod] +
+                           [x._minperiod for x in strat._windowindicators()])
+                       for strat in runstrats)
+            # lines with values from the future: the last bars of a window
+            # are only complete after loading the next one
+            lead = max(strat._windowlead() for strat in runstrats)
+            exhausted = set()
+            dtwindow = self._loadwindow(runstrats, datas, exhausted, lead)
+        else:
+            dtwindow = float('inf')  # all preloaded
+
+            # The datas are preloaded: the timeline is known and the timers
+            # can work out in advance when they fire
+            timers = self._timers + self._timerscheat
+            if timers:
+                timeline = set()
+                for d in datas:
+                    timeline.update(d.lines.datetime.array[:d.buflen()])
+
+                timeline = sorted(timeline)
+                for timer in timers:
+                    timer.precompute(timeline)
+
         while True:
             # Check next incoming date in the datas
             dts = [d.advance_peek() for d in datas]
             dt0 = min(dts)
+            if dt0 > dtwindow:  # all bars of the window seen, load next
+                for strat in runstrats:
+                    strat._trimwindow(keep)
+
+                dtwindow = self._loadwindow(runstrats, datas, exhausted, lead)
+                continue
+
             if dt0 == float('inf'):
                 break  # no data delivers anything
 
@@ -1703,6 +1896,42 @@ class Cerebro(with_metaclass(MetaParams, object)):
 
                 self._next_writers(runstrats)
 
+    def _loadwindow(self, runstrats, datas, exhausted, lead=0):
+        '''
+        Loads the next window of bars for the datas (up to ``oncewindow`` bars
+        ahead of the current position of each data) and calculates the
+        indicators of the strategies over them. ``exhausted`` keeps track of
+        the datas which have delivered all bars
+
+        ``lead`` bars are loaded in addition, for the lines which deliver
+        values from the future (see ``Strategy._windowlead``)
+
+        Returns the datetime up to which all datas have delivered the bars and
+        the lines are complete (``inf`` if all datas are exhausted)
+        '''
+        dtwindow = float('inf')
+        for data in datas:
+            if data in exhausted:
+                continue
+
+            dtline = data.lines.datetime
+            idx = dtline.idx
+            data.lines.advance(data.buflen() - 1 - idx)  # go to the last bar
+            while data.buflen() - 1 - idx < self._dooncewindow + lead:
+                if not data.load():
+                    data._last()  # let the filters deliver
+                    exhausted.add(data)
+                    break
+            else:  # lines complete up to lead bars before the last one
+                dtwindow = min(dtwindow, dtline[-lead])
+
+            data.lines.rewind(dtline.idx - idx)  # back to the current bar
+
+        for strat in runstrats:
+            strat._oncewindow()
+
+        return dtwindow
+
     def _check_timers(self, runstrats, dt0, cheat=False):
         timers = self._timers if not cheat else self._timerscheat
         for t in timers:
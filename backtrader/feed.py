@@ -21,6 +21,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import bisect
 import collections
 import datetime
 import inspect
@@ -164,6 +165,10 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
 
     _started = False
 
+    _tztable = None  # binary search based local time conversions
+    _eosnums = (float('inf'),)  # table of end of sessions (utc floats)
+    _calendar = None  # trading calendar (set during start)
+
     def _start_finish(self):
         # A live feed (for example) may have learnt something about the
         # timezones after the start and that's why the date/time related
@@ -172,6 +177,8 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
         self._tz = self._gettz()
         # Lines have already been create, set the tz
         self.lines.datetime._settz(self._tz)
+        self._tztable = self.lines.datetime._tztable
+        self._eosnums = self.__class__._eosnums  # reset the sessions table
 
         # This should probably be also called from an override-able method
         self._tzinput = bt.utils.date.Localizer(self._gettzinput())
@@ -208,32 +215,49 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
     def _timeoffset(self):
         return self._tmoffset
 
-    def _getnexteos(self):
-        '''Returns the next eos using a trading calendar if available'''
+    def _getnexteos(self, dt=None):
+        '''Returns the next eos using a trading calendar if available. The
+        reference is the current bar unless a datetime (utc float) ``dt`` is
+        given'''
         if self._clone:
-            return self.data._getnexteos()
+            return self.data._getnexteos(dt)
 
-        if not len(self):
-            return datetime.datetime.min, 0.0
+        if dt is None:
+            if not len(self):
+                return datetime.datetime.min, 0.0
+
+            dt = self.lines.datetime[0]
 
-        dt = self.lines.datetime[0]
-        dtime = num2date(dt)
         if self._calendar is None:
-            nexteos = datetime.datetime.combine(dtime, self.p.sessionend)
-            nextdteos = self.date2num(nexteos)  # locl'ed -> utc-like
+            nextdteos = self._sessioneos(dt)
             nexteos = num2date(nextdteos)  # utc
-            while dtime > nexteos:
-                nexteos += datetime.timedelta(days=1)  # already utc-like
-
-            nextdteos = date2num(nexteos)  # -> utc-like
 
         else:
+            dtime = num2date(dt)
             # returns times in utc
             _, nexteos = self._calendar.schedule(dtime, self._tz)
             nextdteos = date2num(nexteos)  # nextos is already utc
 
         return nexteos, nextdteos
 
+    def _sessioneos(self, dt):
+        '''Returns the first end of session (utc float) at or after ``dt``,
+        with a binary search over a table of end of sessions which is
+        (re)built when ``dt`` falls out of it'''
+        eosnums = self._eosnums
+        if not eosnums[0] <= dt <= eosnums[-1]:
+            # a year of sessions from a couple of days before (tz offsets)
+            day = num2date(dt).date() - datetime.timedelta(days=2)
+            sessionend = self.p.sessionend
+            eosnums = self._eosnums = [
+                # to utc and back to get the same rounding as num2date
+                date2num(num2date(self.date2num(datetime.datetime.combine(
+                    day + datetime.timedelta(days=i), sessionend))))
+                for i in range(370)
+            ]
+
+        return eosnums[bisect.bisect_left(eosnums, dt)]
+
     def _gettzinput(self):
         '''Can be overriden by classes to return a timezone for input'''
         return tzparse(self.p.tzinput)
@@ -245,13 +269,16 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
 
     def date2num(self, dt):
         if self._tz is not None:
-            return date2num(self._tz.localize(dt))
+            return self._tztable.date2num(dt)
 
         return date2num(dt)
 
     def num2date(self, dt=None, tz=None, naive=True):
         if dt is None:
-            return num2date(self.lines.datetime[0], tz or self._tz, naive)
+            dt = self.lines.datetime[0]
+
+        if tz is None and naive and self._tz is not None:
+            return self._tztable.num2date(dt)
 
         return num2date(dt, tz or self._tz, naive)
 
@@ -367,7 +394,7 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
             self.tick_last = getattr(self.lines, alias0)[0]
 
     def advance_peek(self):
-        if len(self) < self.buflen():
+        if self.lines.datetime.idx + 1 < self.buflen():
             return self.lines.datetime[1]  # return the future
 
         return float('inf')  # max date else
@@ -440,8 +467,16 @@ class AbstractDataBase(with_metaclass(MetaAbstractDataBase,
             pass
 
         self._last()
+        self._prepcalendar()
         self.home()
 
+    def _prepcalendar(self):
+        '''Indexes the trading calendar (if any) over the preloaded range'''
+        if self._calendar is not None and len(self):
+            dtline = self.lines.datetime
+            self._calendar.prepare(num2date(dtline[1 - len(self)]),
+                                   num2date(dtline[0]))
+
     def _last(self, datamaster=None):
         # Last chance for filters to deliver something
         ret = 0
@@ -690,6 +725,7 @@ class CSVDataBase(with_metaclass(MetaCSVDataBase, DataBase)):
             pass
 
         self._last()
+        self._prepcalendar()
         self.home()
 
         # preloaded - no need to keep the object around - breaks multip in 3.x
@@ -756,6 +792,7 @@ class DataClone(AbstractDataBase):
         # Copy tz infos
         self._tz = self.data._tz
         self.lines.datetime._settz(self._tz)
+        self._tztable = self.lines.datetime._tztable
 
         self._calendar = self.data._calendar
 
@@ -776,11 +813,37 @@ class DataClone(AbstractDataBase):
         self._preloading = False
 
     def preload(self):
+        if self._canshare():
+            self._sharelines()
+            return
+
         self._preloading = True
         super(DataClone, self).preload()
         self.data.home()  # preloading data was pushed forward
         self._preloading = False
 
+    def _canshare(self):
+        '''Returns ``True`` if the lines of the preloaded guest data can be
+        shared instead of being copied bar by bar'''
+        if self._filters or self._ffilters:
+            return False  # bars may be modified/removed
+
+        if len(self.data) or not self.data.buflen():
+            return False  # guest not preloaded or not at home
+
+        lines = list(self.lines) + list(self.data.lines)
+        return all(line.mode == line.UnBounded for line in lines)
+
+    def _sharelines(self):
+        '''Makes the lines reference the storage of the guest data lines. The
+        storage is shared: the values are read-only for the clone, which only
+        moves its own index pointer over them'''
+        for line, dline in zip(self.lines, self.data.lines):
+            line.array = dline.array
+            line.extension = dline.extension
+
+        self.home()
+
     def _load(self):
         # assumption: the data is in the system
         # simply copy the lines
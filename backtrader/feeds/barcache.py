@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import array
+import os
+import re
+import sys
+
+import backtrader as bt
+
+
+__all__ = ['BarCache', 'BarCacheData']
+
+
+class BarCache(object):
+    '''Append-only store on local disk of the bars of one instrument for a
+    given ``timeframe``/``compression``
+
+    Live data feeds use it to avoid downloading again the history they
+    already saw in a previous session: the cached bars are delivered first
+    and only the missing tail is requested from the server.
+
+    The file holds a short header followed by fixed size records of 7
+    little-endian doubles: ``datetime`` (as float in UTC), ``open``,
+    ``high``, ``low``, ``close``, ``volume``, ``openinterest``. A record
+    left incomplete by an interrupted write is discarded on opening
+
+    Bars are only appended if they are newer than the last cached one. Use
+    ``record`` to cache bars which may still be incomplete: a bar is held
+    back until the next one is recorded and ``discard`` drops it.
+    '''
+    MAGIC = b'BTBARS1\n'
+    FIELDS = ('datetime', 'open', 'high', 'low', 'close',
+              'volume', 'openinterest')
+
+    def __init__(self, directory, name, timeframe, compression):
+        self.fname = os.path.join(
+            directory, self.filename(name, timeframe, compression))
+        self._f = None
+        self._last = None
+        self._pending = None
+
+    @staticmethod
+    def filename(name, timeframe, compression):
+        '''Returns the name of the file caching the bars of ``name`` for the
+        given ``timeframe``/``compression``'''
+        name = re.sub(r'[^\w.\-]+', '_', str(name))
+        tfname = bt.TimeFrame.getname(timeframe, compression)
+        return '%s-%d%s.btbars' % (name, compression, tfname)
+
+    def _records(self, size):
+        # whole number of records found in a file of the given size
+        return max(0, size - len(self.MAGIC)) // (len(self.FIELDS) * 8)
+
+    def read(self):
+        '''Returns an ``array('d')`` with the cached records laid out
+        consecutively'''
+        values = array.array(str('d'))
+        try:
+            fin = open(self.fname, 'rb')
+        except (IOError, OSError):
+            return values  # nothing cached yet
+
+        with fin:
+            if fin.read(len(self.MAGIC)) != self.MAGIC:
+                return values  # not a cache - ignore it
+
+            fin.seek(0, os.SEEK_END)
+            nbars = self._records(fin.tell())
+            fin.seek(len(self.MAGIC))
+            values.frombytes(fin.read(nbars * len(self.FIELDS) * 8))
+
+        if sys.byteorder != 'little':
+            values.byteswap()
+
+        return values
+
+    def last(self):
+        '''Returns the datetime (float) of the last cached bar or ``None``'''
+        if self._f is None:
+            self._open()
+
+        return self._last
+
+    def _open(self):
+        nfields = len(self.FIELDS)
+        directory = os.path.dirname(self.fname)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        try:
+            self._f = f = open(self.fname, 'r+b')
+        except (IOError, OSError):
+            self._f = f = open(self.fname, 'w+b')
+
+        if f.read(len(self.MAGIC)) != self.MAGIC:
+            # new (or unusable) file
+            f.seek(0)
+            f.truncate()
+            f.write(self.MAGIC)
+            return
+
+        f.seek(0, os.SEEK_END)
+        nbars = self._records(f.tell())
+        end = len(self.MAGIC) + nbars * nfields * 8
+        f.truncate(end)  # drop an incomplete record if any
+        if nbars:
+            f.seek(end - nfields * 8)
+            rec = array.array(str('d'))
+            rec.frombytes(f.read(nfields * 8))
+            if sys.byteorder != 'little':
+                rec.byteswap()
+            self._last = rec[0]
+
+        f.seek(end)
+
+    def append(self, bar):
+        '''Appends ``bar`` (sequence of values in the order of ``FIELDS``) if
+        it is newer than the last cached bar. Returns ``True`` if appended'''
+        if self._f is None:
+            self._open()
+
+        if self._last is not None and bar[0] <= self._last:
+            return False
+
+        rec = array.array(str('d'), bar)
+        if sys.byteorder != 'little':
+            rec.byteswap()
+
+        self._f.write(rec.tobytes())
+        self._last = bar[0]
+        return True
+
+    def record(self, data):
+        '''Records the current bar of ``data``, caching the previously
+        recorded bar which is now known to be complete'''
+        if self._pending is not None:
+            self.append(self._pending)
+
+        self._pending = [getattr(data.lines, f)[0] for f in self.FIELDS]
+
+    def discard(self):
+        '''Drops the last recorded bar which has not yet been cached'''
+        self._pending = None
+
+    def close(self):
+        '''Closes the file, dropping any bar pending from ``record``'''
+        self._pending = None
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class BarCacheData(bt.DataBase):
+    '''Delivers the bars stored in a ``BarCache``, which is passed as
+    ``dataname``
+
+    The values are delivered as stored: the ``datetime`` is in UTC
+    '''
+
+    def start(self):
+        super(BarCacheData, self).start()
+        self._bars = self.p.dataname.read()
+        self._nfields = len(BarCache.FIELDS)
+        self._idx = 0
+
+    def stop(self):
+        super(BarCacheData, self).stop()
+        self._bars = array.array(str('d'))
+
+    def _load(self):
+        idx = self._idx
+        if idx >= len(self._bars):
+            return False
+
+        self._idx = idx + self._nfields
+        for i, field in enumerate(BarCache.FIELDS):
+            getattr(self.lines, field)[0] = self._bars[idx + i]
+
+        return True
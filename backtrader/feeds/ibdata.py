@@ -30,6 +30,7 @@ from backtrader.utils.py3 import (integer_types, queue, string_types,
                                   with_metaclass)
 from backtrader.metabase import MetaParams
 from backtrader.stores import ibstore
+from backtrader.feeds.barcache import BarCache, BarCacheData
 
 
 class MetaIBData(DataBase.__class__):
@@ -156,6 +157,15 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         backfilling from IB will take place. This is ideally meant to backfill
         from already stored sources like a file on disk, but not limited to.
 
+      - ``barcache`` (default: ``None``)
+
+        Directory in which the historical bars downloaded from IB are cached
+        (see ``BarCache``), one file per asset, ``what``, ``useRTH`` and
+        ``timeframe``/``compression``. The cached bars are delivered first
+        and only the missing tail is requested from IB. If ``backfill_from``
+        is also given, it takes the place of the cache as first source of
+        bars, but downloaded bars are still cached
+
       - ``latethrough`` (default: ``False``)
 
         If the data source is resampled/replayed, some ticks may come in too
@@ -169,6 +179,21 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         the ``IBStore`` instance and the TWS server time is not in sync with
         that of the local computer
 
+      - ``conflate`` (default: ``0``)
+
+        If greater than ``0`` and ticks are being received (no ``rtbar``), the
+        ticks already waiting in the queue when new data is needed are
+        coalesced into a single bar (first, highest, lowest and last price
+        and the sum of the sizes) instead of being delivered one by one. This
+        keeps the engine from falling behind during bursts.
+
+        Only ticks falling in the same window of ``conflate`` seconds (counted
+        from the epoch) are coalesced. Like bars, the windows are right-closed:
+        a tick exactly on a boundary belongs to the window ending there. When
+        resampling/replaying the value has to divide the target bar length
+        (``1`` works for any timeframe of seconds or larger) to keep the
+        resampled bars exact
+
       - ``tradename`` (default: ``None``)
         Useful for some specific cases like ``CFD`` in which prices are offered
         by one asset and trading happens in a different onel
@@ -204,7 +229,9 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         ('backfill_start', True),  # do backfilling at the start
         ('backfill', True),  # do backfilling when reconnecting
         ('backfill_from', None),  # additional data source to do backfill from
+        ('barcache', None),  # directory to cache downloaded bars
         ('latethrough', False),  # let late samples through
+        ('conflate', 0),  # seconds window to coalesce queued ticks
         ('tradename', None),  # use a different asset as order target
     )
 
@@ -216,6 +243,9 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
     # States for the Finite State Machine in _load
     _ST_FROM, _ST_START, _ST_LIVE, _ST_HISTORBACK, _ST_OVER = range(5)
 
+    # Reference for the conflation windows of ticks
+    _EPOCH = datetime.datetime(1970, 1, 1)
+
     def _timeoffset(self):
         return self.ib.timeoffset()
 
@@ -358,10 +388,21 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         self.tradecontract = None
         self.tradecontractdetails = None
 
-        if self.p.backfill_from is not None:
+        self._barcache = None
+        self._backfill_from = self.p.backfill_from
+        if self.p.barcache is not None:
+            cachename = '-'.join(
+                [self.p.dataname, self.p.what or ''] +
+                ['RTH'] * bool(self.p.useRTH))
+            self._barcache = BarCache(self.p.barcache, cachename,
+                                      self._timeframe, self._compression)
+            if self._backfill_from is None:
+                self._backfill_from = BarCacheData(dataname=self._barcache)
+
+        if self._backfill_from is not None:
             self._state = self._ST_FROM
-            self.p.backfill_from.setenvironment(self._env)
-            self.p.backfill_from._start()
+            self._backfill_from.setenvironment(self._env)
+            self._backfill_from._start()
         else:
             self._state = self._ST_START  # initial state for _load
         self._statelivereconn = False  # if reconnecting in live state
@@ -407,6 +448,8 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
     def stop(self):
         '''Stops and tells the store to stop'''
         super(IBData, self).stop()
+        if self._barcache is not None:
+            self._barcache.close()
         self.ib.stop()
 
     def reqdata(self):
@@ -442,8 +485,10 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         while True:
             if self._state == self._ST_LIVE:
                 try:
-                    msg = (self._storedmsg.pop(None, None) or
-                           self.qlive.get(timeout=self._qcheck))
+                    if None in self._storedmsg:
+                        msg = self._storedmsg.pop(None)
+                    else:
+                        msg = self.qlive.get(timeout=self._qcheck)
                 except queue.Empty:
                     if True:
                         return None
@@ -530,7 +575,10 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
                             self.put_notification(self.LIVE)
 
                     if self._usertvol:
-                        ret = self._load_rtvolume(msg)
+                        if self.p.conflate > 0:
+                            ret = self._load_rtvolumes(self._conflate(msg))
+                        else:
+                            ret = self._load_rtvolume(msg)
                     else:
                         ret = self._load_rtbar(msg)
                     if ret:
@@ -573,6 +621,7 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
                 msg = self.qhist.get()
                 if msg is None:  # Conn broken during historical/backfilling
                     # Situation not managed. Simply bail out
+                    self._cachediscard()
                     self._subcription_valid = False
                     self.put_notification(self.DISCONNECTED)
                     return False  # error management cancelled the queue
@@ -595,12 +644,15 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
 
                 if msg.date is not None:
                     if self._load_rtbar(msg, hist=True):
+                        if self._barcache is not None:
+                            self._barcache.record(self)
                         return True  # loading worked
 
                     # the date is from overlapping historical request
                     continue
 
-                # End of histdata
+                # End of histdata - last bar may be incomplete, do not cache
+                self._cachediscard()
                 if self.p.historical:  # only historical
                     self.put_notification(self.DISCONNECTED)
                     return False  # end of historical
@@ -610,14 +662,14 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
                 continue
 
             elif self._state == self._ST_FROM:
-                if not self.p.backfill_from.next():
+                if not self._backfill_from.next():
                     # additional data source is consumed
                     self._state = self._ST_START
                     continue
 
                 # copy lines of the same name
                 for alias in self.lines.getlinealiases():
-                    lsrc = getattr(self.p.backfill_from.lines, alias)
+                    lsrc = getattr(self._backfill_from.lines, alias)
                     ldst = getattr(self.lines, alias)
 
                     ldst[0] = lsrc[0]
@@ -636,7 +688,15 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
                 dtend = num2date(self.todate)
 
             dtbegin = None
-            if self.fromdate > float('-inf'):
+            if len(self) > 1:
+                # bars already delivered by backfill_from/cache: fetch tail
+                if self.lines.datetime[-1] >= self.todate:
+                    self.put_notification(self.DISCONNECTED)
+                    self._state = self._ST_OVER
+                    return False  # nothing else to fetch
+
+                dtbegin = num2date(self.lines.datetime[-1])
+            elif self.fromdate > float('-inf'):
                 dtbegin = num2date(self.fromdate)
 
             self.qhist = self.ib.reqHistoricalDataEx(
@@ -661,6 +721,10 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         self._state = self._ST_LIVE
         return True  # no return before - implicit continue
 
+    def _cachediscard(self):
+        if self._barcache is not None:
+            self._barcache.discard()
+
     def _load_rtbar(self, rtbar, hist=False):
         # A complete 5 second bar made of real-time ticks is delivered and
         # contains open/high/low/close/volume prices
@@ -702,3 +766,53 @@ class IBData(with_metaclass(MetaIBData, DataBase)):
         self.lines.openinterest[0] = 0
 
         return True
+
+    def _conflate(self, rtvol):
+        # Gather the ticks waiting in the queue which fall in the same
+        # conflation window as rtvol. The 1st message not belonging to it is
+        # kept for the next round
+        window = self.p.conflate
+        wkey = self._wkey(rtvol.datetime, window)
+        rtvols = [rtvol]
+        while True:
+            try:
+                msg = self.qlive.get_nowait()
+            except queue.Empty:
+                break
+
+            if (not isinstance(msg, ibstore.RTVolume) or
+                    self._wkey(msg.datetime, window) != wkey):
+                self._storedmsg[None] = msg
+                break
+
+            rtvols.append(msg)
+
+        return rtvols
+
+    def _wkey(self, dtobj, window):
+        # Index k of the conflation window ((k - 1) * window, k * window] in
+        # which dtobj falls: like bars, a tick on the boundary closes it
+        return -(-(dtobj - self._EPOCH).total_seconds() // window)
+
+    def _load_rtvolumes(self, rtvols):
+        # Several ticks are coalesced in a single bar
+        if len(rtvols) == 1:
+            return self._load_rtvolume(rtvols[0])
+
+        dts = [date2num(rtvol.datetime) for rtvol in rtvols]
+        if not self.p.latethrough:
+            dtlast = self.lines.datetime[-1]
+            rtvols = [r for r, dt in zip(rtvols, dts) if not dt < dtlast]
+            if not rtvols:
+                return False  # cannot deliver earlier than already delivered
+
+        prices = [rtvol.price for rtvol in rtvols]
+        self.lines.datetime[0] = max(dts)
+        self.lines.open[0] = prices[0]
+        self.lines.high[0] = max(prices)
+        self.lines.low[0] = min(prices)
+        self.lines.close[0] = prices[-1]
+        self.lines.volume[0] = sum(rtvol.size for rtvol in rtvols)
+        self.lines.openinterest[0] = 0
+
+        return True
@@ -21,10 +21,15 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
+import datetime as dt
+import itertools
+import math
+
 import backtrader as bt
 import backtrader.feed as feed
-from ..utils import date2num
-import datetime as dt
+from ..utils.dateintern import (HOURS_PER_DAY, MINUTES_PER_DAY,
+                                SECONDS_PER_DAY)
 
 TIMEFRAMES = dict(
     (
@@ -37,8 +42,55 @@ TIMEFRAMES = dict(
     )
 )
 
+# Length in seconds of the InfluxQL duration units used in TIMEFRAMES, to be
+# able to move the paging cursor past the last GROUP BY time bucket
+UNITSECONDS = dict(s=1, m=60, h=3600, d=86400, w=604800)
+
+EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+def _epoch2num(secs):
+    '''Converts seconds since the epoch to the internal float format, with the
+    same result as date2num on the equivalent naive UTC datetime'''
+    days, secs = divmod(int(secs), 86400)
+    hours, secs = divmod(secs, 3600)
+    minutes, secs = divmod(secs, 60)
+    return math.fsum((float(EPOCH_ORDINAL + days), hours / HOURS_PER_DAY,
+                      minutes / MINUTES_PER_DAY, secs / SECONDS_PER_DAY))
+
+
+def _num2epoch(num):
+    '''Converts the internal float format to seconds since the epoch'''
+    return int(round((num - EPOCH_ORDINAL) * SECONDS_PER_DAY))
+
+
+def _float(val):
+    return float('NaN') if val is None else val
+
 
 class InfluxDB(feed.DataBase):
+    '''
+    InfluxDB (1.x) data feed
+
+    The ``fromdate`` and ``todate`` parameters are part of the query, to have
+    the server skip the bars outside of the range. If ``fromdate`` is not
+    given, ``startdate`` (a string with a time literal for the server) is used
+    as the lower bound if present.
+
+    Params:
+
+      - ``chunksize`` (default: ``10000``)
+
+        Maximum number of bars requested per query. Results are paged through
+        with consecutive queries, so that only one chunk of results is held in
+        memory at once. ``0`` or ``None`` requests everything in a single query
+
+      - ``bulkpreload`` (default: ``True``)
+
+        If the data is preloaded and no filters are in place, each chunk of
+        bars is copied in one go to the line buffers, instead of going bar by
+        bar through the generic ``load`` machinery
+    '''
     frompackages = (
         ('influxdb', [('InfluxDBClient', 'idbclient')]),
         ('influxdb.exceptions', 'InfluxDBClientError')
@@ -58,44 +110,117 @@ class InfluxDB(feed.DataBase):
         ('close', 'close_p'),
         ('volume', 'volume'),
         ('ointerest', 'oi'),
+        ('chunksize', 10000),
+        ('bulkpreload', True),
     )
 
+    # fields returned by the query and lines in which they are stored
+    _fields = ('open', 'high', 'low', 'close', 'volume')
+
     def start(self):
         super(InfluxDB, self).start()
+        # fromdate/todate have to be converted to be part of the query
+        self._start_finish()
+
+        self.ndb = None
         try:
             self.ndb = idbclient(self.p.host, self.p.port, self.p.username,
                                  self.p.password, self.p.database)
         except InfluxDBClientError as err:
             print('Failed to establish connection to InfluxDB: %s' % err)
 
-        tf = '{multiple}{timeframe}'.format(
-            multiple=(self.p.compression if self.p.compression else 1),
-            timeframe=TIMEFRAMES.get(self.p.timeframe, 'd'))
+        unit = TIMEFRAMES.get(self.p.timeframe, 'd')
+        multiple = self.p.compression if self.p.compression else 1
+        self._tf = '{}{}'.format(multiple, unit)
+        self._tfsecs = multiple * UNITSECONDS.get(unit, 0)
+
+        # Nothing is fetched until the 1st chunk is requested
+        self.chunks = self._iterchunks()
+        self.biter = itertools.chain.from_iterable(self.chunks)
 
-        if not self.p.startdate:
-            st = '<= now()'
-        else:
-            st = '>= \'%s\'' % self.p.startdate
+    def _query(self, cursor=None):
+        '''Returns the query string for the bars starting at ``cursor``
+        (seconds since the epoch) or at the beginning of the range if
+        ``None``'''
+        where = []
+        if cursor is not None:
+            where.append('time >= {}s'.format(cursor))
+        elif self.fromdate != float('-inf'):
+            where.append('time >= {}s'.format(_num2epoch(self.fromdate)))
+        elif self.p.startdate:
+            where.append('time >= \'%s\'' % self.p.startdate)
+
+        if self.todate != float('inf'):
+            where.append('time <= {}s'.format(_num2epoch(self.todate)))
+        elif not where:
+            where.append('time <= now()')
 
-        # The query could already consider parameters like fromdate and todate
-        # to have the database skip them and not the internal code
         qstr = ('SELECT mean("{open_f}") AS "open", mean("{high_f}") AS "high", '
                 'mean("{low_f}") AS "low", mean("{close_f}") AS "close", '
                 'mean("{vol_f}") AS "volume", mean("{oi_f}") AS "openinterest" '
                 'FROM "{dataname}" '
-                'WHERE time {begin} '
+                'WHERE {where} '
                 'GROUP BY time({timeframe}) fill(none)').format(
                     open_f=self.p.open, high_f=self.p.high,
                     low_f=self.p.low, close_f=self.p.close,
                     vol_f=self.p.volume, oi_f=self.p.ointerest,
-                    timeframe=tf, begin=st, dataname=self.p.dataname)
+                    timeframe=self._tf, where=' AND '.join(where),
+                    dataname=self.p.dataname)
 
-        try:
-            dbars = list(self.ndb.query(qstr).get_points())
-        except InfluxDBClientError as err:
-            print('InfluxDB query failed: %s' % err)
+        if self._paged():
+            qstr += ' LIMIT {}'.format(self.p.chunksize)
+
+        return qstr
+
+    def _paged(self):
+        # the cursor can only be moved past a bucket of known length
+        return bool(self.p.chunksize) and bool(self._tfsecs)
+
+    def _iterchunks(self):
+        '''Generator which delivers the bars in lists of at most ``chunksize``
+        elements, issuing a new query for each chunk'''
+        if self.ndb is None:
+            return
+
+        cursor = None
+        while True:
+            qstr = self._query(cursor)
+            try:
+                bars = list(self.ndb.query(qstr, epoch='s').get_points())
+            except InfluxDBClientError as err:
+                print('InfluxDB query failed: %s' % err)
+                return
+
+            if bars:
+                yield bars
+
+            if not self._paged() or len(bars) < self.p.chunksize:
+                return
+
+            # time is the start of the bucket: skip to the next one
+            cursor = bars[-1]['time'] + self._tfsecs
+
+    def preload(self):
+        dtarray = self.lines.datetime.array
+        if (not self.p.bulkpreload or self._filters or self._ffilters or
+                self._tzinput or not isinstance(dtarray, array.array)):
+            super(InfluxDB, self).preload()
+            return
+
+        lines = [getattr(self.lines, f) for f in self._fields]
+        for bars in self.chunks:
+            size = len(bars)
+            self.forward(size=size)
+
+            dtarray[-size:] = array.array(
+                str('d'), [_epoch2num(bar['time']) for bar in bars])
+
+            for f, line in zip(self._fields, lines):
+                line.array[-size:] = array.array(
+                    str('d'), [_float(bar[f]) for bar in bars])
 
-        self.biter = iter(dbars)
+        self._last()
+        self.home()
 
     def _load(self):
         try:
@@ -103,13 +228,12 @@ class InfluxDB(feed.DataBase):
         except StopIteration:
             return False
 
-        self.l.datetime[0] = date2num(dt.datetime.strptime(bar['time'],
-                                                           '%Y-%m-%dT%H:%M:%SZ'))
+        self.l.datetime[0] = _epoch2num(bar['time'])
 
-        self.l.open[0] = bar['open']
-        self.l.high[0] = bar['high']
-        self.l.low[0] = bar['low']
-        self.l.close[0] = bar['close']
-        self.l.volume[0] = bar['volume']
+        self.l.open[0] = _float(bar['open'])
+        self.l.high[0] = _float(bar['high'])
+        self.l.low[0] = _float(bar['low'])
+        self.l.close[0] = _float(bar['close'])
+        self.l.volume[0] = _float(bar['volume'])
 
         return True
@@ -29,6 +29,7 @@ from backtrader.utils.py3 import (integer_types, queue, string_types,
                                   with_metaclass)
 from backtrader.metabase import MetaParams
 from backtrader.stores import oandastore
+from backtrader.feeds.barcache import BarCache, BarCacheData
 
 
 class MetaOandaData(DataBase.__class__):
@@ -80,6 +81,15 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
         backfilling from IB will take place. This is ideally meant to backfill
         from already stored sources like a file on disk, but not limited to.
 
+      - ``barcache`` (default: ``None``)
+
+        Directory in which the historical candles downloaded from Oanda are
+        cached (see ``BarCache``), one file per instrument, price (bid, ask
+        or midpoint) and ``timeframe``/``compression``. The cached bars are
+        delivered first and only the missing tail is requested from Oanda. If
+        ``backfill_from`` is also given, it takes the place of the cache as
+        first source of bars, but downloaded bars are still cached
+
       - ``bidask`` (default: ``True``)
 
         If ``True``, then the historical/backfilling requests will request
@@ -97,6 +107,20 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
         Influence the delivery of the 1st bar of a historical/backfilling
         request by setting the parameter directly to the Oanda API calls
 
+      - ``conflate`` (default: ``0``)
+
+        If greater than ``0``, the streamed prices already waiting in the
+        queue when new data is needed are coalesced into a single bar (first,
+        highest, lowest and last price) instead of being delivered one by one.
+        This keeps the engine from falling behind during bursts.
+
+        Only prices falling in the same window of ``conflate`` seconds
+        (counted from the epoch) are coalesced. Like bars, the windows are
+        right-closed: a price exactly on a boundary belongs to the window
+        ending there. When resampling/replaying the value has to divide the
+        target bar length (``1`` works for any timeframe of seconds or larger)
+        to keep the resampled bars exact
+
       - ``reconnect`` (default: ``True``)
 
         Reconnect when network connection is down
@@ -143,9 +167,11 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
         ('backfill_start', True),  # do backfilling at the start
         ('backfill', True),  # do backfilling when reconnecting
         ('backfill_from', None),  # additional data source to do backfill from
+        ('barcache', None),  # directory to cache downloaded candles
         ('bidask', True),
         ('useask', False),
         ('includeFirst', True),
+        ('conflate', 0),  # seconds window to coalesce queued prices
         ('reconnect', True),
         ('reconnections', -1),  # forever
         ('reconntimeout', 5.0),
@@ -187,6 +213,7 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
         self._storedmsg = dict()  # keep pending live message (under None)
         self.qlive = queue.Queue()
         self._state = self._ST_OVER
+        self._barcache = None
 
         # Kickstart store and get queue to wait on
         self.o.start(data=self)
@@ -204,9 +231,22 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
             self._state = self._ST_OVER
             return
 
-        if self.p.backfill_from is not None:
+        self._backfill_from = self.p.backfill_from
+        if self.p.barcache is not None:
+            price = 'mid'
+            if self.p.bidask:
+                price = 'ask' if self.p.useask else 'bid'
+
+            self._barcache = BarCache(self.p.barcache,
+                                      '%s-%s' % (self.p.dataname, price),
+                                      self._timeframe, self._compression)
+            if self._backfill_from is None:
+                self._backfill_from = BarCacheData(dataname=self._barcache)
+
+        if self._backfill_from is not None:
             self._state = self._ST_FROM
-            self.p.backfill_from._start()
+            self._backfill_from.setenvironment(self._env)
+            self._backfill_from._start()
         else:
             self._start_finish()
             self._state = self._ST_START  # initial state for _load
@@ -222,7 +262,14 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
                 dtend = num2date(self.todate)
 
             dtbegin = None
-            if self.fromdate > float('-inf'):
+            if len(self) > 1:
+                # bars already delivered by backfill_from/cache: fetch tail
+                if self.lines.datetime[-1] >= self.todate:
+                    self.put_notification(self.DISCONNECTED)
+                    return False  # nothing else to fetch
+
+                dtbegin = num2date(self.lines.datetime[-1])
+            elif self.fromdate > float('-inf'):
                 dtbegin = num2date(self.fromdate)
 
             self.qhist = self.o.candles(
@@ -252,6 +299,8 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
     def stop(self):
         '''Stops and tells the store to stop'''
         super(OandaData, self).stop()
+        if self._barcache is not None:
+            self._barcache.close()
         self.o.stop()
 
     def haslivedata(self):
@@ -264,8 +313,10 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
         while True:
             if self._state == self._ST_LIVE:
                 try:
-                    msg = (self._storedmsg.pop(None, None) or
-                           self.qlive.get(timeout=self._qcheck))
+                    if None in self._storedmsg:
+                        msg = self._storedmsg.pop(None)
+                    else:
+                        msg = self.qlive.get(timeout=self._qcheck)
                 except queue.Empty:
                     return None  # indicate timeout situation
 
@@ -309,7 +360,10 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
                         if self.qlive.qsize() <= 1:  # very short live queue
                             self.put_notification(self.LIVE)
 
-                    ret = self._load_tick(msg)
+                    if self.p.conflate > 0:
+                        ret = self._load_ticks(self._conflate(msg))
+                    else:
+                        ret = self._load_tick(msg)
                     if ret:
                         return True
 
@@ -349,6 +403,7 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
                 msg = self.qhist.get()
                 if msg is None:  # Conn broken during historical/backfilling
                     # Situation not managed. Simply bail out
+                    self._cachediscard()
                     self.put_notification(self.DISCONNECTED)
                     self._state = self._ST_OVER
                     return False  # error management cancelled the queue
@@ -361,11 +416,14 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
 
                 if msg:
                     if self._load_history(msg):
+                        if self._barcache is not None:
+                            self._barcache.record(self)
                         return True  # loading worked
 
                     continue  # not loaded ... date may have been seen
                 else:
-                    # End of histdata
+                    # End of histdata - last candle may be incomplete
+                    self._cachediscard()
                     if self.p.historical:  # only historical
                         self.put_notification(self.DISCONNECTED)
                         self._state = self._ST_OVER
@@ -376,14 +434,14 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
                 continue
 
             elif self._state == self._ST_FROM:
-                if not self.p.backfill_from.next():
+                if not self._backfill_from.next():
                     # additional data source is consumed
                     self._state = self._ST_START
                     continue
 
                 # copy lines of the same name
                 for alias in self.lines.getlinealiases():
-                    lsrc = getattr(self.p.backfill_from.lines, alias)
+                    lsrc = getattr(self._backfill_from.lines, alias)
                     ldst = getattr(self.lines, alias)
 
                     ldst[0] = lsrc[0]
@@ -395,6 +453,10 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
                     self._state = self._ST_OVER
                     return False
 
+    def _cachediscard(self):
+        if self._barcache is not None:
+            self._barcache.discard()
+
     def _load_tick(self, msg):
         dtobj = datetime.utcfromtimestamp(int(msg['time']) / 10 ** 6)
         dt = date2num(dtobj)
@@ -417,6 +479,60 @@ class OandaData(with_metaclass(MetaOandaData, DataBase)):
 
         return True
 
+    def _conflate(self, msg):
+        # Gather the prices waiting in the queue which fall in the same
+        # conflation window as msg. The 1st message not belonging to it is
+        # kept for the next round
+        window = int(self.p.conflate * 10 ** 6)  # times are in microseconds
+        wkey = self._wkey(msg, window)
+        msgs = [msg]
+        while True:
+            try:
+                nmsg = self.qlive.get_nowait()
+            except queue.Empty:
+                break
+
+            if (nmsg is None or 'code' in nmsg or
+                    self._wkey(nmsg, window) != wkey):
+                self._storedmsg[None] = nmsg
+                break
+
+            msgs.append(nmsg)
+
+        return msgs
+
+    def _wkey(self, msg, window):
+        # Index k of the conflation window ((k - 1) * window, k * window] in
+        # which msg falls: like bars, a price on the boundary closes it
+        return -(-int(msg['time']) // window)
+
+    def _load_ticks(self, msgs):
+        # Several prices are coalesced in a single bar
+        if len(msgs) == 1:
+            return self._load_tick(msgs[0])
+
+        dtlast = self.lines.datetime[-1]
+        dts, ticks = list(), list()
+        for msg in msgs:
+            dtobj = datetime.utcfromtimestamp(int(msg['time']) / 10 ** 6)
+            dt = date2num(dtobj)
+            if not dt <= dtlast:  # else time already seen
+                dts.append(dt)
+                ticks.append(float(msg['ask' if self.p.useask else 'bid']))
+
+        if not ticks:
+            return False
+
+        self.lines.datetime[0] = max(dts)
+        self.lines.open[0] = ticks[0]
+        self.lines.high[0] = max(ticks)
+        self.lines.low[0] = min(ticks)
+        self.lines.close[0] = ticks[-1]
+        self.lines.volume[0] = 0.0
+        self.lines.openinterest[0] = 0.0
+
+        return True
+
     def _load_history(self, msg):
         dtobj = datetime.utcfromtimestamp(int(msg['time']) / 10 ** 6)
         dt = date2num(dtobj)
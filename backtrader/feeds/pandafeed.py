@@ -24,6 +24,7 @@ from __future__ import (absolute_import, division, print_function,
 from backtrader.utils.py3 import filter, string_types, integer_types
 
 from backtrader import date2num
+from backtrader.utils import datetime642num
 import backtrader.feed as feed
 
 
@@ -231,6 +232,18 @@ class PandasData(feed.DataBase):
 
             self._colmapping[k] = v
 
+        # datetime64 timestamps are converted at once for all rows
+        coldtime = self._colmapping['datetime']
+        if coldtime is None:
+            tstamps = self.p.dataname.index.values
+        else:
+            tstamps = self.p.dataname.iloc[:, coldtime].values
+
+        self._dtnums = None
+        if getattr(tstamps, 'dtype', None) is not None:
+            if tstamps.dtype.kind == 'M':  # numpy datetime64
+                self._dtnums = datetime642num(tstamps)
+
     def _load(self):
         self._idx += 1
 
@@ -255,6 +268,10 @@ class PandasData(feed.DataBase):
             line[0] = self.p.dataname.iloc[self._idx, colindex]
 
         # datetime conversion
+        if self._dtnums is not None:
+            self.lines.datetime[0] = self._dtnums[self._idx]
+            return True
+
         coldtime = self._colmapping['datetime']
 
         if coldtime is None:
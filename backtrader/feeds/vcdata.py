@@ -32,6 +32,7 @@ from backtrader.utils.py3 import (integer_types, queue, string_types,
                                   with_metaclass)
 
 from backtrader.stores import vcstore
+from backtrader.feeds.barcache import BarCache, BarCacheData
 
 
 class MetaVCData(DataBase.__class__):
@@ -92,6 +93,12 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
 
         Disabling it will remove timezone usage (may help if the load is
         excesive)
+
+      - ``barcache`` (default: ``None``)
+        Directory in which the historical bars received from *Visual Chart*
+        are cached (see ``BarCache``), one file per symbol and
+        ``timeframe``/``compression``. The cached bars are delivered first and
+        only the missing tail is requested. Ticks are not cached
     '''
     params = (
         ('qcheck', 0.5),  # timeout in seconds (float) to check for events
@@ -99,6 +106,7 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
         ('millisecond', True),  # fix missing millisecond in time
         ('tradename', None),  # name of the real asset to trade on
         ('usetimezones', True),  # use pytz timezones if found
+        ('barcache', None),  # directory to cache historical bars
     )
 
     # Holds the calculated offset to the timestamps of the VC Server
@@ -280,6 +288,8 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
 
         self.idx = 1  # counter for the dataserie (vb is based at 1)
         self.q = None  # where bars are received
+        self._barcache = None  # local cache of historical bars
+        self._cachedata = None  # source of cached bars delivered first
 
         # market time offsets
         self._mktoffset = None
@@ -346,6 +356,20 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
 
         self._mktoffdiff = self._mktoffset - self._mktoff1
 
+        fromdate = self.p.fromdate
+        if self.p.barcache is not None and not self._ticking:
+            self._barcache = BarCache(self.p.barcache, self._dataname,
+                                      self._tf, self._comp)
+            lastcached = self._barcache.last()
+            if lastcached is not None:
+                self._cachedata = BarCacheData(dataname=self._barcache)
+                self._cachedata.setenvironment(self._env)
+                self._cachedata._start()
+                # request only what is missing after the cached bars
+                lastdt = num2date(lastcached)
+                if fromdate is None or fromdate < lastdt:
+                    fromdate = lastdt
+
         if self._state == self._ST_START:
             self.put_notification(self.DELAYED)
 
@@ -354,7 +378,7 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
                 self,
                 self._dataname,
                 self._tf, self._comp,
-                self.p.fromdate, self.p.todate,
+                fromdate, self.p.todate,
                 self.p.historical)
 
             self._state = self._ST_FEEDING
@@ -365,6 +389,9 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
         if self.q:
             self.store._canceldirectdata(self.q)
 
+        if self._barcache is not None:
+            self._barcache.close()
+
     def _setserie(self, serie):
         # Accepts a serie (COM Object) to use in ping events
         self._serie = serie
@@ -376,6 +403,16 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
         if self._state == self._ST_NOTFOUND:
             return False  # nothing can be done
 
+        if self._cachedata is not None:
+            if self._cachedata.next():
+                for alias in self.lines.getlinealiases():
+                    lsrc = getattr(self._cachedata.lines, alias)
+                    getattr(self.lines, alias)[0] = lsrc[0]
+
+                return True
+
+            self._cachedata = None  # depleted, continue with vc bars
+
         while True:
             try:
                 # tmout <> 0 only if resampling/replaying, else no waking up
@@ -401,6 +438,9 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
                 continue
 
             if msg == self.store._RT_LIVE:
+                if self._barcache is not None:
+                    self._barcache.discard()  # last bar may be incomplete
+
                 if self._laststatus != self.LIVE:
                     self.put_notification(self.LIVE)
                 continue
@@ -417,6 +457,13 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
             # it must be a bar
             bar = msg
 
+            # Convert time to "market" time (096 exception)
+            dt = self.NULLDATE + timedelta(days=bar.Date) - self._mktoffset
+            dtnum = date2num(dt)
+            if self._barcache is not None and len(self) > 1:
+                if dtnum <= self.lines.datetime[-1]:
+                    continue  # already delivered from the cache
+
             # Put the tick into the bar
             self.lines.open[0] = bar.Open
             self.lines.high[0] = bar.High
@@ -424,10 +471,10 @@ class VCData(with_metaclass(MetaVCData, DataBase)):
             self.lines.close[0] = bar.Close
             self.lines.volume[0] = bar.Volume
             self.lines.openinterest[0] = bar.OpenInterest
+            self.lines.datetime[0] = dtnum
 
-            # Convert time to "market" time (096 exception)
-            dt = self.NULLDATE + timedelta(days=bar.Date) - self._mktoffset
-            self.lines.datetime[0] = date2num(dt)
+            if self._barcache is not None and self._laststatus != self.LIVE:
+                self._barcache.record(self)
 
             return True
 
@@ -88,3 +88,4 @@ from .ichimoku import *
 from .hurst import *
 from .ols import *
 from .hadelta import *
+from .crosssection import *
@@ -21,6 +21,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
 import functools
 import math
 import operator
@@ -28,6 +29,13 @@ import operator
 from ..utils.py3 import map, range
 
 from . import Indicator
+from ..mathsupport import RollingMinMax
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:  # numpy not present or too old
+    np = None
 
 
 class PeriodN(Indicator):
@@ -54,13 +62,32 @@ class OperationN(PeriodN):
     Note:
       Base classes must provide a "func" attribute which is a callable
 
+      Base classes can provide a "vfunc" attribute, a vectorized version of
+      "func", which will be used in "once" mode if ``numpy`` is available. It
+      receives a 2-D ``numpy`` array in which each row is a window of
+      ``period`` values (a strided view of the data, no copy) and has to
+      return a 1-D array with one result per row. A subclass (or instance)
+      which changes "func" but not "vfunc" does not use the inherited "vfunc",
+      because it would no longer match "func"
+
     Formula:
       - line = func(data, period)
     '''
+    vfunc = None
+
+    # maximum number of values (rows * period) passed to vfunc at once, to
+    # bound the memory of the temporaries that vfunc may create
+    vchunk = 1 << 20
+
     def next(self):
         self.line[0] = self.func(self.data.get(size=self.p.period))
 
     def once(self, start, end):
+        if (self.vfunc is not None and np is not None and
+                not self._funcchanged('vfunc')):
+            self._once_windows(start, end)
+            return
+
         dst = self.line.array
         src = self.data.array
         period = self.p.period
@@ -69,6 +96,44 @@ class OperationN(PeriodN):
         for i in range(start, end):
             dst[i] = func(src[i - period + 1: i + 1])
 
+    def _once_windows(self, start, end):
+        dst = self.line.array
+        period = self.p.period
+        vfunc = self.vfunc
+
+        src = self.data.array
+        if isinstance(src, array.array) and src.typecode == 'd':
+            src = np.frombuffer(src, dtype=np.float64)  # view, no copy
+        else:
+            src = np.asarray(src, dtype=np.float64)
+
+        # row r is the window which ends at index r + period - 1
+        windows = sliding_window_view(src[:end], period)
+
+        rstep = max(1, self.vchunk // period)
+        for i in range(start, end, rstep):
+            iend = min(i + rstep, end)
+            out = vfunc(windows[i - period + 1:iend - period + 1])
+            out = np.asarray(out, dtype=np.float64)
+            dst[i:iend] = array.array(str('d'), out.tobytes())
+
+    def _setat(self, name):
+        # 0 if name is set in the instance, else the position in the mro of the
+        # class which sets it (the larger, the further up in the hierarchy)
+        if name in vars(self):
+            return 0
+
+        for i, cls in enumerate(type(self).__mro__, 1):
+            if name in vars(cls):
+                return i
+
+        return len(type(self).__mro__) + 1
+
+    def _funcchanged(self, name):
+        # True if func has been set below the level at which "name" (a faster
+        # implementation of the func of that level) was set
+        return self._setat('func') < self._setat(name)
+
 
 class BaseApplyN(OperationN):
     '''
@@ -81,14 +146,36 @@ class BaseApplyN(OperationN):
     Formula:
       - lines[0] = func(data, period)
 
+    A vectorized version of ``func`` can be passed as ``vfunc`` (see
+    ``OperationN``). If ``func`` is changed (as a parameter or as the default
+    of a subclass) and ``vfunc`` is left at its default, the default ``vfunc``
+    is not used, because it would not match ``func``
+
     Any extra lines defined beyond the first (index 0) are not calculated
     '''
-    params = (('func', None),)
+    params = (('func', None), ('vfunc', None),)
 
     def __init__(self):
         self.func = self.p.func
+        self.vfunc = self.p.vfunc
         super(BaseApplyN, self).__init__()
 
+    def _setat(self, name):
+        # func and vfunc are params: set in the instance if given as kwargs,
+        # else by the class which last changed the default
+        if self.p.notdefault(name):
+            return 0
+
+        mro = type(self).__mro__
+        for i, (cls, base) in enumerate(zip(mro, mro[1:]), 1):
+            pdef = cls.params._getpairs().get(name)
+            if not hasattr(base, 'params') or \
+                    name not in base.params._getpairs() or \
+                    base.params._getpairs()[name] is not pdef:
+                return i
+
+        return len(mro) + 1
+
 
 class ApplyN(BaseApplyN):
     '''
@@ -96,6 +183,9 @@ class ApplyN(BaseApplyN):
 
     Formula:
       - line = func(data, period)
+
+    If ``vfunc`` is given (see ``OperationN``), it will be used in ``once``
+    mode. Example: ``ApplyN(data, func=max, vfunc=lambda w: w.max(axis=1))``
     '''
     lines = ('apply',)
 
@@ -113,6 +203,21 @@ class Highest(OperationN):
     lines = ('highest',)
     func = max
 
+    def once(self, start, end):
+        if self._funcchanged('once'):  # the rolling window only does max
+            super(Highest, self).once(start, end)
+            return
+
+        dst = self.line.array
+        src = self.data.array
+        period = self.p.period
+
+        rolling = RollingMinMax(period)
+        for i in range(start - period + 1, end):
+            rolling.push(src[i])
+            if i >= start:
+                dst[i] = rolling.max()
+
 
 class Lowest(OperationN):
     '''
@@ -127,6 +232,21 @@ class Lowest(OperationN):
     lines = ('lowest',)
     func = min
 
+    def once(self, start, end):
+        if self._funcchanged('once'):  # the rolling window only does min
+            super(Lowest, self).once(start, end)
+            return
+
+        dst = self.line.array
+        src = self.data.array
+        period = self.p.period
+
+        rolling = RollingMinMax(period)
+        for i in range(start - period + 1, end):
+            rolling.push(src[i])
+            if i >= start:
+                dst[i] = rolling.min()
+
 
 class ReduceN(OperationN):
     '''
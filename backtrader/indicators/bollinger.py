@@ -56,8 +56,14 @@ class BollingerBands(Indicator):
 
     def __init__(self):
         self.lines.mid = ma = self.p.movav(self.data, period=self.p.period)
-        stddev = self.p.devfactor * StdDev(self.data, ma, period=self.p.period,
-                                           movav=self.p.movav)
+        if self.p.movav is MovAv.Simple:
+            # the simple mean is tracked by the rolling estimator
+            stddev = StdDev(self.data, period=self.p.period)
+        else:
+            stddev = StdDev(self.data, ma, period=self.p.period,
+                            movav=self.p.movav)
+
+        stddev = self.p.devfactor * stddev
         self.lines.top = ma + stddev
         self.lines.bot = ma - stddev
 
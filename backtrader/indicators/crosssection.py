@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import array
+import bisect
+import math
+
+from ..utils.py3 import range, with_metaclass
+from . import Indicator
+
+try:
+    import numpy as np
+except ImportError:  # numpy not present
+    np = None
+
+
+__all__ = ['CrossSectional', 'CSRank', 'CSZScore', 'CSDemean', 'CSQuantile']
+
+NAN = float('NaN')
+
+
+class MetaCrossSectional(Indicator.__class__):
+    _linescls = dict()  # (lines class, number of lines) -> derived lines
+
+    def donew(cls, *args, **kwargs):
+        _obj, args, kwargs = \
+            super(MetaCrossSectional, cls).donew(*args, **kwargs)
+
+        # One output line per input data: cs0, cs1, ...
+        key = (cls.lines, len(_obj.datas))
+        linescls = cls._linescls.get(key, None)
+        if linescls is None:
+            lnames = tuple('cs%d' % i for i in range(len(_obj.datas)))
+            linescls = cls.lines._derive('cs%d' % len(lnames), lnames, 0, ())
+            cls._linescls[key] = linescls
+
+        _obj.lines = _obj.l = linescls()
+        _obj.line = _obj.lines[0]
+
+        return _obj, args, kwargs
+
+
+class CrossSectional(with_metaclass(MetaCrossSectional, Indicator)):
+    '''
+    Base class for the indicators which calculate, at each step, a value for
+    each of the datas from the values of all the datas (a cross-section of the
+    universe), like a rank or a z-score. The datas have to be aligned (same
+    timeframe and bars)
+
+    There is one output line per data: ``cs0``, ``cs1``, ... in the order in
+    which the datas were passed. ``getline(data)`` returns the line of a data
+
+    Subclasses provide:
+
+      - ``csfunc(values)``: receives the list of values of the datas (``NaN``
+        if not available) and returns the list of results
+
+      - ``csvfunc(rows)``: vectorized version used if ``numpy`` is available.
+        It receives a 2-D array (time x datas) and returns an array with the
+        same shape
+
+    In ``once`` mode the values of all datas are stacked in a 2-D array and
+    ``csvfunc`` processes it in chunks of at most ``vchunk`` values
+    '''
+    _mindatas = 1
+
+    # maximum number of values (rows * datas) passed to csvfunc at once, to
+    # bound the memory of the 2-D arrays
+    vchunk = 1 << 20
+
+    def getline(self, data):
+        '''Returns the output line which corresponds to ``data`` (a data, an
+        indicator or a line, as passed to the indicator)'''
+        for d, line in zip(self.datas, self.lines):
+            if d is data or d.lines[0] is data:  # lines are wrapped
+                return line
+
+        raise ValueError('data is not part of the cross-section')
+
+    def next(self):
+        values = [d[0] for d in self.datas]
+        if np is not None:
+            values = self.csvfunc(np.array([values], dtype=np.float64))[0]
+        else:
+            values = self.csfunc(values)
+
+        for line, value in zip(self.lines, values):
+            line[0] = value
+
+    def once(self, start, end):
+        srcs = [d.array for d in self.datas]
+        dsts = [line.array for line in self.lines]
+
+        if np is None:
+            csfunc = self.csfunc
+            for i in range(start, end):
+                for dst, value in zip(dsts, csfunc([s[i] for s in srcs])):
+                    dst[i] = value
+            return
+
+        ndatas = len(srcs)
+        rstep = max(1, self.vchunk // ndatas)
+        for i in range(start, end, rstep):
+            iend = min(i + rstep, end)
+            rows = np.empty((iend - i, ndatas), dtype=np.float64)
+            for col, src in enumerate(srcs):
+                rows[:, col] = src[i:iend]
+
+            out = np.ascontiguousarray(self.csvfunc(rows).T, dtype=np.float64)
+            for dst, col in zip(dsts, out):
+                dst[i:iend] = array.array(str('d'), col.tobytes())
+
+    def csfunc(self, values):
+        raise NotImplementedError
+
+    def csvfunc(self, rows):
+        raise NotImplementedError
+
+
+def _nanmeanstd(rows):
+    '''Returns the mean and standard deviation of each row of ``rows``
+    skipping the ``NaN`` values, as columns (to broadcast over the rows)'''
+    valid = ~np.isnan(rows)
+    count = valid.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, rows, 0.0).sum(axis=1, keepdims=True) / count
+        dev = np.where(valid, rows - mean, 0.0)
+        std = np.sqrt((dev * dev).sum(axis=1, keepdims=True) / count)
+
+    return mean, std
+
+
+def _meanstd(values):
+    '''Returns the mean and standard deviation of the values which are not
+    ``NaN`` (both ``NaN`` if there is none)'''
+    valid = [v for v in values if v == v]  # v != v only for NaN
+    if not valid:
+        return NAN, NAN
+
+    mean = math.fsum(valid) / len(valid)
+    std = math.sqrt(math.fsum((v - mean) ** 2 for v in valid) / len(valid))
+    return mean, std
+
+
+def _ranks(values):
+    '''Returns the (1-based, averaged over ties) ranks of ``values`` leaving
+    ``NaN`` unranked and the number of ranked values'''
+    ordered = sorted(v for v in values if v == v)
+    ranks = []
+    for v in values:
+        if v != v:
+            ranks.append(NAN)
+        else:
+            lo = bisect.bisect_left(ordered, v)
+            hi = bisect.bisect_right(ordered, v)
+            ranks.append((lo + hi + 1) / 2.0)
+
+    return ranks, len(ordered)
+
+
+def _vranks(rows):
+    '''Vectorized ``_ranks`` for all the rows of ``rows`` at once. The number
+    of ranked values is returned as a column (to broadcast over the rows)'''
+    nrows, ncols = rows.shape
+    order = np.argsort(rows, axis=1)  # NaN sorted last
+    ordered = np.take_along_axis(rows, order, axis=1)
+
+    # positions of the first and last element of each group of equal values
+    pos = np.broadcast_to(np.arange(ncols), rows.shape)
+    first = np.ones(rows.shape, dtype=bool)
+    first[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    last = np.ones(rows.shape, dtype=bool)
+    last[:, :-1] = first[:, 1:]
+    lo = np.maximum.accumulate(np.where(first, pos, 0), axis=1)
+    hi = np.minimum.accumulate(
+        np.where(last, pos, ncols - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    ranks = np.empty_like(rows)
+    np.put_along_axis(ranks, order, (lo + hi) / 2.0 + 1.0, axis=1)
+
+    nans = np.isnan(rows)
+    ranks[nans] = NAN
+    counts = (ncols - nans.sum(axis=1, keepdims=True)).astype(np.float64)
+    return ranks, counts
+
+
+class CSRank(CrossSectional):
+    '''
+    Ranks the values of the datas at each step. The lowest value has rank 1
+    and equal values share the average of their ranks. Datas without a value
+    (``NaN``) are not ranked
+
+    If ``pct`` is ``True`` the rank is divided by the number of ranked datas,
+    to be in the range ``(0, 1]``
+    '''
+    alias = ('CrossSectionalRank',)
+    params = (('pct', False),)
+
+    def csfunc(self, values):
+        ranks, count = _ranks(values)
+        if self.p.pct and count:  # no count: all values (and ranks) are NaN
+            return [r / count for r in ranks]
+
+        return ranks
+
+    def csvfunc(self, rows):
+        ranks, counts = _vranks(rows)
+        if self.p.pct:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return ranks / counts
+
+        return ranks
+
+
+class CSZScore(CrossSectional):
+    '''
+    Standardizes the values of the datas at each step, with the mean and
+    (population) standard deviation of the values which are not ``NaN``
+
+    Formula:
+      - cs = (value - mean(values)) / stddev(values)
+    '''
+    alias = ('CrossSectionalZScore',)
+
+    def csfunc(self, values):
+        mean, std = _meanstd(values)
+        if not std:  # all values equal (or none): undefined
+            return [NAN] * len(values)
+
+        return [(v - mean) / std for v in values]
+
+    def csvfunc(self, rows):
+        mean, std = _nanmeanstd(rows)
+        std[std == 0.0] = NAN
+        return (rows - mean) / std
+
+
+class CSDemean(CrossSectional):
+    '''
+    Subtracts from the values of the datas at each step the mean of the
+    values which are not ``NaN``
+
+    Formula:
+      - cs = value - mean(values)
+    '''
+    alias = ('CrossSectionalDemean',)
+
+    def csfunc(self, values):
+        mean, _ = _meanstd(values)
+        return [v - mean for v in values]
+
+    def csvfunc(self, rows):
+        mean, _ = _nanmeanstd(rows)
+        return rows - mean
+
+
+class CSQuantile(CrossSectional):
+    '''
+    Places the values of the datas at each step in ``bins`` buckets of
+    (approximately) the same size, according to their rank (see ``CSRank``).
+    The bucket of the lowest values is ``0`` and the one of the highest values
+    is ``bins - 1``
+
+    Formula:
+      - cs = floor((rank - 1) * bins / number of ranked values)
+    '''
+    alias = ('CrossSectionalQuantile',)
+    params = (('bins', 5),)
+
+    def csfunc(self, values):
+        ranks, count = _ranks(values)
+        bins = self.p.bins
+        return [r if r != r else min(bins - 1, (r - 1) * bins // count)
+                for r in ranks]
+
+    def csvfunc(self, rows):
+        ranks, counts = _vranks(rows)
+        bins = self.p.bins
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.minimum(bins - 1, np.floor((ranks - 1) * bins / counts))
@@ -22,6 +22,7 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from . import Indicator, MovAv
+from ..mathsupport import RollingMeanVar
 
 
 class StandardDeviation(Indicator):
@@ -42,6 +43,11 @@ class StandardDeviation(Indicator):
       - squaredmean = pow(SimpleMovingAverage(data, period), 2)
       - stddev = pow(meansquared - squaredmean, 0.5)  # square root
 
+    If a single data is passed and ``movav`` is the default
+    ``SimpleMovingAverage``, the calculation is done with an incremental
+    rolling estimator (``mathsupport.RollingMeanVar``) which is numerically
+    stable and needs no intermediate lines
+
     See:
       - http://en.wikipedia.org/wiki/Standard_deviation
     '''
@@ -56,6 +62,13 @@ class StandardDeviation(Indicator):
         return plabels
 
     def __init__(self):
+        self._rolling = None
+        if len(self.datas) == 1 and self.p.movav is MovAv.Simple:
+            self._rolling = RollingMeanVar(self.p.period)
+            self._rlen = 0
+            self.addminperiod(self.p.period)
+            return
+
         if len(self.datas) > 1:
             mean = self.data1
         else:
@@ -69,6 +82,45 @@ class StandardDeviation(Indicator):
         else:
             self.lines.stddev = pow(meansq - sqmean, 0.5)
 
+    def nextstart(self):
+        if self._rolling is None:
+            return
+
+        self._rolling.reset()
+        for x in self.data.get(size=self.p.period):
+            self._rolling.push(x)
+
+        self._rlen = len(self)
+        self.lines.stddev[0] = self._rolling.stddev()
+
+    def next(self):
+        if self._rolling is None:
+            return
+
+        if len(self) > self._rlen:
+            self._rolling.push(self.data[0])
+        else:  # same bar delivered again (replay)
+            self._rolling.replace(self.data[0])
+
+        self._rlen = len(self)
+        self.lines.stddev[0] = self._rolling.stddev()
+
+    def once(self, start, end):
+        if self._rolling is None:
+            return
+
+        dst = self.lines.stddev.array
+        src = self.data.array
+        period = self.p.period
+
+        rolling = RollingMeanVar(period)
+        for i in range(start - period + 1, start):
+            rolling.push(src[i])
+
+        for i in range(start, end):
+            rolling.push(src[i])
+            dst[i] = rolling.stddev()
+
 
 class MeanDeviation(Indicator):
     '''MeanDeviation (alias MeanDev)
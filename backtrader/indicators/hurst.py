@@ -55,11 +55,19 @@ class HurstExponent(PeriodN):
     The original values (40, 2, self.p.period / 2) are kept for backwards
     compatibility
 
+    In ``once`` mode all windows are calculated at once with ``numpy``, using
+    a closed form least squares fit instead of one ``polyfit`` per bar
+
     '''
     frompackages = (
-        ('numpy', ('asarray', 'log10', 'polyfit', 'sqrt', 'std', 'subtract')),
+        ('numpy', ('asarray', 'empty', 'float64', 'log10', 'polyfit', 'sqrt',
+                   'std', 'subtract')),
+        ('numpy.lib.stride_tricks', 'sliding_window_view'),
     )
 
+    # maximum number of values (rows * period) handled at once in "once"
+    vchunk = 1 << 20
+
     alias = ('Hurst',)
     lines = ('hurst',)
     params = (
@@ -81,6 +89,9 @@ class HurstExponent(PeriodN):
         self._lag_end = lag_end = self.p.lag_end or (self.p.period // 2)
         self.lags = asarray(range(lag_start, lag_end))
         self.log10lags = log10(self.lags)
+        # centered regressors and sum of squares for the vectorized fit
+        self._xc = self.log10lags - self.log10lags.mean()
+        self._sxx = (self._xc * self._xc).sum()
 
     def next(self):
         # Fetch the data
@@ -94,3 +105,25 @@ class HurstExponent(PeriodN):
 
         # Return the Hurst exponent from the polyfit output
         self.lines.hurst[0] = poly[0] * 2.0
+
+    def once(self, start, end):
+        period = self.p.period
+        src = asarray(self.data.array[:end], dtype=float64)
+        # row r is the window which ends at index r + period - 1
+        windows = sliding_window_view(src, period)
+
+        dst = self.lines.hurst.array
+        rstep = max(1, self.vchunk // period)
+        for i in range(start, end, rstep):
+            iend = min(i + rstep, end)
+            ws = windows[i - period + 1:iend - period + 1]
+
+            # log10 of tau for each window (rows) and lag (columns)
+            ltau = empty((len(ws), len(self.lags)), dtype=float64)
+            for j, lag in enumerate(self.lags):
+                ltau[:, j] = log10(sqrt(std(ws[:, lag:] - ws[:, :-lag],
+                                            axis=1)))
+
+            hurst = 2.0 * ltau.dot(self._xc) / self._sxx
+            for k, h in enumerate(hurst.tolist(), start=i):
+                dst[k] = h
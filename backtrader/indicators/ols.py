@@ -21,47 +21,100 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import math
+
 import backtrader as bt
 from . import PeriodN
+from ..mathsupport import RollingBase, RollingCovariance
+from ..utils.py3 import range
 
 
 __all__ = ['OLS_Slope_InterceptN', 'OLS_TransformationN', 'OLS_BetaN',
            'CointN']
 
 
-class OLS_Slope_InterceptN(PeriodN):
+class _RollingRegressionN(PeriodN):
     '''
-    Calculates a linear regression using ``statsmodel.OLS`` (Ordinary least
-    squares) of data1 on data0
+    Base class for the indicators which regress data0 on data1 over a rolling
+    window of ``period`` values.
+
+    The values are fed to the estimator returned by ``_estimator`` which has
+    to provide the interface of ``mathsupport.RollingBase`` (``push``,
+    ``replace``, ``reset``). Subclasses implement ``_results`` to return the
+    values of the lines from the estimator.
 
-    Uses ``pandas`` and ``statsmodels``
+    In ``next`` mode the estimator is updated incrementally (and the last value
+    replaced if the same bar is seen again during replay). In ``once`` mode
+    the estimator is run over the arrays
     '''
     _mindatas = 2  # ensure at least 2 data feeds are passed
 
-    packages = (
-        ('pandas', 'pd'),
-        ('statsmodels.api', 'sm'),
-    )
+    def _estimator(self):
+        return RollingCovariance(self.p.period)
+
+    def _results(self, rolling):
+        raise NotImplementedError
+
+    def nextstart(self):
+        self._rolling = rolling = self._estimator()
+        for ago in range(-self.p.period + 1, 1):
+            rolling.push(self.data0[ago], self.data1[ago])
+
+        self._rlen = len(self)
+        self._setresults()
+
+    def next(self):
+        if len(self) > self._rlen:
+            self._rolling.push(self.data0[0], self.data1[0])
+        else:  # same bar delivered again (replay)
+            self._rolling.replace(self.data0[0], self.data1[0])
+
+        self._rlen = len(self)
+        self._setresults()
+
+    def _setresults(self):
+        for line, val in zip(self.lines, self._results(self._rolling)):
+            line[0] = val
+
+    def once(self, start, end):
+        src0 = self.data0.array
+        src1 = self.data1.array
+        dsts = [line.array for line in self.lines]
+
+        rolling = self._estimator()
+        for i in range(start - self.p.period + 1, end):
+            rolling.push(src0[i], src1[i])
+            if i >= start:
+                for dst, val in zip(dsts, self._results(rolling)):
+                    dst[i] = val
+
+
+class OLS_Slope_InterceptN(_RollingRegressionN):
+    '''
+    Calculates a linear regression (Ordinary least squares) of data0 on data1
+
+    The slope and intercept are calculated with a rolling covariance
+    estimator, delivering the same results as ``statsmodels.OLS`` without
+    fitting a model for each bar
+
+    Formula:
+      - slope = covariance(data0, data1) / variance(data1)
+      - intercept = mean(data0) - slope * mean(data1)
+    '''
     lines = ('slope', 'intercept',)
     params = (
         ('period', 10),
     )
 
-    def next(self):
-        p0 = pd.Series(self.data0.get(size=self.p.period))
-        p1 = pd.Series(self.data1.get(size=self.p.period))
-        p1 = sm.add_constant(p1)
-        intercept, slope = sm.OLS(p0, p1).fit().params
-
-        self.lines.slope[0] = slope
-        self.lines.intercept[0] = intercept
+    def _results(self, rolling):
+        slope = rolling.beta()
+        return slope, rolling.wx.mean - slope * rolling.wy.mean
 
 
 class OLS_TransformationN(PeriodN):
     '''
-    Calculates the ``zscore`` for data0 and data1. Although it doesn't directly
-    uses any external package it relies on ``OLS_SlopeInterceptN`` which uses
-    ``pandas`` and ``statsmodels``
+    Calculates the ``zscore`` for data0 and data1 from the spread given by
+    ``OLS_SlopeInterceptN``
     '''
     _mindatas = 2  # ensure at least 2 data feeds are passed
     lines = ('spread', 'spread_mean', 'spread_std', 'zscore',)
@@ -78,51 +131,217 @@ class OLS_TransformationN(PeriodN):
         self.l.zscore = (spread - self.l.spread_mean) / self.l.spread_std
 
 
-class OLS_BetaN(PeriodN):
+class OLS_BetaN(_RollingRegressionN):
     '''
-    Calculates a regression of data1 on data0 using ``pandas.ols``
+    Calculates the beta of the regression of data0 on data1 with a rolling
+    covariance estimator
 
-    Uses ``pandas``
+    Formula:
+      - beta = covariance(data0, data1) / variance(data1)
     '''
-    _mindatas = 2  # ensure at least 2 data feeds are passed
-
-    packages = (
-        ('pandas', 'pd'),
-    )
-
     lines = ('beta',)
     params = (('period', 10),)
 
-    def next(self):
-        y, x = (pd.Series(d.get(size=self.p.period)) for d in self.datas)
-        r_beta = pd.ols(y=y, x=x, window_type='full_sample')
-        self.lines.beta[0] = r_beta.beta['x']
+    def _results(self, rolling):
+        return (rolling.beta(),)
+
+
+class _RollingDFSums(RollingBase):
+    '''
+    Rolling sums of the products of the differences ``(dy, dx)`` and lagged
+    levels ``(ly, lx)`` needed to express the Dickey-Fuller regression of the
+    residuals of an Engle-Granger cointegration regression.
+
+    The levels are shifted by the first seen values to keep the magnitude of
+    the sums (and the rounding errors) low. The shift does not change the
+    results of a regression with a constant
+    '''
+    NSUMS = 14
+
+    def _reset(self):
+        self.sums = [0.0] * self.NSUMS
+        self.shift = None
+
+    def _products(self, y, x, y1, x1):
+        if self.shift is None:
+            self.shift = (y1, x1)
+
+        dy, dx = y - y1, x - x1
+        ly, lx = y1 - self.shift[0], x1 - self.shift[1]
+        return (dy, dx, ly, lx,
+                dy * ly, dy * lx, dx * ly, dx * lx,
+                ly * ly, lx * lx, ly * lx,
+                dy * dy, dx * dx, dy * dx)
 
+    def _add(self, *vals):
+        sums = self.sums
+        for i, p in enumerate(self._products(*vals)):
+            sums[i] += p
 
-class CointN(PeriodN):
+    def _remove(self, *vals):
+        sums = self.sums
+        for i, p in enumerate(self._products(*vals)):
+            sums[i] -= p
+
+    def _resync(self):
+        window = list(self.window)
+        self.sums = [0.0] * self.NSUMS
+        for vals in window:
+            self._add(*vals)
+
+
+class _RollingEngleGranger(object):
+    '''
+    Rolling Engle-Granger cointegration t-statistic of ``y`` on ``x`` over
+    ``period`` values.
+
+    The regression ``y = a + b * x`` uses a rolling covariance estimator and
+    the Dickey-Fuller regression (no constant, no lags) of the residuals
+    ``e_t - e_t-1 = gamma * e_t-1`` is expressed with the rolling sums of
+    ``_RollingDFSums``, which makes each update ``O(1)``.
+
+    The results match ``statsmodels.tsa.stattools.coint`` with
+    ``trend='c'``, ``maxlag=0`` and ``autolag=None``
+    '''
+    def __init__(self, period):
+        self.period = period
+        self.levels = RollingCovariance(period)
+        self.dfsums = _RollingDFSums(period - 1)
+        self._prev = self._prev2 = None
+
+    def reset(self):
+        self.levels.reset()
+        self.dfsums.reset()
+        self._prev = self._prev2 = None
+
+    def full(self):
+        return self.levels.full()
+
+    def push(self, y, x):
+        self.levels.push(y, x)
+        if self._prev is not None:
+            self.dfsums.push(y, x, *self._prev)
+
+        self._prev2, self._prev = self._prev, (y, x)
+
+    def replace(self, y, x):
+        self.levels.replace(y, x)
+        if self._prev2 is not None:
+            self.dfsums.replace(y, x, *self._prev2)
+
+        self._prev = (y, x)
+
+    def tstat(self):
+        b = self.levels.beta()
+        if self.dfsums.shift is None or b != b:
+            return float('NaN')
+
+        # intercept in the shifted space of the lagged levels
+        sy, sx = self.dfsums.shift
+        a = (self.levels.wx.mean - sy) - b * (self.levels.wy.mean - sx)
+
+        (sdy, sdx, sly, slx,
+         sdyly, sdylx, sdxly, sdxlx,
+         slyly, slxlx, slylx,
+         sdydy, sdxdx, sdydx) = self.dfsums.sums
+        m = len(self.dfsums)
+
+        # u = dy - b * dx (diff of residuals), v = ly - a - b * lx (lagged res)
+        suv = (sdyly - a * sdy - b * sdylx - b * sdxly + a * b * sdx +
+               b * b * sdxlx)
+        svv = (slyly + m * a * a + b * b * slxlx - 2.0 * a * sly -
+               2.0 * b * slylx + 2.0 * a * b * slx)
+        suu = sdydy - 2.0 * b * sdydx + b * b * sdxdx
+
+        if svv <= 0.0 or m < 2:
+            return float('NaN')
+
+        gamma = suv / svv
+        ssr = max(suu - gamma * suv, 0.0)
+        se = math.sqrt(ssr / (m - 1) / svv)
+        if not se:
+            return float('NaN')
+
+        return gamma / se
+
+
+class CointN(_RollingRegressionN):
     '''
     Calculates the score (coint_t) and pvalue for a given ``period`` for the
     data feeds
 
-    Uses ``pandas`` and ``statsmodels`` (for ``coint``)
-    '''
-    _mindatas = 2  # ensure at least 2 data feeds are passed
+    By default ``statsmodels.tsa.stattools.coint`` is invoked for each bar
+    (uses ``pandas``) with the given ``trend``, ``maxlag`` and ``autolag``
 
+    With ``autolag=None``, ``maxlag=0`` and ``trend='c'`` the score is the
+    Engle-Granger t-statistic (Dickey-Fuller test on the residuals without
+    lag augmentation), calculated with rolling sums which makes each update
+    ``O(1)``, and the pvalue comes from the MacKinnon approximation (uses
+    ``statsmodels`` for ``mackinnonp``). The results are the same as those of
+    ``coint`` with these parameters
+    '''
     packages = (
         ('pandas', 'pd'),  # import pandas as pd
     )
     frompackages = (
         ('statsmodels.tsa.stattools', 'coint'),  # from st... import coint
+        ('statsmodels.tsa.adfvalues', 'mackinnonp'),
     )
 
     lines = ('score', 'pvalue',)
     params = (
         ('period', 10),
         ('trend', 'c'),  # see statsmodel.tsa.statttools
+        ('maxlag', None),  # see statsmodel.tsa.statttools
+        ('autolag', 'aic'),  # see statsmodel.tsa.statttools
     )
 
+    def __init__(self):
+        super(CointN, self).__init__()
+        # rolling calculation only for a Dickey-Fuller test without lags
+        self._fast = (self.p.autolag is None and self.p.maxlag == 0 and
+                      self.p.trend == 'c')
+
+    def _estimator(self):
+        return _RollingEngleGranger(self.p.period)
+
+    def _results(self, rolling):
+        score = rolling.tstat()
+        if score != score:
+            return score, score
+
+        return score, mackinnonp(score, regression=self.p.trend, N=2)
+
+    def nextstart(self):
+        if self._fast:
+            super(CointN, self).nextstart()
+        else:
+            self._next_coint()
+
     def next(self):
-        x, y = (pd.Series(d.get(size=self.p.period)) for d in self.datas)
-        score, pvalue, _ = coint(x, y, trend=self.p.trend)
-        self.lines.score[0] = score
-        self.lines.pvalue[0] = pvalue
+        if self._fast:
+            super(CointN, self).next()
+        else:
+            self._next_coint()
+
+    def once(self, start, end):
+        if self._fast:
+            super(CointN, self).once(start, end)
+            return
+
+        period = self.p.period
+        src0, src1 = self.data0.array, self.data1.array
+        dst0, dst1 = self.lines.score.array, self.lines.pvalue.array
+        for i in range(start, end):  # statsmodels calculation for each bar
+            dst0[i], dst1[i] = self._coint(src0[i - period + 1:i + 1],
+                                           src1[i - period + 1:i + 1])
+
+    def _next_coint(self):
+        x, y = (d.get(size=self.p.period) for d in self.datas)
+        self.lines.score[0], self.lines.pvalue[0] = self._coint(x, y)
+
+    def _coint(self, x, y):
+        score, pvalue, _ = coint(pd.Series(x), pd.Series(y),
+                                 trend=self.p.trend, maxlag=self.p.maxlag,
+                                 autolag=self.p.autolag)
+        return score, pvalue
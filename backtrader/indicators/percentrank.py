@@ -29,14 +29,23 @@ from . import BaseApplyN
 __all__ = ['PercentRank', 'PctRank']
 
 
+def _vpctrank(windows):
+    # vectorized version of the default func: windows is a 2-D numpy array
+    return (windows < windows[:, -1:]).sum(axis=1) / windows.shape[1]
+
+
 class PercentRank(BaseApplyN):
     '''
     Measures the percent rank of the current value with respect to that of
     period bars ago
+
+    In ``once`` mode and if ``numpy`` is available, the default calculation is
+    vectorized over all windows at once
     '''
     alias = ('PctRank',)
     lines = ('pctrank',)
     params = (
         ('period', 50),
         ('func', lambda d: fsum(x < d[-1] for x in d) / len(d)),
+        ('vfunc', _vpctrank),
     )
@@ -32,16 +32,15 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import array
-import collections
 import datetime
-from itertools import islice
 import math
 
 from .utils.py3 import range, with_metaclass, string_types
 
 from .lineroot import LineRoot, LineSingle, LineMultiple
 from . import metabase
-from .utils import num2date, time2num
+from .utils import num2date, num2datetime64, time2num
+from .utils.dateintern import TZTable
 
 
 NAN = float('NaN')
@@ -72,30 +71,24 @@ class LineBuffer(LineSingle):
 
     UnBounded, QBuffer = (0, 1)
 
+    _lookback = 0  # largest look-back recorded while probing
+
     def __init__(self):
         self.lines = [self]
         self.mode = self.UnBounded
         self.bindings = list()
         self.reset()
         self._tz = None
+        self._tztable = None  # fast local time conversions for _tz
+        self._dtcache = (None, None, None, None)  # (num, tz, naive, datetime)
 
     def get_idx(self):
         return self._idx
 
     def set_idx(self, idx, force=False):
-        # if QBuffer and the last position of the buffer was reached, keep
-        # it (unless force) as index 0. This allows resampling
-        #  - forward adds a position, but the 1st one is discarded, the 0 is
-        #  invariant
-        # force supports replaying, which needs the extra bar to float
-        # forward/backwards, because the last input is read, and after a
-        # "backwards" is used to update the previous data. Unless the position
-        # 0 was moved to the previous index, it would fail
-        if self.mode == self.QBuffer:
-            if force or self._idx < self.lenmark:
-                self._idx = idx
-        else:  # default: UnBounded
-            self._idx = idx
+        # force is kept for compatibility. It was needed when the QBuffer was
+        # a deque which pinned the index to its last position
+        self._idx = idx
 
     idx = property(get_idx, set_idx)
 
@@ -108,22 +101,45 @@ class LineBuffer(LineSingle):
             # bar The previous forward would have discarded the bar "period"
             # times ago and it will not come back. Having + 1 in the size
             # allows the forward without removing that bar
-            self.array = collections.deque(maxlen=self.maxlen + self.extrasize)
-            self.useislice = True
-        else:
-            self.array = array.array(str('d'))
-            self.useislice = False
+            self.qsize = self.maxlen + self.extrasize
 
+        # QBuffer uses also a regular array (C speed indexing, contiguous
+        # slices) which is compacted when it holds twice the values to keep
+        self.array = array.array(str('d'))
         self.lencount = 0
         self.idx = -1
         self.extension = 0
 
     def qbuffer(self, savemem=0, extrasize=0):
         self.mode = self.QBuffer
-        self.maxlen = self._minperiod
+        self.maxlen = max(self._minperiod, self._lookback + 1)
         self.extrasize = extrasize
-        self.lenmark = self.maxlen - (not self.extrasize)
+        self._rebuffer()
+
+    def _rebuffer(self):
+        '''Recreates the buffer after a change of mode or size. If values
+        have already been delivered (buffer switched after a warm-up), the
+        latest ones which fit in the new buffer are kept
+        '''
+        lencount = self.lencount
+        if not lencount:
+            self.reset()
+            return
+
+        values, idx = self.array, self._idx
         self.reset()
+        self.array.extend(values[max(0, idx + 1 - self.qsize):idx + 1])
+        self._idx = len(self.array) - 1
+        self.lencount = lencount
+
+    def _compact(self):
+        '''Discards the values of a QBuffer which can no longer be reached.
+        Done when the array holds twice the values to keep, the cost of
+        moving the kept values is spread over the appended values'''
+        size = self._idx + 1 - self.qsize
+        if size > 0:
+            del self.array[:size]
+            self._idx -= size
 
     def getindicators(self):
         return []
@@ -143,8 +159,7 @@ class LineBuffer(LineSingle):
             return
 
         self.maxlen = size
-        self.lenmark = self.maxlen - (not self.extrasize)
-        self.reset()
+        self._rebuffer()
 
     def __len__(self):
         return self.lencount
@@ -159,6 +174,22 @@ class LineBuffer(LineSingle):
         '''
         return len(self.array) - self.extension
 
+    def to_numpy(self, copy=False):
+        ''' Returns the real data held in the buffer as a ``numpy`` array of
+        ``float64`` values
+
+        The array is a view on the buffer, unless ``copy`` is ``True``. The
+        buffer cannot grow while a view on it is alive: take views once the
+        run is over or request a copy
+
+        In ``qbuffer`` mode only the values currently held are returned
+        '''
+        import numpy as np  # keep the import local, numpy is optional
+
+        buflen = self.buflen()
+        values = np.frombuffer(self.array, dtype=np.float64)[:buflen]
+        return values.copy() if copy else values
+
     def __getitem__(self, ago):
         return self.array[self.idx + ago]
 
@@ -176,13 +207,35 @@ class LineBuffer(LineSingle):
         Returns:
             A slice of the underlying buffer
         '''
-        if self.useislice:
-            start = self.idx + ago - size + 1
-            end = self.idx + ago + 1
-            return list(islice(self.array, start, end))
-
         return self.array[self.idx + ago - size + 1:self.idx + ago + 1]
 
+    _probebase = None  # regular class of a buffer which is recording
+    _probeclasses = dict()  # regular class -> recording subclass
+
+    def probe(self, onoff=True):
+        '''Switches on/off the recording (in ``_lookback``) of the largest
+        look-back requested from this line with ``[ago]`` and ``get``. The
+        recorded value sizes the buffer when ``qbuffer`` is later applied
+
+        Only this buffer is affected: its class is swapped to a subclass with
+        recording accessors (created once per class) and back to the regular
+        class
+        '''
+        base = self._probebase or self.__class__
+        if not onoff:
+            self.__class__ = base
+            return
+
+        try:
+            probecls = self._probeclasses[base]
+        except KeyError:
+            probecls = type(base)(str(base.__name__), (_LineProbe, base),
+                                  dict(_probebase=base,
+                                       __module__=base.__module__))
+            probecls = self._probeclasses.setdefault(base, probecls)
+
+        self.__class__ = probecls
+
     def getzeroval(self, idx=0):
         ''' Returns a single value of the array relative to the real zero
         of the buffer
@@ -206,9 +259,6 @@ class LineBuffer(LineSingle):
         Returns:
             A slice of the underlying buffer
         '''
-        if self.useislice:
-            return list(islice(self.array, idx, idx + size))
-
         return self.array[idx:idx + size]
 
     def __setitem__(self, ago, value):
@@ -257,6 +307,9 @@ class LineBuffer(LineSingle):
         for i in range(size):
             self.array.append(value)
 
+        if self.mode == self.QBuffer and len(self.array) >= 2 * self.qsize:
+            self._compact()
+
     def backwards(self, size=1, force=False):
         ''' Moves the logical index backwards and reduces the buffer as much as needed
 
@@ -297,6 +350,21 @@ class LineBuffer(LineSingle):
         for i in range(size):
             self.array.append(value)
 
+    def trim(self, size):
+        ''' Discards the oldest values of the buffer
+
+        Keyword Args:
+            size (int): How many values to discard
+
+        The logical length is not changed. It supports running ``once`` over
+        consecutive windows of the data (see ``oncewindow`` in ``Cerebro``)
+        '''
+        if self.mode == self.QBuffer:
+            return  # already bounded
+
+        del self.array[:size]
+        self.idx -= size
+
     def addbinding(self, binding):
         ''' Adds another line binding
 
@@ -326,9 +394,6 @@ class LineBuffer(LineSingle):
         return self.getzero(idx, size or len(self))
 
     def plotrange(self, start, end):
-        if self.useislice:
-            return list(islice(self.array, start, end))
-
         return self.array[start:end]
 
     def oncebinding(self):
@@ -382,18 +447,30 @@ class LineBuffer(LineSingle):
 
     def _settz(self, tz):
         self._tz = tz
+        self._tztable = TZTable(tz) if tz is not None else None
 
     def datetime(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive)
+        # The last conversion is cached: the same bar is usually requested
+        # many times during an iteration
+        num = self.array[self.idx + ago]
+        tz = tz or self._tz
+        cnum, ctz, cnaive, dt = self._dtcache
+        if num == cnum and tz is ctz and naive == cnaive:
+            return dt
+
+        if naive and tz is self._tz and tz is not None:
+            dt = self._tztable.num2date(num)
+        else:
+            dt = num2date(num, tz=tz, naive=naive)
+
+        self._dtcache = (num, tz, naive, dt)
+        return dt
 
     def date(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive).date()
+        return self.datetime(ago, tz=tz, naive=naive).date()
 
     def time(self, ago=0, tz=None, naive=True):
-        return num2date(self.array[self.idx + ago],
-                        tz=tz or self._tz, naive=naive).time()
+        return self.datetime(ago, tz=tz, naive=naive).time()
 
     def dt(self, ago=0):
         '''
@@ -496,6 +573,20 @@ class LineBuffer(LineSingle):
         return num2date(int(self.array[self.idx + ago]) + tm)
 
 
+class _LineProbe(object):
+    '''Recording accessors mixed in by ``LineBuffer.probe``'''
+    def __getitem__(self, ago):
+        if -ago > self._lookback:
+            self._lookback = -ago
+        return self._probebase.__getitem__(self, ago)
+
+    def get(self, ago=0, size=1):
+        lookback = size - 1 - ago
+        if lookback > self._lookback:
+            self._lookback = lookback
+        return self._probebase.get(self, ago, size)
+
+
 class MetaLineActions(LineBuffer.__class__):
     '''
     Metaclass for Lineactions
@@ -591,6 +682,11 @@ class LineActions(with_metaclass(MetaLineActions, LineBuffer)):
 
     _ltype = LineBuffer.IndType
 
+    # windowed once: bars delivered from the future and lead of the inputs
+    # (bars of the former window to calculate again, see Strategy._windowlead)
+    _wforward = 0
+    _wleadin = 0
+
     def getindicators(self):
         return []
 
@@ -632,6 +728,28 @@ class LineActions(with_metaclass(MetaLineActions, LineBuffer)):
 
         self.oncebinding()
 
+    def _oncewindow(self):
+        # Windowed _once: only the values for the bars added to the clock
+        # since the last call are calculated
+        start, end = self.buflen(), self._clock.buflen()
+        plen = len(self)
+        self.forward(size=end - start)
+        # inputs completed for the former window: calculate again
+        start = max(0, start - self._wleadin)
+
+        # minperiod as position in the buffer, discounting the values
+        # discarded in former windows
+        minper = self._minperiod - (len(self) - self.idx - 1)
+        if start < minper - 1:
+            self.preonce(start, min(end, minper - 1))
+        if start <= minper - 1 < end:
+            self.oncestart(minper - 1, minper)
+        if max(start, minper) < end:
+            self.once(max(start, minper), end)
+
+        self.advance(plen - len(self))  # back to the current position
+        self.oncebinding()
+
 
 def LineDelay(a, ago=0, **kwargs):
     if ago <= 0:
@@ -686,6 +804,7 @@ class _LineForward(LineActions):
         # we need to pass and extra 1 which is the minimum defined period for
         # any data (which will be substracted inside addminperiod)
         # self.addminperiod(abs(ago) + 1)
+        self._wforward = ago
         if ago > self.a._minperiod:
             self.addminperiod(ago - self.a._minperiod + 1)
 
@@ -698,7 +817,9 @@ class _LineForward(LineActions):
         src = self.a.array
         ago = self.ago
 
-        for i in range(start, end):
+        # no target before the start of the buffer (a negative index would
+        # write at the end of it)
+        for i in range(max(start, ago), end):
             dst[i - ago] = src[i]
 
 
@@ -779,6 +900,25 @@ class LinesOperation(LineActions):
         op = self.operation
         tz = self._tz
 
+        try:
+            import numpy as np  # keep the import local, numpy is optional
+        except ImportError:
+            np = None
+
+        if np is not None and start < end:
+            # compare the times as microseconds of the day in one go
+            dts = num2datetime64(srca[start:end], tz=tz)
+            tms = (dts - dts.astype('datetime64[D]')).view(np.int64)
+            tmb = ((srcb.hour * 60 + srcb.minute) * 60 + srcb.second)
+            tmb = tmb * 1000000 + srcb.microsecond
+            try:
+                res = np.asarray(op(tms, tmb), dtype=np.float64)
+            except TypeError:
+                pass  # not a comparison - go the long way
+            else:
+                dst[start:end] = array.array(str('d'), res.tobytes())
+                return
+
         for i in range(start, end):
             dst[i] = op(num2date(srca[i], tz=tz).time(), srcb)
 
@@ -35,6 +35,15 @@ from .dataseries import DataSeries
 from . import metabase
 
 
+def _lineadvance(obj, size):
+    '''Moves the position of the lines of ``obj`` (series or single line)
+    bypassing the logic of ``advance`` in the objects holding the lines'''
+    if isinstance(obj, LineSeries):
+        obj.lines.advance(size)
+    else:
+        obj.advance(size)
+
+
 class MetaLineIterator(LineSeries.__class__):
     def donew(cls, *args, **kwargs):
         _obj, args, kwargs = \
@@ -151,6 +160,8 @@ class LineIterator(with_metaclass(MetaLineIterator, LineSeries)):
     _mindatas = 1
     _ltype = LineSeries.IndType
 
+    _wleadin = 0  # see Strategy._windowlead
+
     plotinfo = dict(plot=True,
                     subplot=True,
                     plotname='',
@@ -320,6 +331,48 @@ class LineIterator(with_metaclass(MetaLineIterator, LineSeries)):
         for line in self.lines:
             line.oncebinding()
 
+    def _oncewindow(self):
+        '''
+        Windowed counterpart of ``_once``: only the values for the bars added
+        to the clock since the last call are calculated (see ``oncewindow``
+        in ``Cerebro``). The current position is kept
+        '''
+        start, end = self.buflen(), self._clock.buflen()
+        plen = len(self)
+        self.forward(size=end - start)
+        # inputs completed for the former window: calculate again
+        start = max(0, start - self._wleadin)
+
+        indicators = self._lineiterators[LineIterator.IndType]
+        for indicator in indicators:
+            indicator._oncewindow()
+
+        # Move all right before the window (the equivalent to home in _once)
+        # because the default preonce/once implementations (via_next) advance
+        # datas and indicators one bar at a time
+        objs = self.datas + indicators + [self]
+        lens = [len(x) for x in objs]
+        lens[-1] = plen
+        # values discarded in former windows: position independent
+        offset = len(self) - self.lines[0].idx - 1
+        wlen = offset + start
+        for x in objs:
+            _lineadvance(x, wlen - len(x))
+
+        minper = self._minperiod - offset  # as position in the buffer
+        if start < minper - 1:
+            self.preonce(start, min(end, minper - 1))
+        if start <= minper - 1 < end:
+            self.oncestart(minper - 1, minper)
+        if max(start, minper) < end:
+            self.once(max(start, minper), end)
+
+        for x, xlen in zip(objs, lens):  # back to the current positions
+            _lineadvance(x, xlen - len(x))
+
+        for line in self.lines:
+            line.oncebinding()
+
     def preonce(self, start, end):
         pass
 
@@ -31,9 +31,11 @@ lines at once.
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+from collections import OrderedDict
 import sys
 
 from .utils.py3 import map, range, string_types, with_metaclass
+from .utils import num2datetime64, tzparse
 
 from .linebuffer import LineBuffer, LineActions, LinesOperation, LineDelay, NAN
 from .lineroot import LineRoot, LineSingle, LineMultiple
@@ -288,6 +290,13 @@ class Lines(object):
         for line in self.lines:
             line.home()
 
+    def trim(self, size):
+        '''
+        Proxy line operation
+        '''
+        for line in self.lines:
+            line.trim(size)
+
     def advance(self, size=1):
         '''
         Proxy line operation
@@ -477,6 +486,82 @@ class LineSeries(with_metaclass(MetaLineSeries, LineMultiple)):
         super(LineSeries, self).__init__()
         pass
 
+    def to_numpy(self, copy=False):
+        '''Returns an ``OrderedDict`` with the values held by each line as a
+        ``numpy`` array of ``float64``, under the alias of the line
+
+        A ``datetime`` line is converted (vectorized) to ``datetime64[us]``
+        values in UTC. For the other lines the arrays are views on the
+        buffers (see ``LineBuffer.to_numpy``) unless ``copy`` is ``True``
+
+        With ``qbuffer`` active only the values still held are returned and
+        the lines may hold different amounts of values
+        '''
+        arrays = OrderedDict()
+        for i in range(self.lines.size()):
+            alias = self.lines._getlinealias(i)
+            values = self.lines[i].to_numpy(copy=copy)
+            if alias == 'datetime':
+                values = num2datetime64(values)
+
+            arrays[alias] = values
+
+        return arrays
+
+    def _dtsource(self):
+        # Returns the object whose datetime line indexes the values (this
+        # object or one in the clock chain) and the timezone of the data feed
+        # delivering the datetime
+        dtobj, tz = None, None
+        obj = self
+        while obj is not None:
+            if dtobj is None and 'datetime' in obj.lines.getlinealiases():
+                dtobj = obj
+
+            tz = getattr(obj, '_tz', None)
+            if tz is not None:
+                break
+
+            obj = getattr(obj, '_clock', None)
+
+        return dtobj, tz
+
+    def to_frame(self, copy=False, tz=None):
+        '''Returns a ``pandas.DataFrame`` with a column per line, indexed by
+        the datetime of the bars: the ``datetime`` line of the object (datas,
+        strategies) or that of its clock (indicators, observers)
+
+        The index is naive and in the timezone of the data feed, as the
+        values returned by ``datetime.datetime(ago)``. A different timezone
+        can be passed with ``tz``
+
+        With ``qbuffer`` active the lines are aligned to the last value and
+        the frame is as long as the shortest of them
+        '''
+        import pandas as pd  # keep the import local, pandas is optional
+
+        columns = self.to_numpy(copy=copy)
+        columns.pop('datetime', None)
+
+        dtobj, datatz = self._dtsource()
+        sizes = [len(v) for v in columns.values()]
+        if dtobj is not None:
+            dtnums = dtobj.lines.datetime.to_numpy()
+            sizes.append(len(dtnums))
+
+        n = min(sizes) if sizes else 0
+        for alias, values in columns.items():
+            columns[alias] = values[len(values) - n:]
+
+        index = None
+        if dtobj is not None:
+            dtnums = dtnums[len(dtnums) - n:]
+            tz = datatz if tz is None else tzparse(tz)
+            index = pd.DatetimeIndex(num2datetime64(dtnums, tz=tz),
+                                     name='datetime')
+
+        return pd.DataFrame(columns, index=index, copy=copy)
+
     def plotlabel(self):
         label = self.plotinfo.plotname or self.__class__.__name__
         sublabels = self._plotlabel()
@@ -568,6 +653,9 @@ class LineSeries(with_metaclass(MetaLineSeries, LineMultiple)):
     def home(self):
         self.lines.home()
 
+    def trim(self, size):
+        self.lines.trim(size)
+
     def advance(self, size=1):
         self.lines.advance(size)
 
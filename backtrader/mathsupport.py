@@ -21,8 +21,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import bisect
+import collections
 import math
 
+from .utils.py3 import zip
+
+NAN = float('NaN')
+
 
 def average(x, bessel=False):
     '''
@@ -63,3 +69,462 @@ def standarddev(x, avgx=None, bessel=False):
       A float with the standard deviation of the elements of x
     '''
     return math.sqrt(average(variance(x, avgx), bessel=bessel))
+
+
+class Welford(object):
+    '''
+    Numerically stable incremental mean and variance (Welford's algorithm).
+
+    Values can be added and also removed, which allows using it over a
+    rolling window
+
+    Attributes:
+      count: number of values currently accounted for
+      mean: the mean of the values
+      m2: sum of squared deviations from the mean
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.count <= 1:
+            self.reset()
+            return
+
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.m2 = max(self.m2 - delta * (x - self.mean), 0.0)
+
+    def replace(self, old, new):
+        '''Swaps ``old`` with ``new`` keeping the count'''
+        if not self.count:
+            self.add(new)
+            return
+
+        delta = new - old
+        mean = self.mean + delta / self.count
+        self.m2 = max(self.m2 + delta * (new - mean + old - self.mean), 0.0)
+        self.mean = mean
+
+    def variance(self, bessel=False):
+        '''
+        Args:
+          bessel: (default ``False``) divide by ``N - 1``
+
+        Returns:
+          A float with the variance of the values or ``NaN`` if not enough
+          values are available
+        '''
+        n = self.count - bessel
+        if n <= 0:
+            return NAN
+        return self.m2 / n
+
+    def stddev(self, bessel=False):
+        return math.sqrt(self.variance(bessel=bessel))
+
+
+class RollingBase(object):
+    '''
+    Base class for estimators working over a rolling window of ``period``
+    values.
+
+    ``push`` adds (a tuple of) values, discarding the oldest one if the window
+    is full. ``replace`` updates the last pushed value, which is what happens
+    in ``next`` when the same bar is delivered more than once (replay)
+
+    Subclasses implement ``_add``, ``_remove`` and ``_reset``. Estimators which
+    accumulate floating point updates can additionally implement ``_resync``,
+    which will be invoked every ``period * resync`` pushes to recalculate the
+    state from the window and discard accumulated rounding errors
+    '''
+    resync = 32
+
+    def __init__(self, period):
+        self.period = period
+        self.window = collections.deque()
+        self._pushes = 0
+        self._reset()
+
+    def __len__(self):
+        return len(self.window)
+
+    def full(self):
+        return len(self.window) >= self.period
+
+    def reset(self):
+        self.window.clear()
+        self._pushes = 0
+        self._reset()
+
+    def push(self, *vals):
+        window = self.window
+        if len(window) >= self.period:
+            self._remove(*window.popleft())
+
+        window.append(vals)
+        self._add(*vals)
+
+        self._pushes += 1
+        if self._pushes >= self.period * self.resync:
+            self._pushes = 0
+            self._resync()
+
+    def replace(self, *vals):
+        if not self.window:
+            self.push(*vals)
+            return
+
+        self._remove(*self.window.pop())
+        self.window.append(vals)
+        self._add(*vals)
+
+    def _resync(self):
+        pass
+
+    def _reset(self):
+        pass
+
+    def _add(self, *vals):
+        pass
+
+    def _remove(self, *vals):
+        pass
+
+
+class RollingMeanVar(RollingBase):
+    '''
+    Rolling mean, variance and standard deviation over ``period`` values
+
+    Non-finite values (``NaN``, ``+/-inf``) are kept out of the estimator and
+    only counted: while any is in the window the results are those of a plain
+    calculation (``NaN`` or ``+/-inf``) and once all of them have left the
+    window the estimator holds the state of the remaining values
+    '''
+    def _reset(self):
+        self.welford = Welford()
+        self.nonfinite = 0
+
+    def _resync(self):
+        self._reset()
+        for x, in self.window:
+            self._add(x)
+
+    def _add(self, x):
+        if x - x == 0.0:  # False for NaN and +/-inf
+            self.welford.add(x)
+        else:
+            self.nonfinite += 1
+
+    def _remove(self, x):
+        if x - x == 0.0:
+            self.welford.remove(x)
+        else:
+            self.nonfinite -= 1
+
+    def mean(self):
+        if self.nonfinite:  # the finite values do not change the result
+            return sum(x for x, in self.window if not x - x == 0.0)
+        return self.welford.mean if self.window else NAN
+
+    def variance(self, bessel=False):
+        if self.nonfinite:
+            return NAN
+        return self.welford.variance(bessel=bessel)
+
+    def stddev(self, bessel=False):
+        return math.sqrt(self.variance(bessel=bessel))
+
+
+class RollingCovariance(RollingBase):
+    '''
+    Rolling covariance of the pairs ``(x, y)`` over ``period`` values.
+
+    Correlation and beta (of ``x`` with regards to ``y``) are also available
+    '''
+    def _reset(self):
+        self.wx = Welford()
+        self.wy = Welford()
+        self.cxy = 0.0
+
+    def _resync(self):
+        window = list(self.window)
+        self._reset()
+        for x, y in window:
+            self._add(x, y)
+
+    def _add(self, x, y):
+        dx = x - self.wx.mean
+        self.wx.add(x)
+        self.wy.add(y)
+        self.cxy += dx * (y - self.wy.mean)
+
+    def _remove(self, x, y):
+        if self.wx.count <= 1:
+            self._reset()
+            return
+
+        dx = x - self.wx.mean
+        self.wx.remove(x)
+        self.wy.remove(y)
+        self.cxy -= dx * (y - self.wy.mean)
+
+    def covariance(self, bessel=False):
+        n = self.wx.count - bessel
+        if n <= 0:
+            return NAN
+        return self.cxy / n
+
+    def correlation(self):
+        den = math.sqrt(self.wx.m2 * self.wy.m2)
+        if not den:
+            return NAN
+        return self.cxy / den
+
+    def beta(self):
+        if not self.wy.m2:
+            return NAN
+        return self.cxy / self.wy.m2
+
+
+class RollingMinMax(RollingBase):
+    '''
+    Rolling minimum and maximum over ``period`` values using monotonic queues
+    (amortized ``O(1)`` per value)
+
+    ``replace`` rebuilds the queues from the window (``O(period)``), because
+    the values discarded by the monotonic queues cannot be restored
+    '''
+    def _reset(self):
+        self._count = 0
+        self._maxq = collections.deque()  # (index, value) decreasing values
+        self._minq = collections.deque()  # (index, value) increasing values
+
+    def _add(self, x):
+        idx = self._count
+        self._count += 1
+
+        maxq = self._maxq
+        while maxq and maxq[-1][1] <= x:
+            maxq.pop()
+        maxq.append((idx, x))
+
+        minq = self._minq
+        while minq and minq[-1][1] >= x:
+            minq.pop()
+        minq.append((idx, x))
+
+    def _remove(self, x):
+        first = self._count - self.period  # index of the discarded value
+        if self._maxq[0][0] == first:
+            self._maxq.popleft()
+        if self._minq[0][0] == first:
+            self._minq.popleft()
+
+    def replace(self, *vals):
+        if not self.window:
+            self.push(*vals)
+            return
+
+        self.window[-1] = vals
+        count = self._count - len(self.window)  # index of the oldest value
+        self._reset()
+        self._count = count
+        for wvals in self.window:
+            self._add(*wvals)
+
+    def max(self):
+        return self._maxq[0][1] if self._maxq else NAN
+
+    def min(self):
+        return self._minq[0][1] if self._minq else NAN
+
+
+class RollingQuantile(RollingBase):
+    '''
+    Rolling quantile over ``period`` values keeping a sorted copy of the
+    window. Insertion and removal locate the position with a binary search and
+    the memory move is done by the list implementation.
+
+    Params:
+      - ``q``: quantile in the ``[0, 1]`` range (``0.5`` is the median)
+
+    The quantile is linearly interpolated between the closest ranks. ``NaN``
+    values are kept out of the sorted copy and therefore skipped
+    '''
+    def __init__(self, period, q=0.5):
+        self.q = q
+        super(RollingQuantile, self).__init__(period)
+
+    def _reset(self):
+        self.sorted = list()
+
+    def _add(self, x):
+        if x == x:  # x != x only for NaN, which would break the order
+            bisect.insort(self.sorted, x)
+
+    def _remove(self, x):
+        srt = self.sorted
+        i = bisect.bisect_left(srt, x)
+        if i < len(srt) and srt[i] == x:  # not there if NaN
+            del srt[i]
+
+    def quantile(self, q=None):
+        srt = self.sorted
+        if not srt:
+            return NAN
+
+        q = self.q if q is None else q
+        pos = (len(srt) - 1) * q
+        lo = int(math.floor(pos))
+        hi = min(lo + 1, len(srt) - 1)
+        return srt[lo] + (srt[hi] - srt[lo]) * (pos - lo)
+
+    def rank(self, x):
+        '''Returns the fraction of values in the window lower than ``x``'''
+        if not self.sorted:
+            return NAN
+        return bisect.bisect_left(self.sorted, x) / len(self.sorted)
+
+
+class EWMoments(object):
+    '''
+    Exponentially weighted mean and variance
+
+    Params:
+      - ``alpha``: smoothing factor. If ``None`` it is calculated from
+        ``period`` as ``2 / (period + 1)``
+    '''
+    def __init__(self, alpha=None, period=None):
+        if alpha is None:
+            alpha = 2.0 / (period + 1.0)
+
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = NAN
+        self.var = NAN
+
+    def push(self, x):
+        self.count += 1
+        if self.count == 1:
+            self.mean = x
+            self.var = 0.0
+            return
+
+        alpha = self.alpha
+        delta = x - self.mean
+        self.mean += alpha * delta
+        self.var = (1.0 - alpha) * (self.var + alpha * delta * delta)
+
+    def stddev(self):
+        return math.sqrt(self.var)
+
+
+def _rolling(estimator, getter, period, *arrays):
+    '''
+    Runs ``estimator`` over the ``arrays`` storing the output of ``getter``
+    once ``period`` values have been seen. The previous values are ``NaN``
+    '''
+    out = list()
+    for vals in zip(*arrays):
+        estimator.push(*vals)
+        out.append(getter() if estimator.full() else NAN)
+
+    return out
+
+
+def rolling_mean(x, period):
+    '''
+    Args:
+      x: iterable of values
+      period: size of the rolling window
+
+    Returns:
+      A list with the rolling mean of x (``NaN`` until ``period`` values)
+    '''
+    est = RollingMeanVar(period)
+    return _rolling(est, est.mean, period, x)
+
+
+def rolling_stddev(x, period, bessel=False):
+    '''
+    Args:
+      x: iterable of values
+      period: size of the rolling window
+      bessel: (default ``False``) divide by ``N - 1``
+
+    Returns:
+      A list with the rolling standard deviation of x
+    '''
+    est = RollingMeanVar(period)
+    return _rolling(est, lambda: est.stddev(bessel=bessel), period, x)
+
+
+def rolling_covariance(x, y, period, bessel=False):
+    '''Returns a list with the rolling covariance of x and y'''
+    est = RollingCovariance(period)
+    return _rolling(est, lambda: est.covariance(bessel=bessel), period, x, y)
+
+
+def rolling_correlation(x, y, period):
+    '''Returns a list with the rolling correlation of x and y'''
+    est = RollingCovariance(period)
+    return _rolling(est, est.correlation, period, x, y)
+
+
+def rolling_beta(x, y, period):
+    '''Returns a list with the rolling beta of x with regards to y'''
+    est = RollingCovariance(period)
+    return _rolling(est, est.beta, period, x, y)
+
+
+def rolling_max(x, period):
+    '''Returns a list with the rolling maximum of x'''
+    est = RollingMinMax(period)
+    return _rolling(est, est.max, period, x)
+
+
+def rolling_min(x, period):
+    '''Returns a list with the rolling minimum of x'''
+    est = RollingMinMax(period)
+    return _rolling(est, est.min, period, x)
+
+
+def rolling_quantile(x, period, q=0.5):
+    '''Returns a list with the rolling ``q`` quantile of x'''
+    est = RollingQuantile(period, q=q)
+    return _rolling(est, est.quantile, period, x)
+
+
+def ewm_moments(x, alpha=None, period=None):
+    '''
+    Args:
+      x: iterable of values
+      alpha/period: see ``EWMoments``
+
+    Returns:
+      A tuple with 2 lists: exponentially weighted means and variances
+    '''
+    est = EWMoments(alpha=alpha, period=period)
+    means, variances = list(), list()
+    for val in x:
+        est.push(val)
+        means.append(est.mean)
+        variances.append(est.var)
+
+    return means, variances
@@ -45,6 +45,7 @@ class MetaObserver(ObserverBase.__class__):
 
 class Observer(with_metaclass(MetaObserver, ObserverBase)):
     _stclock = False
+    _plotonly = False  # skipped by cerebro if results will not be plotted
 
     _OwnerCls = StrategyBase
     _ltype = LineIterator.ObsType
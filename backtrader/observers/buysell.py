@@ -42,6 +42,8 @@ class BuySell(Observer):
       - ``bardist`` (default: ``0.015`` 1.5%) Distance to max/min when
         ``barplot`` is ``True``
     '''
+    _plotonly = True
+
     lines = ('buy', 'sell',)
 
     plotinfo = dict(plot=True, subplot=False, plotlinelabels=True)
@@ -44,6 +44,7 @@ class Trades(Observer):
         if will show the result of trades before commission
     '''
     _stclock = True
+    _plotonly = True
 
     lines = ('pnlplus', 'pnlminus')
 
@@ -143,6 +144,7 @@ class MetaDataTrades(Observer.__class__):
 
 class DataTrades(with_metaclass(MetaDataTrades, Observer)):
     _stclock = True
+    _plotonly = True
 
     params = (('usenames', True),)
 
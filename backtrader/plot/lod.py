@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import bisect
+
+NAN = float('NaN')
+
+
+def lodfactor(nbars, maxbars):
+    '''Returns how many bars have to go into each bucket to have at most
+    ``maxbars`` buckets. ``1`` (no aggregation) if ``maxbars`` is ``0``'''
+    if not maxbars or nbars <= maxbars:
+        return 1
+
+    return -(-nbars // maxbars)  # ceil
+
+
+def buckets(xs, k):
+    '''Yields ``(i, j)`` ranges of the indices of the ascending positions
+    ``xs`` which fall into the same bucket of ``k`` bars'''
+    i, n = 0, len(xs)
+    while i < n:
+        j = bisect.bisect_left(xs, (xs[i] // k + 1) * k, i + 1)
+        yield i, j
+        i = j
+
+
+def lod_ohlc(xs, opens, highs, lows, closes, volumes, k):
+    '''Aggregates the bars in buckets of ``k`` bars (open of the first bar,
+    highest high, lowest low, close of the last bar, summed volume). The
+    bars are placed in the middle of the bucket'''
+    x, o, h, l, c, v = [], [], [], [], [], []
+    for i, j in buckets(xs, k):
+        x.append((xs[i] // k) * k + (k - 1) / 2.0)
+        o.append(opens[i])
+        h.append(max(highs[i:j]))
+        l.append(min(lows[i:j]))
+        c.append(closes[j - 1])
+        v.append(sum(volumes[i:j]))
+
+    return x, o, h, l, c, v
+
+
+def lod_minmax(xs, ys, k):
+    '''Reduces each bucket of ``k`` bars of a line to its minimum and maximum
+    values, in the order in which they happen. Peaks and troughs are
+    therefore kept. Buckets with only ``NaN`` values keep a ``NaN`` to keep
+    the gaps in the line'''
+    xout, yout = [], []
+    for i, j in buckets(xs, k):
+        seg = ys[i:j]
+        vals = [y for y in seg if y == y]  # y != y only for NaN
+        if not vals:
+            xout.append(xs[i])
+            yout.append(NAN)
+            continue
+
+        imin, imax = seg.index(min(vals)), seg.index(max(vals))
+        for idx in sorted(set((imin, imax))):
+            xout.append(xs[i + idx])
+            yout.append(seg[idx])
+
+    return xout, yout
+
+
+def lod_sample(xs, ys, k):
+    '''Keeps the 1st value of each bucket of ``k`` bars. Lines reduced with
+    the same ``xs`` and ``k`` stay aligned (for example to fill areas between
+    them)'''
+    idxs = [i for i, j in buckets(xs, k)]
+    return [xs[i] for i in idxs], [ys[i] for i in idxs]
@@ -24,6 +24,7 @@ from __future__ import (absolute_import, division, print_function,
 import bisect
 import collections
 import datetime
+import functools
 import itertools
 import math
 import operator
@@ -42,6 +43,7 @@ from .. import AutoInfoClass, MetaParams, TimeFrame, date2num
 from .finance import plot_candlestick, plot_ohlc, plot_volume, plot_lineonclose
 from .formatters import (MyVolFormatter, MyDateFormatter, getlocator)
 from . import locator as loc
+from .lod import lodfactor, lod_ohlc, lod_minmax, lod_sample
 from .multicursor import MultiCursor
 from .scheme import PlotScheme
 from .utils import tag_box_style
@@ -65,6 +67,8 @@ class PInfo(object):
         self.handles = collections.defaultdict(list)
         self.labels = collections.defaultdict(list)
         self.legpos = collections.defaultdict(int)
+        self.lodk = 1  # bars per plotted bucket (see scheme.maxbars)
+        self.lodlines = collections.defaultdict(list)
 
         self.prop = mfontmgr.FontProperties(size=self.sch.subtxtsize)
 
@@ -73,6 +77,7 @@ class PInfo(object):
         self.figs.append(fig)
         self.daxis = collections.OrderedDict()
         self.vaxis = list()
+        self.lodlines = collections.defaultdict(list)
         self.row = 0
         self.sharex = None
         return fig
@@ -137,22 +142,24 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
         self.sortdataindicators(strategy)
         self.calcrows(strategy)
 
-        st_dtime = strategy.lines.datetime.plot()
+        # search directly in the buffer, no list of all datetimes is built
+        st_dtime = strategy.lines.datetime.array
+        st_len = len(strategy)
         if start is None:
             start = 0
         if end is None:
-            end = len(st_dtime)
+            end = st_len
 
         if isinstance(start, datetime.date):
-            start = bisect.bisect_left(st_dtime, date2num(start))
+            start = bisect.bisect_left(st_dtime, date2num(start), 0, st_len)
 
         if isinstance(end, datetime.date):
-            end = bisect.bisect_right(st_dtime, date2num(end))
+            end = bisect.bisect_right(st_dtime, date2num(end), 0, st_len)
 
         if end < 0:
-            end = len(st_dtime) + 1 + end  # -1 =  len() -2 = len() - 1
+            end = st_len + 1 + end  # -1 =  len() -2 = len() - 1
 
-        slen = len(st_dtime[start:end])
+        slen = len(range(st_len)[start:end])
         d, m = divmod(slen, numfigs)
         pranges = list()
         for i in range(numfigs):
@@ -179,6 +186,7 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                 self.pinf.pstart, self.pinf.psize)
             self.pinf.xlen = len(self.pinf.xreal)
             self.pinf.x = list(range(self.pinf.xlen))
+            self.pinf.lodk = lodfactor(self.pinf.xlen, self.pinf.sch.maxbars)
             # self.pinf.pfillers = {None: []}
             # for key, val in pfillers.items():
             #     pfstart = bisect.bisect_left(val, self.pinf.pstart)
@@ -200,17 +208,13 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                 self.pinf.xdata = self.pinf.x
                 xd = data.datetime.plotrange(self.pinf.xstart, self.pinf.xend)
                 if len(xd) < self.pinf.xlen:
-                    self.pinf.xdata = xdata = []
                     xreal = self.pinf.xreal
                     dts = data.datetime.plot()
-                    xtemp = list()
-                    for dt in (x for x in dts if dt0 <= x <= dt1):
-                        dtidx = bisect.bisect_left(xreal, dt)
-                        xdata.append(dtidx)
-                        xtemp.append(dt)
-
-                    self.pinf.xstart = bisect.bisect_left(dts, xtemp[0])
-                    self.pinf.xend = bisect.bisect_right(dts, xtemp[-1])
+                    xstart = bisect.bisect_left(dts, dt0)
+                    xend = bisect.bisect_right(dts, dt1)
+                    self.pinf.xdata = [bisect.bisect_left(xreal, dt)
+                                       for dt in dts[xstart:xend]]
+                    self.pinf.xstart, self.pinf.xend = xstart, xend
 
                 for ind in self.dplotsup[data]:
                     self.plotind(
@@ -271,8 +275,47 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
             axtight = 'x' if not self.pinf.sch.ytight else 'both'
             self.mpyplot.autoscale(enable=True, axis=axtight, tight=True)
 
+            # aggregate the lines again when the visible range changes. The
+            # state of the figure is bound: pinf changes with each figure and
+            # plotted strategy
+            lodlast = dict()
+            for ax, lodlines in self.pinf.lodlines.items():
+                lodlast[ax] = (self.pinf.lodk, 0, self.pinf.xlen)
+                ax.callbacks.connect(
+                    'xlim_changed',
+                    functools.partial(self.lodupdate, lodlines, lodlast,
+                                      self.pinf.xlen, self.pinf.lodk,
+                                      self.pinf.sch.maxbars))
+
         return figs
 
+    def lodupdate(self, lodlines, lodlast, xlen, lodk, maxbars, ax):
+        '''Aggregates the ``lodlines`` of ``ax`` again for the visible range,
+        with buckets small enough to have at most ``maxbars`` buckets in it.
+        The range is extended half a view at each side to allow some panning.
+
+        ``lodlast`` holds the last aggregation of each axis and ``xlen`` and
+        ``lodk`` are the number of bars and the bucket size of the figure'''
+        xmin, xmax = ax.get_xlim()
+        half = (xmax - xmin) / 2.0
+        lo = max(0, int(xmin - half))
+        hi = min(xlen, int(math.ceil(xmax + half)) + 1)
+        k = lodfactor(int(xmax - xmin) + 1, maxbars)
+        if k == lodk:  # zoomed out again: the original range
+            lo, hi = 0, xlen
+
+        if lodlast[ax] == (k, lo, hi):
+            return  # nothing changes
+
+        lodlast[ax] = (k, lo, hi)
+        for line, xdata, lplot in lodlines:
+            i = bisect.bisect_left(xdata, lo)
+            j = bisect.bisect_left(xdata, hi, i)
+            if k > 1:
+                line.set_data(*lod_minmax(xdata[i:j], lplot[i:j], k))
+            else:
+                line.set_data(xdata[i:j], lplot[i:j])
+
     def setlocators(self, ax):
         clock = sorted(self.pinf.clock.datas,
                        key=lambda x: (x._timeframe, x._compression))[0]
@@ -466,7 +509,12 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
             pltmethod = getattr(ax, lineplotinfo._get('_method', 'plot'))
 
             xdata, lplotarray = self.pinf.xdata, lplot
+            lodline = self.pinf.lodk > 1
+            if lodline:
+                xdata, lplotarray = lod_minmax(xdata, lplot, self.pinf.lodk)
+
             if lineplotinfo._get('_skipnan', False):
+                lodline = False  # the masked values cannot be aggregated
                 # Get the full array and a mask to skipnan
                 lplotarray = np.array(lplot)
                 lplotmask = np.isfinite(lplotarray)
@@ -484,6 +532,10 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
 
             self.pinf.zorder[ax] = plottedline.get_zorder()
 
+            if lodline and hasattr(plottedline, 'set_data'):  # Line2D
+                self.pinf.lodlines[ax].append(
+                    (plottedline, self.pinf.xdata, lplot))
+
             vtags = lineplotinfo._get('plotvaluetags', True)
             if self.pinf.sch.valuetags and vtags:
                 linetag = lineplotinfo._get('_plotvaluetag', True)
@@ -498,12 +550,18 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                 fattr = '_fill' + fcmp
                 fref, fcol = lineplotinfo._get(fattr, (None, None))
                 if fref is not None:
-                    y1 = np.array(lplot)
+                    fxdata, y1 = self.pinf.xdata, lplot
+                    if self.pinf.lodk > 1:
+                        fxdata, y1 = lod_sample(fxdata, y1, self.pinf.lodk)
+                    y1 = np.array(y1)
                     if isinstance(fref, integer_types):
                         y2 = np.full_like(y1, fref)
                     else:  # string, naming a line, nothing else is supported
                         l2 = getattr(ind, fref)
                         prl2 = l2.plotrange(self.pinf.xstart, self.pinf.xend)
+                        if self.pinf.lodk > 1:
+                            _, prl2 = lod_sample(
+                                self.pinf.xdata, prl2, self.pinf.lodk)
                         y2 = np.array(prl2)
                     kwargs = dict()
                     if fop is not None:
@@ -513,7 +571,7 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                     if isinstance(fcol, (list, tuple)):
                         fcol, falpha = fcol
 
-                    ax.fill_between(self.pinf.xdata, y1, y2,
+                    ax.fill_between(fxdata, y1, y2,
                                     facecolor=fcol,
                                     alpha=falpha,
                                     interpolate=True,
@@ -575,7 +633,8 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
         for downind in downinds:
             self.plotind(iref, downind)
 
-    def plotvolume(self, data, opens, highs, lows, closes, volumes, label):
+    def plotvolume(self, data, opens, highs, lows, closes, volumes, label,
+                   xdata=None, width=1):
         pmaster = data.plotinfo.plotmaster
         if pmaster is data:
             pmaster = None
@@ -600,9 +659,12 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
 
             # Plot the volume (no matter if as overlay or standalone)
             vollabel = label
-            volplot, = plot_volume(ax, self.pinf.xdata, opens, closes, volumes,
+            if xdata is None:
+                xdata = self.pinf.xdata
+            volplot, = plot_volume(ax, xdata, opens, closes, volumes,
                                    colorup=self.pinf.sch.volup,
                                    colordown=self.pinf.sch.voldown,
+                                   width=width,
                                    alpha=volalpha, label=vollabel)
 
             nbins = 6
@@ -654,6 +716,16 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
         closes = data.close.plotrange(self.pinf.xstart, self.pinf.xend)
         volumes = data.volume.plotrange(self.pinf.xstart, self.pinf.xend)
 
+        # the bars to draw: aggregated if too many (labels use the last bar)
+        k = self.pinf.lodk
+        if k > 1:
+            pbars = lod_ohlc(self.pinf.xdata,
+                             opens, highs, lows, closes, volumes, k)
+        else:
+            pbars = (self.pinf.xdata, opens, highs, lows, closes, volumes)
+
+        px, popens, phighs, plows, pcloses, pvolumes = pbars
+
         vollabel = 'Volume'
         pmaster = data.plotinfo.plotmaster
         if pmaster is data:
@@ -672,7 +744,8 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
         axdatamaster = None
         if self.pinf.sch.volume and voloverlay:
             volplot = self.plotvolume(
-                data, opens, highs, lows, closes, volumes, vollabel)
+                data, popens, phighs, plows, pcloses, pvolumes, vollabel,
+                xdata=px, width=k)
             axvol = self.pinf.daxis[data.volume]
             ax = axvol.twinx()
             self.pinf.daxis[data] = ax
@@ -705,7 +778,7 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                 color = self.pinf.color(axdatamaster)
 
             plotted = plot_lineonclose(
-                ax, self.pinf.xdata, closes,
+                ax, px, pcloses,
                 color=color, label=datalabel)
         else:
             if self.pinf.sch.linevalues and plinevalues:
@@ -713,7 +786,8 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
                              (opens[-1], highs[-1], lows[-1], closes[-1])
             if self.pinf.sch.style.startswith('candle'):
                 plotted = plot_candlestick(
-                    ax, self.pinf.xdata, opens, highs, lows, closes,
+                    ax, px, popens, phighs, plows, pcloses,
+                    width=k,
                     colorup=self.pinf.sch.barup,
                     colordown=self.pinf.sch.bardown,
                     label=datalabel,
@@ -724,7 +798,8 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
             elif self.pinf.sch.style.startswith('bar') or True:
                 # final default option -- should be "else"
                 plotted = plot_ohlc(
-                    ax, self.pinf.xdata, opens, highs, lows, closes,
+                    ax, px, popens, phighs, plows, pcloses,
+                    tickwidth=0.5 * k,
                     colorup=self.pinf.sch.barup,
                     colordown=self.pinf.sch.bardown,
                     label=datalabel)
@@ -748,7 +823,8 @@ class Plot_OldSync(with_metaclass(MetaParams, object)):
             # if not self.pinf.sch.voloverlay:
             if not voloverlay:
                 self.plotvolume(
-                    data, opens, highs, lows, closes, volumes, vollabel)
+                    data, popens, phighs, plows, pcloses, pvolumes, vollabel,
+                    xdata=px, width=k)
             else:
                 # Prepare overlay scaling/pushup or manage own axis
                 if self.pinf.sch.volpushup:
@@ -184,6 +184,12 @@ class PlotScheme(object):
         # strftime Format string for the display of data points values
         self.fmt_x_data = None
 
+        # Maximum number of bars to plot per figure (0: no limit). If more
+        # bars are to be plotted, they are aggregated in buckets: OHLC bars of
+        # each bucket for datas and min/max preserving values for the lines.
+        # The lines are aggregated again for the visible range when zooming
+        self.maxbars = 0
+
     def color(self, idx):
         colidx = tab10_index[idx % len(tab10_index)]
         return self.lcolors[colidx]
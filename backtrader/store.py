@@ -22,9 +22,16 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import collections
+import threading
+import time
+
+try:
+    import concurrent.futures
+except ImportError:  # Python 2 without the "futures" backport
+    concurrent = None
 
 from backtrader.metabase import MetaParams
-from backtrader.utils.py3 import with_metaclass
+from backtrader.utils.py3 import queue, with_metaclass
 
 
 class MetaSingleton(MetaParams):
@@ -45,6 +52,7 @@ class Store(with_metaclass(MetaSingleton, object)):
     '''Base class for all Stores'''
 
     _started = False
+    _env = None
 
     params = ()
 
@@ -87,8 +95,346 @@ class Store(with_metaclass(MetaSingleton, object)):
 
     def put_notification(self, msg, *args, **kwargs):
         self.notifs.append((msg, args, kwargs))
+        livewake(self._env)
 
     def get_notifications(self):
         '''Return the pending "store" notifications'''
         self.notifs.append(None)  # put a mark / threads could still append
         return [x for x in iter(self.notifs.popleft, None)]
+
+
+class LiveQueue(object):
+    '''Queue for the delivery of data to a feed, with the interface of
+    ``queue.Queue`` (``put``, ``get``, ``qsize``, ``empty`` ...)
+
+    All queues created by a ``LiveMux`` share a condition with it, which is
+    notified with each ``put``, allowing to wait for any of them
+
+    If ``maxsize`` is greater than ``0``, ``put`` blocks while the queue is
+    full (back-pressure on the producer)
+    '''
+    def __init__(self, mux, maxsize=0):
+        self.mux = mux
+        self.maxsize = maxsize
+        self._q = collections.deque()
+
+    def qsize(self):
+        return len(self._q)
+
+    def empty(self):
+        return not self._q
+
+    def full(self):
+        return 0 < self.maxsize <= len(self._q)
+
+    def put(self, item, block=True, timeout=None):
+        with self.mux.cond:
+            if self.full():
+                if not block or not self.mux._waitfor(self.full, timeout):
+                    raise queue.Full
+
+            self._q.append(item)
+            self.mux._seq += 1
+            self.mux.cond.notify_all()
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        with self.mux.cond:
+            if not self._q:
+                if not block or not self.mux._waitfor(self.empty, timeout):
+                    raise queue.Empty
+
+            item = self._q.popleft()
+            if self.maxsize > 0:
+                self.mux.cond.notify_all()  # wake up blocked producers
+
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+
+class LiveMux(object):
+    '''Multiplexer of the inbound queues of the live data feeds of a
+    ``Cerebro`` instance
+
+    Instead of having each feed wait in turn (``qcheck``) for data on its own
+    queue, the queues are created with ``queue`` and ``wait`` returns as soon
+    as anything has been put in any of them (or a wake up has been requested
+    with ``wake``)
+
+    Params:
+
+      - ``maxsize`` (default: ``0``): default maximum size of the queues
+    '''
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.cond = threading.Condition()
+        self._seq = 0  # incremented with each put/wake
+        self._seen = 0  # value of _seq at the end of the last wait
+        self.active = False  # becomes True when the 1st queue is created
+
+    def queue(self, maxsize=None):
+        '''Returns a new ``LiveQueue`` bound to this multiplexer'''
+        self.active = True
+        return LiveQueue(self, self.maxsize if maxsize is None else maxsize)
+
+    def wake(self):
+        '''Ends the current/next ``wait``'''
+        with self.cond:
+            self._seq += 1
+            self.cond.notify_all()
+
+    def wait(self, timeout=None):
+        '''Waits until something has been put in the queues since the last
+        call or until ``timeout`` (seconds) expires. Returns ``True`` if
+        something was put'''
+        with self.cond:
+            ret = self._waitfor(lambda: self._seq == self._seen, timeout)
+            self._seen = self._seq
+            return ret
+
+    def _waitfor(self, blocked, timeout=None):
+        # wait on the condition while "blocked" returns True. The lock must
+        # be held by the caller. Returns False if timed out
+        if timeout is None:
+            while blocked():
+                self.cond.wait()
+            return True
+
+        endtime = time.time() + timeout
+        while blocked():
+            remaining = endtime - time.time()
+            if remaining <= 0.0:
+                return False
+            self.cond.wait(remaining)
+
+        return True
+
+
+def livequeue(env, maxsize=None):
+    '''Returns a queue for the delivery of data to a feed, multiplexed if the
+    environment (``Cerebro``) supports it or else a standard
+    ``queue.Queue``'''
+    mux = getattr(env, '_livemux', None)
+    if mux is None:
+        return queue.Queue(maxsize or 0)
+
+    return mux.queue(maxsize)
+
+
+def livewake(env):
+    '''Wakes up the environment (``Cerebro``) if waiting for live data'''
+    mux = getattr(env, '_livemux', None)
+    if mux is not None:
+        mux.wake()
+
+
+class StorePool(with_metaclass(MetaSingleton, object)):
+    '''Pool of worker threads shared by the stores
+
+    ``submit`` runs blocking callables (requests to the servers) in a bounded
+    pool of worker threads instead of in a thread started for each request
+
+    The stores ``attach`` to the pool when started and ``detach`` when
+    stopped. The workers are stopped when the last store has detached and
+    started again with the next ``submit``
+
+    Params:
+
+      - ``maxworkers`` (default: ``16``): size of the pool of worker threads
+    '''
+    params = (('maxworkers', 16),)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.executor = None
+        self._users = set()
+
+    def attach(self, user):
+        '''Registers ``user`` (a store) as user of the pool'''
+        with self._lock:
+            self._users.add(user)
+
+    def detach(self, user):
+        '''Unregisters ``user`` and stops the pool if it was the last one'''
+        with self._lock:
+            self._users.discard(user)
+            if self._users:
+                return
+
+        self.stop()
+
+    def start(self):
+        with self._lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(
+                    self.p.maxworkers)
+
+    def stop(self):
+        with self._lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False)
+                self.executor = None
+
+    def submit(self, func, *args, **kwargs):
+        '''Runs ``func`` with the given arguments in a worker thread and
+        returns a ``concurrent.futures.Future``'''
+        self.start()
+        return self.executor.submit(func, *args, **kwargs)
+
+
+class RequestPacer(object):
+    '''Schedules requests to a server respecting its pacing rules
+
+    Requests are submitted with ``submit`` and sent (by calling the given
+    function) from a background thread as soon as the rules allow it. The end
+    of a request has to be signaled with ``done`` for ``maxactive`` to be
+    observed
+
+    Params:
+
+      - ``maxreqs`` / ``period``: maximum number of requests in any window of
+        ``period`` seconds
+
+      - ``keyreqs`` / ``keyperiod``: maximum number of requests with the same
+        ``key`` (for example the same contract) in any window of
+        ``keyperiod`` seconds
+
+      - ``identical``: minimum seconds in between two requests with the same
+        ``ident`` (identical requests)
+
+      - ``maxactive``: maximum number of requests open simultaneously
+
+    A ``0`` or ``None`` value deactivates a rule
+    '''
+    def __init__(self, maxreqs=0, period=0.0, keyreqs=0, keyperiod=0.0,
+                 identical=0.0, maxactive=0):
+        self.maxreqs = maxreqs
+        self.period = period
+        self.keyreqs = keyreqs
+        self.keyperiod = keyperiod
+        self.identical = identical
+        self.maxactive = maxactive
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._sent = collections.deque()  # times of the sent requests
+        self._keysent = collections.defaultdict(collections.deque)
+        self._identsent = dict()
+        self._active = set()
+        self._pending = collections.deque()
+        self._thread = None
+        self._woken = False
+
+    def delay(self, ident=None, key=None, now=None):
+        '''Returns the seconds to wait until a request with ``ident`` and
+        ``key`` can be sent (``0.0`` if it can be sent now), or ``None`` if
+        only the end of an active request can let it through'''
+        now = time.time() if now is None else now
+        if self.maxactive and len(self._active) >= self.maxactive:
+            return None
+
+        wait = 0.0
+        if self.maxreqs:
+            sent = self._sent
+            while sent and sent[0] <= now - self.period:
+                sent.popleft()
+            if len(sent) >= self.maxreqs:
+                wait = max(wait, sent[-self.maxreqs] + self.period - now)
+
+        if self.keyreqs and key is not None:
+            sent = self._keysent[key]
+            while sent and sent[0] <= now - self.keyperiod:
+                sent.popleft()
+            if len(sent) >= self.keyreqs:
+                wait = max(wait, sent[-self.keyreqs] + self.keyperiod - now)
+
+        if self.identical and ident is not None:
+            last = self._identsent.get(ident)
+            if last is not None:
+                wait = max(wait, last + self.identical - now)
+
+        return wait
+
+    def sent(self, reqid, ident=None, key=None, now=None):
+        '''Records that the request has been sent'''
+        now = time.time() if now is None else now
+        self._sent.append(now)
+        if key is not None:
+            self._keysent[key].append(now)
+        if ident is not None:
+            self._identsent[ident] = now
+        self._active.add(reqid)
+
+    def submit(self, reqid, func, ident=None, key=None):
+        '''Queues the request ``reqid``, which will be sent by calling
+        ``func``'''
+        with self._lock:
+            self._pending.append((reqid, func, ident, key))
+        self._wakeup()
+
+    def done(self, reqid):
+        '''Signals the end of request ``reqid`` (sent or not)'''
+        with self._lock:
+            if reqid in self._active:
+                self._active.discard(reqid)
+            else:  # remove it if still pending
+                self._pending = collections.deque(
+                    x for x in self._pending if x[0] != reqid)
+                return
+
+        self._wakeup()
+
+    def _wakeup(self):
+        # lets the sending thread look at the requests, starting it if needed
+        with self._cond:
+            self._woken = True
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _run(self):
+        # sending thread: sends what can be sent and waits for the next
+        # chance, ending when nothing is left pending
+        while True:
+            mindelay = self._send()
+            with self._cond:
+                if not self._woken:
+                    if not self._pending:
+                        self._thread = None
+                        return
+
+                    self._cond.wait(mindelay)  # None: until woken up
+
+                self._woken = False
+
+    def _send(self):
+        # sends what can be sent, returns the wait for the next one (if any)
+        while True:
+            tosend = None
+            mindelay = None
+            with self._lock:
+                now = time.time()
+                for i, (reqid, func, ident, key) in enumerate(self._pending):
+                    delay = self.delay(ident, key, now=now)
+                    if delay is None:
+                        break  # nothing can be sent until a request ends
+                    if delay <= 0.0:
+                        tosend = func
+                        del self._pending[i]
+                        self.sent(reqid, ident, key, now=now)
+                        break
+                    if mindelay is None or delay < mindelay:
+                        mindelay = delay
+
+            if tosend is None:
+                break
+
+            tosend()
+
+        return mindelay
@@ -24,8 +24,12 @@ from __future__ import (absolute_import, division, print_function,
 import collections
 from copy import copy
 from datetime import date, datetime, timedelta
+import hashlib
 import inspect
 import itertools
+import os
+import os.path
+import pickle
 import random
 import threading
 import time
@@ -35,7 +39,9 @@ import ib.opt as ibopt
 
 from backtrader import TimeFrame, Position
 from backtrader.metabase import MetaParams
-from backtrader.utils.py3 import bytes, bstr, queue, with_metaclass, long
+from backtrader.store import RequestPacer, StorePool, livequeue, livewake
+from backtrader.utils.py3 import (bstr, queue, with_metaclass, long,
+                                  integer_types)
 from backtrader.utils import AutoDict, UTC
 
 bytes = bstr  # py2/3 need for ibpy
@@ -82,6 +88,81 @@ class RTVolume(object):
             self.datetime += tmoffset
 
 
+# Fields of the historical bars kept in the chunk cache
+HistBar = collections.namedtuple(
+    'HistBar',
+    'date open high low close volume count WAP hasGaps')
+
+
+class _HistJob(object):
+    '''Delivers in order to a single queue the bars of the chunks in which a
+    historical request is split, which are requested concurrently and may
+    arrive in any order'''
+    def __init__(self, store, q, nchunks):
+        self.store = store
+        self.q = q
+        self.chunkqs = list()
+        self.bars = [list() for i in range(nchunks)]  # pending delivery
+        self.finished = [False] * nchunks
+        self.head = 0  # chunk currently being delivered
+        self._lock = threading.Lock()
+
+    def bar(self, idx, msg):
+        with self._lock:
+            if idx == self.head:
+                self.q.put(msg)
+            else:
+                self.bars[idx].append(msg)
+
+    def finish(self, idx, msg):
+        with self._lock:
+            self.finished[idx] = True
+            while self.head < len(self.finished) and \
+                    self.finished[self.head]:
+                self.head += 1
+                if self.head < len(self.finished):
+                    for bar in self.bars[self.head]:
+                        self.q.put(bar)
+                    self.bars[self.head] = list()
+
+            if self.head == len(self.finished):
+                self.store._histjobs.pop(self.q, None)
+                self.q.put(msg)  # end of historical data
+                self.store.cancelQueue(self.q)
+
+    def error(self, msg):
+        self.q.put(msg)
+
+
+class _HistChunkQueue(object):
+    '''Takes the place of a queue for a chunk of a historical request and
+    forwards the messages to the job'''
+    # connection wide codes are already delivered to the job queue
+    _CONNCODES = (-1100, -1101, -1102)
+
+    def __init__(self, job, idx, cachekey=None):
+        self.job = job
+        self.idx = idx
+        self.cachekey = cachekey
+        self.cachebars = list()
+
+    def put(self, msg):
+        if msg is None:
+            self.job.error(msg)
+        elif isinstance(msg, integer_types):
+            if msg not in self._CONNCODES:
+                self.job.error(msg)
+        elif msg.date is None:
+            if self.cachekey is not None:
+                self.job.store._histcacheput(self.cachekey, self.cachebars)
+            self.job.finish(self.idx, msg)
+        else:
+            if self.cachekey is not None:
+                self.cachebars.append(HistBar(
+                    *(getattr(msg, f, None) for f in HistBar._fields)))
+            self.job.bar(self.idx, msg)
+
+
 class MetaSingleton(MetaParams):
     '''Metaclass to make a metaclassed class a singleton'''
     def __init__(cls, name, bases, dct):
@@ -163,6 +244,20 @@ class IBStore(with_metaclass(MetaSingleton, object)):
       - ``indcash`` (default: ``True``)
 
         Manage IND codes as if they were cash for price retrieval
+
+      - ``histpacing`` (default: ``True``)
+
+        Historical data requests are scheduled respecting the IB pacing rules
+        (at most 60 requests in 10 minutes, 5 requests for the same contract
+        in 2 seconds, 15 seconds between identical requests and 50
+        simultaneous requests). Long historical downloads are split in chunks
+        which are requested concurrently and delivered in order
+
+      - ``histcache`` (default: ``None``)
+
+        Directory in which the completed chunks of historical data (those
+        ending at least a day ago) will be cached, to avoid downloading them
+        again after a restart
     '''
 
     # Set a base for the data requests (historical/realtime) to distinguish the
@@ -184,6 +279,8 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         ('timeoffset', True),  # Use offset to server for timestamps if needed
         ('timerefresh', 60.0),  # How often to refresh the timeoffset
         ('indcash', True),  # Treat IND codes as CASH elements
+        ('histpacing', True),  # pace historical requests with IB rules
+        ('histcache', None),  # directory to cache historical chunks
     )
 
     @classmethod
@@ -223,7 +320,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         self.ts = collections.OrderedDict()  # key: queue -> tickerId
         self.iscash = dict()  # tickerIds from cash products (for ex: EUR.JPY)
 
-        self.histexreq = dict()  # holds segmented historical requests
+        self._histjobs = dict()  # key: queue -> segmented hist request
         self.histfmt = dict()  # holds datetimeformat for request
         self.histsend = dict()  # holds sessionend (data time) for request
         self.histtz = dict()  # holds sessionend (data time) for request
@@ -245,6 +342,14 @@ class IBStore(with_metaclass(MetaSingleton, object)):
 
         self.notifs = queue.Queue()  # store notifications for cerebro
 
+        # Scheduler for the historical requests
+        if self.p.histpacing:
+            self._histpacer = RequestPacer(
+                maxreqs=60, period=600.0, keyreqs=5, keyperiod=2.0,
+                identical=15.0, maxactive=50)
+        else:
+            self._histpacer = RequestPacer()  # no rules: send immediately
+
         # Use the provided clientId or a random one
         if self.p.clientId is None:
             self.clientId = random.randint(1, pow(2, 16) - 1)
@@ -298,6 +403,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
             self.revdur[barsize].sort(key=key2fn)
 
     def start(self, data=None, broker=None):
+        StorePool().attach(self)
         self.reconnect(fromstart=True)  # reconnect should be an invariant
 
         # Datas require some processing to kickstart data reception
@@ -323,6 +429,8 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         self._event_managed_accounts.set()
         self._event_accdownload.set()
 
+        StorePool().detach(self)  # the last store stops the pool
+
     def logmsg(self, *args):
         # for logging purposes
         if self.p._debug:
@@ -332,7 +440,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         # will be registered to see all messages if debug is requested
         self.logmsg(str(msg))
         if self.p.notifyall:
-            self.notifs.put((msg, tuple(msg.values()), dict(msg.items())))
+            self._putnotif((msg, tuple(msg.values()), dict(msg.items())))
 
     def connected(self):
         # The isConnected method is available through __getattr__ indirections
@@ -399,30 +507,27 @@ class IBStore(with_metaclass(MetaSingleton, object)):
 
     def startdatas(self):
         # kickstrat datas, not returning until all of them have been done
-        ts = list()
-        for data in self.datas:
-            t = threading.Thread(target=data.reqdata)
-            t.start()
-            ts.append(t)
-
-        for t in ts:
-            t.join()
+        pool = StorePool()
+        fs = [pool.submit(data.reqdata) for data in self.datas]
+        for f in fs:
+            f.result()
 
     def stopdatas(self):
         # stop subs and force datas out of the loop (in LIFO order)
         qs = list(self.qs.values())
-        ts = list()
-        for data in self.datas:
-            t = threading.Thread(target=data.canceldata)
-            t.start()
-            ts.append(t)
-
-        for t in ts:
-            t.join()
+        pool = StorePool()
+        fs = [pool.submit(data.canceldata) for data in self.datas]
+        for f in fs:
+            f.result()
 
         for q in reversed(qs):  # datamaster the last one to get a None
             q.put(None)
 
+    def _putnotif(self, notif):
+        # queue a (msg, args, kwargs) notification and wake up cerebro
+        self.notifs.put(notif)
+        livewake(self._env)
+
     def get_notifications(self):
         '''Return the pending "store" notifications'''
         # The background thread could keep on adding notifications. The None
@@ -453,7 +558,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         # errors in Interactive Brokers are actually informational and many may
         # actually be of interest to the user
         if not self.p.notifyall:
-            self.notifs.put((msg, tuple(msg.values()), dict(msg.items())))
+            self._putnotif((msg, tuple(msg.values()), dict(msg.items())))
 
         # Manage those events which have to do with connection
         if msg.errorCode is None:
@@ -601,7 +706,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
 
     def getTickerQueue(self, start=False):
         '''Creates ticker/Queue for data delivery to a data feed'''
-        q = queue.Queue()
+        q = livequeue(self._env)
         if start:
             q.put(None)
             return q
@@ -621,6 +726,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         self.qs.pop(tickerId, None)
 
         self.iscash.pop(tickerId, None)
+        self._histpacer.done(tickerId)  # let other requests go if pending
 
         if sendnone:
             q.put(None)
@@ -640,7 +746,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
 
         if not cds or (maxcount and len(cds) > maxcount):
             err = 'Ambiguous contract: none/multiple answers received'
-            self.notifs.put((err, cds, {}))
+            self._putnotif((err, cds, {}))
             return None
 
         return cds
@@ -688,13 +794,13 @@ class IBStore(with_metaclass(MetaSingleton, object)):
             if duration is None:
                 err = ('No duration for historical data request for '
                        'timeframe/compresison')
-                self.notifs.put((err, (), kwargs))
+                self._putnotif((err, (), kwargs))
                 return self.getTickerQueue(start=True)
             barsize = self.tfcomp_to_size(timeframe, compression)
             if barsize is None:
                 err = ('No supported barsize for historical data request for '
                        'timeframe/compresison')
-                self.notifs.put((err, (), kwargs))
+                self._putnotif((err, (), kwargs))
                 return self.getTickerQueue(start=True)
 
             return self.reqHistoricalData(contract=contract, enddate=enddate,
@@ -713,51 +819,133 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         else:
             tickerId, q = self.reuseQueue(tickerId)  # reuse q for old tickerId
 
-        # Get the best possible duration to reduce number of requests
-        duration = None
-        for dur in durations:
-            intdate = self.dt_plus_duration(begindate, dur)
+        # Split begin -> end in chunks (end date, duration) using the best
+        # possible durations to reduce the number of requests
+        chunks = list()
+        while True:
+            duration = None
+            for dur in durations:
+                intdate = self.dt_plus_duration(begindate, dur)
+                if intdate >= enddate:
+                    intdate = enddate
+                    duration = dur  # begin -> end fits in single request
+                    break
+
+            if duration is None:  # no duration large enough to fit
+                duration = durations[-1]
+
+            chunks.append((intdate, duration))
             if intdate >= enddate:
-                intdate = enddate
-                duration = dur  # begin -> end fits in single request
                 break
 
-        if duration is None:  # no duration large enough to fit the request
-            duration = durations[-1]
-
-            # Store the calculated data
-            self.histexreq[tickerId] = dict(
-                contract=contract, enddate=enddate, begindate=intdate,
-                timeframe=timeframe, compression=compression,
-                what=what, useRTH=useRTH, tz=tz, sessionend=sessionend)
+            begindate = intdate
 
         barsize = self.tfcomp_to_size(timeframe, compression)
-        self.histfmt[tickerId] = timeframe >= TimeFrame.Days
-        self.histsend[tickerId] = sessionend
-        self.histtz[tickerId] = tz
 
+        iscash = False
         if contract.m_secType in ['CASH', 'CFD']:
-            self.iscash[tickerId] = 1  # msg.field code
+            iscash = 1  # msg.field code
             if not what:
                 what = 'BID'  # default for cash unless otherwise specified
 
         elif contract.m_secType in ['IND'] and self.p.indcash:
-            self.iscash[tickerId] = 4  # msg.field code
+            iscash = 4  # msg.field code
 
+        self.iscash[tickerId] = iscash
         what = what or 'TRADES'
 
-        self.conn.reqHistoricalData(
-            tickerId,
-            contract,
-            bytes(intdate.strftime('%Y%m%d %H:%M:%S') + ' GMT'),
-            bytes(duration),
-            bytes(barsize),
-            bytes(what),
-            int(useRTH),
-            2)  # dateformat 1 for string, 2 for unix time in seconds
+        # The chunks are requested concurrently (observing the pacing) and
+        # delivered in order by the job to the queue
+        job = _HistJob(self, q, len(chunks))
+        self._histjobs[q] = job
+
+        cutoff = datetime.utcnow() - timedelta(days=1)  # complete chunks
+        for idx, (intdate, duration) in enumerate(chunks):
+            cachekey = None
+            if self.p.histcache and intdate <= cutoff:
+                cachekey = self._histcachekey(
+                    contract, intdate, duration, barsize, what, useRTH,
+                    timeframe, tz, sessionend)
+
+                bars = self._histcacheget(cachekey)
+                if bars is not None:
+                    for bar in bars:
+                        job.bar(idx, bar)
+
+                    job.finish(idx, HistBar(*([None] * len(HistBar._fields))))
+                    continue
+
+            cq = _HistChunkQueue(job, idx, cachekey)
+            job.chunkqs.append(cq)
+            with self._lock_q:
+                ctickerId = self.nextTickerId()
+                self.qs[ctickerId] = cq
+                self.ts[cq] = ctickerId
+                self.iscash[ctickerId] = iscash
+
+            self.histfmt[ctickerId] = timeframe >= TimeFrame.Days
+            self.histsend[ctickerId] = sessionend
+            self.histtz[ctickerId] = tz
+
+            self._histrequest(ctickerId, contract, intdate, duration, barsize,
+                              what, useRTH)
 
         return q
 
+    def _histrequest(self, tickerId, contract, enddate, duration, barsize,
+                     what, useRTH):
+        '''Schedules the actual historical request with the pacer'''
+        ckey = self._contractkey(contract)
+        enddate = bytes(enddate.strftime('%Y%m%d %H:%M:%S') + ' GMT')
+
+        def send():
+            self.conn.reqHistoricalData(
+                tickerId,
+                contract,
+                enddate,
+                bytes(duration),
+                bytes(barsize),
+                bytes(what),
+                int(useRTH),
+                2)  # dateformat 1 for string, 2 for unix time in seconds
+
+        ident = (ckey, enddate, duration, barsize, what, int(useRTH))
+        self._histpacer.submit(tickerId, send, ident=ident, key=ckey)
+
+    def _contractkey(self, contract):
+        return tuple(getattr(contract, f, None) for f in (
+            'm_conId', 'm_symbol', 'm_secType', 'm_exchange', 'm_currency',
+            'm_expiry', 'm_strike', 'm_right', 'm_multiplier',
+            'm_localSymbol'))
+
+    def _histcachekey(self, *args):
+        contract = args[0]
+        key = repr((self._contractkey(contract),) + args[1:])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _histcachefile(self, cachekey):
+        return os.path.join(self.p.histcache, cachekey + '.pkl')
+
+    def _histcacheget(self, cachekey):
+        try:
+            with open(self._histcachefile(cachekey), 'rb') as f:
+                return [HistBar(*bar) for bar in pickle.load(f)]
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _histcacheput(self, cachekey, bars):
+        fname = self._histcachefile(cachekey)
+        try:
+            if not os.path.isdir(self.p.histcache):
+                os.makedirs(self.p.histcache)
+
+            tmpname = fname + '.tmp'
+            with open(tmpname, 'wb') as f:
+                pickle.dump([tuple(bar) for bar in bars], f, protocol=2)
+            os.rename(tmpname, fname)  # only complete files are seen
+        except (IOError, OSError):
+            pass  # caching is only an optimization
+
     def reqHistoricalData(self, contract, enddate, duration, barsize,
                           what=None, useRTH=False, tz='', sessionend=None):
         '''Proxy to reqHistorical Data'''
@@ -780,15 +968,8 @@ class IBStore(with_metaclass(MetaSingleton, object)):
         self.histsend[tickerId] = sessionend
         self.histtz[tickerId] = tz
 
-        self.conn.reqHistoricalData(
-            tickerId,
-            contract,
-            bytes(enddate.strftime('%Y%m%d %H:%M:%S') + ' GMT'),
-            bytes(duration),
-            bytes(barsize),
-            bytes(what),
-            int(useRTH),
-            2)
+        self._histrequest(tickerId, contract, enddate, duration, barsize,
+                          what, useRTH)
 
         return q
 
@@ -799,7 +980,16 @@ class IBStore(with_metaclass(MetaSingleton, object)):
           - q: the Queue returned by reqMktData
         '''
         with self._lock_q:
-            self.conn.cancelHistoricalData(self.ts[q])
+            job = self._histjobs.pop(q, None)
+            if job is not None:  # cancel the pending chunks
+                for cq in job.chunkqs:
+                    tickerId = self.ts.get(cq, None)
+                    if tickerId is not None:
+                        self.cancelQueue(cq)
+                        self.conn.cancelHistoricalData(tickerId)
+            else:
+                self.conn.cancelHistoricalData(self.ts[q])
+
             self.cancelQueue(q, True)
 
     def reqRealTimeBars(self, contract, useRTH=False, duration=5):
@@ -944,11 +1134,6 @@ class IBStore(with_metaclass(MetaSingleton, object)):
             self.histfmt.pop(tickerId, None)
             self.histsend.pop(tickerId, None)
             self.histtz.pop(tickerId, None)
-            kargs = self.histexreq.pop(tickerId, None)
-            if kargs is not None:
-                self.reqHistoricalDataEx(tickerId=tickerId, **kargs)
-                return
-
             msg.date = None
             self.cancelQueue(q)
         else:
@@ -1368,7 +1553,7 @@ class IBStore(with_metaclass(MetaSingleton, object)):
                            'Operation can continue, but the trades '
                            'calculated in the strategy may be wrong')
 
-                    self.notifs.put((err, (), {}))
+                    self._putnotif((err, (), {}))
 
                 # Flag signal to broker at the end of account download
                 # self.port_update = True
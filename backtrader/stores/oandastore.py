@@ -32,6 +32,7 @@ import requests  # oandapy depdendency
 
 import backtrader as bt
 from backtrader.metabase import MetaParams
+from backtrader.store import StorePool, livequeue, livewake
 from backtrader.utils.py3 import queue, with_metaclass
 from backtrader.utils import AutoDict
 
@@ -241,6 +242,8 @@ class OandaStore(with_metaclass(MetaSingleton, object)):
             self.cash = None
             return
 
+        StorePool().attach(self)
+
         if data is not None:
             self._env = data._env
             # For datas simulate a queue with None to kickstart co
@@ -261,8 +264,11 @@ class OandaStore(with_metaclass(MetaSingleton, object)):
             self.q_orderclose.put(None)
             self.q_account.put(None)
 
+        StorePool().detach(self)  # the last store stops the pool
+
     def put_notification(self, msg, *args, **kwargs):
         self.notifs.append((msg, args, kwargs))
+        livewake(self._env)
 
     def get_notifications(self):
         '''Return the pending "store" notifications'''
@@ -350,10 +356,8 @@ class OandaStore(with_metaclass(MetaSingleton, object)):
 
         kwargs = locals().copy()
         kwargs.pop('self')
-        kwargs['q'] = q = queue.Queue()
-        t = threading.Thread(target=self._t_candles, kwargs=kwargs)
-        t.daemon = True
-        t.start()
+        kwargs['q'] = q = livequeue(self._env)
+        StorePool().submit(self._t_candles, **kwargs)  # pooled thread
         return q
 
     def _t_candles(self, dataname, dtbegin, dtend, timeframe, compression,
@@ -389,7 +393,8 @@ class OandaStore(with_metaclass(MetaSingleton, object)):
         q.put({})  # end of transmission
 
     def streaming_prices(self, dataname, tmout=None):
-        q = queue.Queue()
+        # the stream blocks for its entire life: it gets its own thread
+        q = livequeue(self._env)
         kwargs = {'q': q, 'dataname': dataname, 'tmout': tmout}
         t = threading.Thread(target=self._t_streaming_prices, kwargs=kwargs)
         t.daemon = True
@@ -33,8 +33,8 @@ import ctypes
 from backtrader import TimeFrame, Position
 from backtrader.feed import DataBase
 from backtrader.metabase import MetaParams
-from backtrader.utils.py3 import (MAXINT, range, queue, string_types,
-                                  with_metaclass)
+from backtrader.store import livequeue, livewake
+from backtrader.utils.py3 import MAXINT, range, string_types, with_metaclass
 from backtrader.utils import AutoDict
 
 
@@ -194,6 +194,8 @@ class VCStore(with_metaclass(MetaSingleton, object)):
     BrokerCls = None  # broker class will autoregister
     DataCls = None  # data class will auto register
 
+    _env = None  # reference to cerebro for general notifications
+
     # 32 bit max unsigned int for openinterest correction
     MAXUINT = 0xffffffff // 2
 
@@ -372,6 +374,7 @@ class VCStore(with_metaclass(MetaSingleton, object)):
 
     def put_notification(self, msg, *args, **kwargs):
         self.notifs.append((msg, args, kwargs))
+        livewake(self._env)
 
     def get_notifications(self):
         '''Return the pending "store" notifications'''
@@ -436,7 +439,8 @@ class VCStore(with_metaclass(MetaSingleton, object)):
         return vctimeframe == self.vcdsmod.CT_Ticks
 
     def _getq(self, data):
-        q = queue.Queue()
+        self._env = data._env
+        q = livequeue(self._env)
         self._dqs.append(q)
         self._qdatas[q] = data
         return q
@@ -152,8 +152,16 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
                 for it in self._lineiterators[itcls]:
                     it.qbuffer(savemem=1)
 
+    def _qbuffer_observers(self):
+        '''Puts the lines of the observers in memory saving mode. Only the
+        lines are affected, because observers are always run in next mode even
+        if the indicators are calculated with runonce'''
+        for observer in self._lineiterators[LineIterator.ObsType]:
+            for line in observer.lines:
+                line.qbuffer()
+
     def _periodset(self):
-        dataids = [id(data) for data in self.datas]
+        dataids = set(id(data) for data in self.datas)
 
         _dminperiods = collections.defaultdict(list)
         for lineiter in self._lineiterators[LineIterator.IndType]:
@@ -317,6 +325,102 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
 
         self.clear()
 
+    def _oncewindow(self):
+        '''
+        Windowed counterpart of ``_once`` (see ``oncewindow`` in ``Cerebro``).
+        The indicators calculate the values for the bars delivered by the
+        datas since the last call. The strategy keeps running bar by bar
+        '''
+        for indicator in self._lineiterators[LineIterator.IndType]:
+            indicator._oncewindow()
+
+    def _windowindicators(self):
+        '''Returns the indicators (and line actions) at all levels which are
+        calculated in ``_oncewindow``'''
+        indicators = []
+        pending = list(self._lineiterators[LineIterator.IndType])
+        while pending:
+            indicator = pending.pop()
+            indicators.append(indicator)
+            if isinstance(indicator, LineIterator):
+                pending.extend(indicator._lineiterators[LineIterator.IndType])
+
+        return indicators
+
+    def _windowlead(self):
+        '''
+        Lines delivering values from the future (``line(ago)`` with a positive
+        ``ago``) anywhere up in the dependency chain of an object make the last
+        bars it calculates in a window change with the next window.
+
+        Each object calculated in ``_oncewindow`` gets in ``_wleadin`` the lead
+        of its inputs (the bars of the former window it has to calculate
+        again) and the largest lead of all is returned: the strategy has to
+        stay as many bars behind the last loaded bar
+        '''
+        indicators = self._windowindicators()
+
+        producers = dict()  # id(line) -> object which calculates it
+        for ind in indicators:
+            lines = ind.lines if isinstance(ind, LineIterator) else [ind]
+            for line in lines:
+                producers.setdefault(id(line), ind)
+
+        for ind in indicators:  # lines set from the bindings of others
+            lines = ind.lines if isinstance(ind, LineIterator) else [ind]
+            for line in lines:
+                for binding in line.bindings:
+                    producers[id(binding)] = ind
+
+        leads = dict()  # id(obj) -> lead of the values it produces
+
+        def lead(obj):
+            objid = id(obj)
+            if objid in leads:
+                return leads[objid]
+
+            leads[objid] = 0  # break dependency cycles (recursive lines)
+            if isinstance(obj, LineIterator):
+                inputs = obj.datas + obj._lineiterators[LineIterator.IndType]
+            else:
+                inputs = obj._datas
+
+            inlines = []
+            for x in inputs:
+                inlines.extend([x] if isinstance(x, LineSingle) else x.lines)
+
+            prods = [producers.get(id(line)) for line in inlines]
+            obj._wleadin = max([lead(x) for x in prods if x is not None] +
+                               [0])
+
+            leads[objid] = obj._wleadin + getattr(obj, '_wforward', 0)
+            return leads[objid]
+
+        return max([lead(ind) for ind in indicators] + [0])
+
+    def _trimwindow(self, keep):
+        '''
+        Discards the values older than ``keep`` bars from the current position
+        of the datas, the strategy and the observers. The indicators discard
+        as many values as their clocks, to stay aligned with them
+        '''
+        objs = itertools.chain(self.datas, [self],
+                               self._lineiterators[LineIterator.ObsType])
+        for obj in objs:
+            size = obj.lines[0].idx + 1 - keep
+            if size > 0:
+                obj.trim(size)
+
+        indicators = self._windowindicators()
+        trimmed = True
+        while trimmed:  # until clocks of clocks have been also trimmed
+            trimmed = False
+            for indicator in indicators:
+                size = indicator.buflen() - indicator._clock.buflen()
+                if size > 0:
+                    indicator.trim(size)
+                    trimmed = True
+
     def _clk_update(self):
         if self._oldsync:
             clk_len = super(Strategy, self)._clk_update()
@@ -479,6 +583,58 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
 
         return wrinfo
 
+    def _probe(self, onoff=True):
+        '''Switches on/off the recording of look-backs (see ``probe`` in
+        ``LineBuffer``) for the lines of the datas, the strategy, the
+        indicators (at all levels) and the observers'''
+        pending = list(self.datas) + [self]
+        pending += self._lineiterators[LineIterator.ObsType]
+        while pending:
+            obj = pending.pop()
+            for line in obj.lines:
+                line.probe(onoff)
+            if isinstance(obj, LineIterator):
+                pending.extend(obj._lineiterators[LineIterator.IndType])
+
+    def getbufferreport(self):
+        '''Returns a list with the memory usage of the datas, the strategy,
+        the indicators (at all levels) and the observers. Each entry is a
+        tuple ``(name, lookback, values)``:
+
+          - ``name``: of the object. Indicators are prefixed with the name of
+            the indicator owning them, like in ``RSI.UpDay``
+
+          - ``lookback``: largest look-back requested from any of the lines
+            of the object while recording (see ``bufferwarmup`` in
+            ``Cerebro``), else ``0``
+
+          - ``values``: how many values are currently held in memory by all
+            the lines of the object
+        '''
+        def entry(name, obj):
+            lookback = max([line._lookback for line in obj.lines] or [0])
+            values = sum(len(line.array) for line in obj.lines)
+            return (name, lookback, values)
+
+        report = [entry(d._name or d.__class__.__name__, d)
+                  for d in self.datas]
+        report.append(entry(self.__class__.__name__, self))
+
+        pending = [(self._lineiterators[LineIterator.IndType], '')]
+        while pending:
+            indicators, prefix = pending.pop(0)
+            for ind in indicators:
+                name = prefix + ind.__class__.__name__
+                report.append(entry(name, ind))
+                if isinstance(ind, LineIterator):
+                    pending.append(
+                        (ind._lineiterators[LineIterator.IndType], name + '.'))
+
+        for obs in self._lineiterators[LineIterator.ObsType]:
+            report.append(entry(obs.__class__.__name__, obs))
+
+        return report
+
     def _stop(self):
         self.stop()
 
@@ -672,6 +828,10 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
             `datetime.date`` instance and returns ``True`` if the date is
             allowed for timers or else returns ``False``
 
+            If ``preload`` and ``runonce`` are active, the dates at which the
+            timer fires are precomputed before the run starts and the callback
+            is invoked ahead of time
+
           - ``tzdata`` which can be either ``None`` (default), a ``pytz``
             instance or a ``data feed`` instance.
 
@@ -1375,6 +1535,114 @@ class Strategy(with_metaclass(MetaStrategy, StrategyBase)):
 
         return self.order_target_value(data=data, target=target, **kwargs)
 
+    def rebalance(self, targets, **kwargs):
+        '''
+        Place the orders to rebalance several positions at once to have final
+        values of ``target`` percentage of the current portfolio ``value``
+
+          - ``targets``: a ``dict`` with datas (or data names) as keys and the
+            targets as values, expressed in decimal as in
+            ``order_target_percent``. Datas not in ``targets`` are not touched
+
+          - ``kwargs``: passed to all orders (for example: ``exectype``)
+
+        The deltas are calculated like in ``order_target_percent`` but against
+        a single snapshot of the portfolio value. The orders which reduce
+        positions (sells for long positions) are submitted before the orders
+        which increase them, to have the released cash available.
+
+        With the default broker, if all assets are stock-like and no short
+        positions are involved, the cash needed by all orders is checked in
+        bulk. If there is enough, the orders are accepted without the
+        individual check of ``checksubmit`` (notifying ``Accepted`` directly)
+
+        It returns the list of generated orders (sells first)
+        '''
+        broker = self.broker
+        value = broker.getvalue()
+
+        sells, buys = [], []
+        for data, target in iteritems(targets):
+            if isinstance(data, string_types):
+                data = self.getdatabyname(data)
+
+            possize = broker.getposition(data).size
+            if not target:
+                if possize:  # closing a position
+                    sells.append((data, possize, None))
+                continue
+
+            price = data.close[0]
+            posvalue = broker.getvalue(datas=[data]) if possize else 0.0
+            comminfo = broker.getcommissioninfo(data)
+            target *= value
+            if target > posvalue:
+                size = comminfo.getsize(price, target - posvalue)
+            elif target < posvalue:
+                size = -comminfo.getsize(price, posvalue - target)
+            else:
+                continue
+
+            if size:  # reducing an open position goes first
+                opening = not possize or (size > 0) == (possize > 0)
+                (buys if opening else sells).append((data, size, price))
+
+        if self._rebalance_cashok(sells, buys):
+            kwargs['_checksubmit'] = False
+
+        orders = []
+        for data, size, price in itertools.chain(sells, buys):
+            if price is None:
+                order = self.close(data=data, size=size, **kwargs)
+            elif size > 0:
+                order = self.buy(data=data, size=size, price=price, **kwargs)
+            else:
+                order = self.sell(data=data, size=-size, price=price, **kwargs)
+
+            orders.append(order)
+
+        return orders
+
+    def _rebalance_cashok(self, sells, buys):
+        '''Returns ``True`` if the default broker has, after the sells, the
+        cash for the buys of a rebalancing (only long stock-like positions)
+
+        The remaining value of the open buy orders is taken out of the cash
+        first, because they may execute before the new ones. Open sells are
+        not counted in, because they may not execute'''
+        broker = self.broker
+        if not isinstance(broker, bt.brokers.BackBroker):
+            return False
+
+        if not broker.p.checksubmit:
+            return False  # no checks to skip
+
+        cash = broker.getcash()
+        for order in itertools.chain(broker.submitted, broker.pending):
+            if order is None or not order.isbuy() or not order.alive():
+                continue
+
+            size = order.executed.remsize
+            price = order.created.price or order.data.close[0]
+            comminfo = broker.getcommissioninfo(order.data)
+            cash -= size * price + comminfo.getcommission(size, price)
+
+        for data, size, price in itertools.chain(sells, buys):
+            comminfo = broker.getcommissioninfo(data)
+            possize = broker.getposition(data).size
+            if not comminfo._stocklike or possize < 0:
+                return False
+
+            if price is None:  # closing
+                price, size = data.close[0], -possize
+            elif possize + size < 0:
+                return False  # would go short
+
+            cash -= comminfo.getcommission(size, price)
+            cash -= size * price  # negative size (sell) adds cash
+
+        return cash >= 0.0
+
     def getposition(self, data=None, broker=None):
         '''
         Returns the current position for a given data in a given broker.
@@ -1521,6 +1789,11 @@ class MetaSigStrategy(Strategy.__class__):
         return _obj, args, kwargs
 
 
+# Action flags of the signals for a bar (see SignalStrategy._sigcode)
+(_SIG_LSLONG, _SIG_LSSHORT, _SIG_LENTER, _SIG_SENTER, _SIG_LEXIT, _SIG_SEXIT,
+ _SIG_LREV, _SIG_SREV, _SIG_LLEAVE, _SIG_SLEAVE) = [1 << i for i in range(10)]
+
+
 class SignalStrategy(with_metaclass(MetaSigStrategy, Strategy)):
     '''This subclass of ``Strategy`` is meant to to auto-operate using
     **signals**.
@@ -1574,6 +1847,12 @@ class SignalStrategy(with_metaclass(MetaSigStrategy, Strategy)):
       Orders execution type is ``Market`` and validity is ``None`` (*Good until
       Canceled*)
 
+      With ``runonce`` the state of the signals is calculated in advance for
+      all bars (vectorized if ``numpy`` is available) and each ``next`` only
+      looks it up, skipping the bars in which no signal calls for action.
+      This needs the signals to run on the same clock (else they are
+      evaluated bar by bar)
+
     Params:
 
       - ``signals`` (default: ``[]``): a list/tuple of lists/tuples that allows
@@ -1611,10 +1890,12 @@ class SignalStrategy(with_metaclass(MetaSigStrategy, Strategy)):
 
     def _start(self):
         self._sentinel = None  # sentinel for order concurrency
+        self._sigcodes = None  # precalculated action flags (see _sigcalc)
         super(SignalStrategy, self)._start()
 
     def signal_add(self, sigtype, signal):
         self._signals[sigtype].append(signal)
+        self._sigcodes = None  # recalculated with the next once call
 
     def _notify(self, qorders=[], qtrades=[]):
         # Nullify the sentinel if done
@@ -1636,83 +1917,183 @@ class SignalStrategy(with_metaclass(MetaSigStrategy, Strategy)):
         if self._sentinel is not None and not self.p._concurrent:
             return  # order active and more than 1 not allowed
 
-        sigs = self._signals
-        nosig = [[0.0]]
-
-        # Calculate current status of the signals
-        ls_long = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_LONGSHORT] or nosig)
-        ls_short = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_LONGSHORT] or nosig)
-
-        l_enter0 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_LONG] or nosig)
-        l_enter1 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_LONG_INV] or nosig)
-        l_enter2 = all(x[0] for x in sigs[bt.SIGNAL_LONG_ANY] or nosig)
-        l_enter = l_enter0 or l_enter1 or l_enter2
-
-        s_enter0 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_SHORT] or nosig)
-        s_enter1 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_SHORT_INV] or nosig)
-        s_enter2 = all(x[0] for x in sigs[bt.SIGNAL_SHORT_ANY] or nosig)
-        s_enter = s_enter0 or s_enter1 or s_enter2
-
-        l_ex0 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_LONGEXIT] or nosig)
-        l_ex1 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_LONGEXIT_INV] or nosig)
-        l_ex2 = all(x[0] for x in sigs[bt.SIGNAL_LONGEXIT_ANY] or nosig)
-        l_exit = l_ex0 or l_ex1 or l_ex2
-
-        s_ex0 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_SHORTEXIT] or nosig)
-        s_ex1 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_SHORTEXIT_INV] or nosig)
-        s_ex2 = all(x[0] for x in sigs[bt.SIGNAL_SHORTEXIT_ANY] or nosig)
-        s_exit = s_ex0 or s_ex1 or s_ex2
-
-        # Use oppossite signales to start reversal (by closing)
-        # but only if no "xxxExit" exists
-        l_rev = not self._longexit and s_enter
-        s_rev = not self._shortexit and l_enter
-
-        # Opposite of individual long and short
-        l_leav0 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_LONG] or nosig)
-        l_leav1 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_LONG_INV] or nosig)
-        l_leav2 = all(x[0] for x in sigs[bt.SIGNAL_LONG_ANY] or nosig)
-        l_leave = l_leav0 or l_leav1 or l_leav2
-
-        s_leav0 = all(x[0] > 0.0 for x in sigs[bt.SIGNAL_SHORT] or nosig)
-        s_leav1 = all(x[0] < 0.0 for x in sigs[bt.SIGNAL_SHORT_INV] or nosig)
-        s_leav2 = all(x[0] for x in sigs[bt.SIGNAL_SHORT_ANY] or nosig)
-        s_leave = s_leav0 or s_leav1 or s_leav2
-
-        # Invalidate long leave if longexit signals are available
-        l_leave = not self._longexit and l_leave
-        # Invalidate short leave if shortexit signals are available
-        s_leave = not self._shortexit and s_leave
+        code = self._sigcurrent()
+        if not code:
+            return  # no signal calls for action
 
         # Take size and start logic
         size = self.getposition(self._dtarget).size
         if not size:
-            if ls_long or l_enter:
+            if code & (_SIG_LSLONG | _SIG_LENTER):
                 self._sentinel = self.buy(self._dtarget)
 
-            elif ls_short or s_enter:
+            elif code & (_SIG_LSSHORT | _SIG_SENTER):
                 self._sentinel = self.sell(self._dtarget)
 
         elif size > 0:  # current long position
-            if ls_short or l_exit or l_rev or l_leave:
+            if code & (_SIG_LSSHORT | _SIG_LEXIT | _SIG_LREV | _SIG_LLEAVE):
                 # closing position - not relevant for concurrency
                 self.close(self._dtarget)
 
-            if ls_short or l_rev:
+            if code & (_SIG_LSSHORT | _SIG_LREV):
                 self._sentinel = self.sell(self._dtarget)
 
-            if ls_long or l_enter:
+            if code & (_SIG_LSLONG | _SIG_LENTER):
                 if self.p._accumulate:
                     self._sentinel = self.buy(self._dtarget)
 
         elif size < 0:  # current short position
-            if ls_long or s_exit or s_rev or s_leave:
+            if code & (_SIG_LSLONG | _SIG_SEXIT | _SIG_SREV | _SIG_SLEAVE):
                 # closing position - not relevant for concurrency
                 self.close(self._dtarget)
 
-            if ls_long or s_rev:
+            if code & (_SIG_LSLONG | _SIG_SREV):
                 self._sentinel = self.buy(self._dtarget)
 
-            if ls_short or s_enter:
+            if code & (_SIG_LSSHORT | _SIG_SENTER):
                 if self.p._accumulate:
                     self._sentinel = self.sell(self._dtarget)
+
+    def _sigcurrent(self):
+        '''Returns the action flags of the signals for the current bar'''
+        codes = self._sigcodes
+        if codes is not None:
+            idx = self._sigline.idx
+            if 0 <= idx < len(codes):
+                return codes[idx]
+
+        sigvals = dict((sigtype, [x[0] for x in sigs])
+                       for sigtype, sigs in iteritems(self._signals))
+        return self._sigcode(sigvals)
+
+    def _sigcode(self, sigvals):
+        '''Returns the action flags for the values of the signals in
+        ``sigvals`` (signal type -> list of values). The values can be floats
+        (a single bar) or numpy arrays (many bars at once)'''
+        def allof(sigtype, cond):
+            # like all(...) but also valid for arrays. False if no signals
+            res = False
+            for i, value in enumerate(sigvals.get(sigtype, ())):
+                res = res & cond(value) if i else cond(value)
+
+            return res
+
+        def pos(x):
+            return x > 0.0
+
+        def neg(x):
+            return x < 0.0
+
+        def nonzero(x):
+            return x != 0.0
+
+        # Calculate current status of the signals
+        ls_long = allof(bt.SIGNAL_LONGSHORT, pos)
+        ls_short = allof(bt.SIGNAL_LONGSHORT, neg)
+
+        l_enter = (allof(bt.SIGNAL_LONG, pos) |
+                   allof(bt.SIGNAL_LONG_INV, neg) |
+                   allof(bt.SIGNAL_LONG_ANY, nonzero))
+
+        s_enter = (allof(bt.SIGNAL_SHORT, neg) |
+                   allof(bt.SIGNAL_SHORT_INV, pos) |
+                   allof(bt.SIGNAL_SHORT_ANY, nonzero))
+
+        l_exit = (allof(bt.SIGNAL_LONGEXIT, neg) |
+                  allof(bt.SIGNAL_LONGEXIT_INV, pos) |
+                  allof(bt.SIGNAL_LONGEXIT_ANY, nonzero))
+
+        s_exit = (allof(bt.SIGNAL_SHORTEXIT, pos) |
+                  allof(bt.SIGNAL_SHORTEXIT_INV, neg) |
+                  allof(bt.SIGNAL_SHORTEXIT_ANY, nonzero))
+
+        # Use oppossite signales to start reversal (by closing)
+        # but only if no "xxxExit" exists
+        l_rev = s_enter & (not self._longexit)
+        s_rev = l_enter & (not self._shortexit)
+
+        # Opposite of individual long and short
+        l_leave = (allof(bt.SIGNAL_LONG, neg) |
+                   allof(bt.SIGNAL_LONG_INV, pos) |
+                   allof(bt.SIGNAL_LONG_ANY, nonzero))
+
+        s_leave = (allof(bt.SIGNAL_SHORT, pos) |
+                   allof(bt.SIGNAL_SHORT_INV, neg) |
+                   allof(bt.SIGNAL_SHORT_ANY, nonzero))
+
+        # Invalidate long leave if longexit signals are available
+        l_leave = l_leave & (not self._longexit)
+        # Invalidate short leave if shortexit signals are available
+        s_leave = s_leave & (not self._shortexit)
+
+        flags = (
+            (ls_long, _SIG_LSLONG), (ls_short, _SIG_LSSHORT),
+            (l_enter, _SIG_LENTER), (s_enter, _SIG_SENTER),
+            (l_exit, _SIG_LEXIT), (s_exit, _SIG_SEXIT),
+            (l_rev, _SIG_LREV), (s_rev, _SIG_SREV),
+            (l_leave, _SIG_LLEAVE), (s_leave, _SIG_SLEAVE),
+        )
+
+        code = 0
+        for flag, bit in flags:
+            code = code | flag * bit
+
+        return code
+
+    def _sigcalc(self):
+        '''Precalculates the action flags of the signals for all the bars
+        held in the buffers (``runonce`` mode) to only look them up in
+        ``next``. This is only possible if the signals run on the same clock
+        '''
+        self._sigcodes = None
+
+        lines = [(sigtype, sig.lines[0], sig)
+                 for sigtype, sigs in iteritems(self._signals)
+                 for sig in sigs]
+        if not lines:
+            return
+
+        def rootclock(obj):
+            while getattr(obj, '_clock', None) is not None:
+                obj = obj._clock
+            return obj
+
+        sigline, clock = lines[0][1], rootclock(lines[0][2])
+        idx, n = sigline.idx, sigline.buflen()
+        for sigtype, line, sig in lines:
+            if line.idx != idx or line.buflen() != n or \
+               rootclock(sig) is not clock:
+                return  # values not aligned: evaluate bar by bar
+
+        try:
+            import numpy as np  # keep the import local, numpy is optional
+        except ImportError:
+            np = None
+
+        if np is not None and n:
+            sigvals = collections.defaultdict(list)
+            for sigtype, line, sig in lines:
+                values = np.frombuffer(line.array, dtype=np.float64)[:n]
+                sigvals[sigtype].append(values)
+
+            codes = np.zeros(n, dtype=np.int64) | self._sigcode(sigvals)
+            codes = codes.tolist()
+        else:
+            codes = []
+            for i in range(n):
+                sigvals = collections.defaultdict(list)
+                for sigtype, line, sig in lines:
+                    sigvals[sigtype].append(line.array[i])
+
+                codes.append(self._sigcode(sigvals))
+
+        self._sigline = sigline
+        self._sigcodes = codes
+
+    def _once(self):
+        super(SignalStrategy, self)._once()
+        self._sigcalc()
+
+    def _oncewindow(self):
+        super(SignalStrategy, self)._oncewindow()
+        self._sigcalc()
@@ -24,6 +24,7 @@ from __future__ import (absolute_import, division, print_function,
 # The modules below should/must define __all__ with the objects wishes
 # or prepend an "_" (underscore) to private classes/variables
 
+import array
 import sys
 
 import backtrader as bt
@@ -38,6 +39,53 @@ else:
     import numpy as np  # talib dependency
     import talib.abstract
 
+    try:
+        import talib.stream
+    except ImportError:
+        talib.stream = None
+
+    # Stream handles (ta-lib >= 0.8: open on history, then O(1) per bar) vs
+    # stream functions which calculate only the last value of the arrays
+    STREAM_HANDLES = isinstance(getattr(talib.stream, 'EMA', None), type)
+    InsufficientHistory = getattr(talib, 'InsufficientHistory', Exception)
+
+    def _unstable_period(name):
+        getup = getattr(talib, 'get_unstable_period', None)
+        if getup is None:
+            return 0
+
+        try:
+            return getup(name)
+        except Exception:
+            return 0
+
+    def _ndarray(line, size=None):
+        '''Returns a numpy array with the last ``size`` values of ``line`` (all
+        if ``size`` is ``None``). If the storage is an ``array.array`` of
+        doubles, a view is returned and no copy is made.
+
+        The view must not be kept alive, because the ``array.array`` cannot be
+        resized while a buffer is exported'''
+        larray = line.array
+        if isinstance(larray, array.array) and larray.typecode == 'd':
+            narray = np.frombuffer(larray, dtype=np.float64)
+            if size is None:
+                return narray
+
+            idx = line.idx
+            return narray[max(0, idx - size + 1):idx + 1]
+
+        if size is None:
+            return np.array(larray, dtype=np.float64)
+
+        return np.array(line.get(size=size), dtype=np.float64)
+
+    def _toarray(narray):
+        '''Converts the numpy output of ta-lib to an array.array of doubles
+        copying the memory (no iteration over the values in python)'''
+        narray = np.ascontiguousarray(narray, dtype=np.float64)
+        return array.array(str('d'), narray.tobytes())
+
     MA_Type = talib.MA_Type
 
     # Reverse TA_FUNC_FLAGS dict
@@ -78,15 +126,24 @@ else:
             _obj._tabstract.set_function_args(**_obj.p._getkwargs())
             _obj._lookback = lookback = _obj._tabstract.lookback + 1
             _obj.updateminperiod(lookback)
-            if _obj._unstable:
+            tafuncinfo = _obj._tabstract.info
+            taname = tafuncinfo['name']
+
+            if cls.__name__ in cls._KNOWN_UNSTABLE:
                 _obj._lookback = 0
 
-            elif cls.__name__ in cls._KNOWN_UNSTABLE:
+            elif _obj._unstable and not _unstable_period(taname):
+                # The full history is needed unless ta-lib has been told how
+                # many bars make the output stable (already in the lookback)
                 _obj._lookback = 0
 
-            cerebro = bt.metabase.findowner(_obj, bt.Cerebro)
-            tafuncinfo = _obj._tabstract.info
-            _obj._tafunc = getattr(talib, tafuncinfo['name'], None)
+            _obj._tafunc = getattr(talib, taname, None)
+
+            _obj._tastream = None
+            if talib.stream is not None:
+                _obj._tastream = getattr(talib.stream, taname, None)
+
+            _obj._stream = None
             return _obj, args, kwargs  # return the object and args
 
     class _TALibIndicator(with_metaclass(_MetaTALibIndicator, bt.Indicator)):
@@ -188,47 +245,96 @@ else:
             pass  # if not ... a call with a single value to once will happen
 
         def once(self, start, end):
-            import array
-
-            # prepare the data arrays - single shot
-            narrays = [np.array(x.lines[0].array) for x in self.datas]
+            # prepare the data arrays - single shot and (if possible) no copy
+            narrays = [_ndarray(x.lines[0]) for x in self.datas]
             # Execute
             output = self._tafunc(*narrays, **self.p._getkwargs())
 
             fsize = self.size()
             lsize = fsize - self._iscandle
             if lsize == 1:  # only 1 output, no tuple returned
-                self.lines[0].array = array.array(str('d'), output)
+                self.lines[0].array = _toarray(output)
 
                 if fsize > lsize:  # candle is present
                     candleref = narrays[self.CANDLEREF] * self.CANDLEOVER
                     output2 = candleref * (output / 100.0)
-                    self.lines[1].array = array.array(str('d'), output2)
+                    self.lines[1].array = _toarray(output2)
 
             else:
                 for i, o in enumerate(output):
-                    self.lines[i].array = array.array(str('d'), o)
+                    self.lines[i].array = _toarray(o)
 
         def next(self):
-            # prepare the data arrays - single shot
-            size = self._lookback or len(self)
-            narrays = [np.array(x.lines[0].get(size=size)) for x in self.datas]
+            out = None
+            if STREAM_HANDLES and self._tastream is not None:
+                out = self._next_stream()
 
-            out = self._tafunc(*narrays, **self.p._getkwargs())
+            if out is None:
+                out = self._next_window()
 
             fsize = self.size()
             lsize = fsize - self._iscandle
             if lsize == 1:  # only 1 output, no tuple returned
-                self.lines[0][0] = o = out[-1]
+                self.lines[0][0] = o = out
 
                 if fsize > lsize:  # candle is present
-                    candleref = narrays[self.CANDLEREF][-1] * self.CANDLEOVER
-                    o2 = candleref * (o / 100.0)
+                    candleref = self.datas[self.CANDLEREF].lines[0][0]
+                    o2 = candleref * self.CANDLEOVER * (o / 100.0)
                     self.lines[1][0] = o2
 
             else:
                 for i, o in enumerate(out):
-                    self.lines[i][0] = o[-1]
+                    self.lines[i][0] = o
+
+        def _next_window(self):
+            # prepare the data arrays - single shot
+            size = self._lookback or len(self)
+            narrays = [_ndarray(x.lines[0], size) for x in self.datas]
+
+            if self._lookback and not STREAM_HANDLES and \
+               self._tastream is not None:
+                # only the last value is calculated. The stream function
+                # starts at the lookback, hence not for the whole history
+                return self._tastream(*narrays, **self.p._getkwargs())
+
+            out = self._tafunc(*narrays, **self.p._getkwargs())
+            if self.size() - self._iscandle == 1:
+                return out[-1]
+
+            return [o[-1] for o in out]
+
+        def _next_stream(self):
+            '''Uses a ta-lib stream handle. The handle is kept at the last
+            closed bar, which is committed when a new bar is seen, and the
+            value for the current bar is peeked, allowing the current bar to be
+            seen several times (replay)'''
+            vals = [x.lines[0][0] for x in self.datas]
+            try:
+                if self._stream is None:
+                    # History up to the previous bar. Copied because the
+                    # handle may keep a reference to it
+                    size = len(self) - 1
+                    narrays = [np.array(x.lines[0].get(ago=-1, size=size))
+                               for x in self.datas]
+
+                    self._stream = self._tastream(*narrays,
+                                                  **self.p._getkwargs())
+                    self._slen = len(self)
+
+                elif len(self) > self._slen:
+                    self._stream.update(*self._pending)  # previous is closed
+                    self._slen = len(self)
+
+                self._pending = vals
+                return self._stream.peek(*vals)
+
+            except InsufficientHistory:
+                pass  # retry with more history on the next bar
+            except Exception:
+                self._tastream = None  # not finite values ... use windows
+
+            self._stream = None
+            return None
 
     # When importing the module do an automatic declaration of thed
     tafunctions = talib.get_functions()
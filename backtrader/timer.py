@@ -26,6 +26,7 @@ import bisect
 import collections
 from datetime import date, datetime, timedelta
 from itertools import islice
+import math
 
 from .feed import AbstractDataBase
 from .metabase import MetaParams
@@ -87,6 +88,9 @@ class Timer(with_metaclass(MetaParams, object)):
         self._curweek = -1  # non-existent week
         self._weekmask = collections.deque()
 
+        self._eosdts = None  # datetimes of tzdata for precomputed eos
+        self._firedts = None  # precomputed firing datetimes (see precompute)
+
     def _reset_when(self, ddate=datetime.min):
         self._when = self._rstwhen
         self._dtwhen = self._dwhen = None
@@ -147,7 +151,67 @@ class Timer(with_metaclass(MetaParams, object)):
 
         return daycarry or curday
 
+    def precompute(self, timeline):
+        '''
+        Precomputes the datetimes at which the timer fires over ``timeline``,
+        a sorted sequence with all the datetimes (floats) which will be
+        passed to ``check``. The datas have to be preloaded, because the end
+        of session is looked up in the datetimes of ``tzdata``
+
+        Only the bars at which the state of the timer may change (day change,
+        end of session, ``when`` reached) are evaluated. ``check`` is then
+        reduced to comparing ``dt`` with the next firing datetime
+        '''
+        if self._isdata:
+            tzdata = self._tzdata
+            self._eosdts = tzdata.lines.datetime.array[:tzdata.buflen()]
+
+        firedts, firewhens = [], []
+        i, n = 0, len(timeline)
+        while i < n:
+            dt = timeline[i]
+            if self.check(dt):
+                firedts.append(dt)
+                firewhens.append(self.lastwhen)
+
+            # Skip the bars which cannot change the state of the timer: before
+            # the next day, the end of session and "when". The limit is
+            # lowered a bit to cover the rounding of num2date
+            nextdts = [math.floor(dt) + 1.0, date2num(self._nexteos)]
+            if self._dtwhen is not None:
+                nextdts.append(self._dtwhen)
+
+            i = bisect.bisect_left(timeline, min(nextdts) - 1e-6, i + 1)
+
+        self._firedts, self._firewhens = firedts, firewhens
+        self._fireidx = 0
+
+    def _getnexteos(self, dt):
+        if self._eosdts is None:
+            return self._tzdata._getnexteos()
+
+        # precomputing: the current bar of tzdata is the last one up to dt
+        i = bisect.bisect_right(self._eosdts, dt)
+        if not i:
+            return datetime.min, 0.0
+
+        return self._tzdata._getnexteos(self._eosdts[i - 1])
+
     def check(self, dt):
+        if self._firedts is not None:  # precomputed
+            firedts = self._firedts
+            i, n = self._fireidx, len(firedts)
+            while i < n and firedts[i] < dt:
+                i += 1
+
+            self._fireidx = i
+            if i == n or firedts[i] != dt:
+                return False
+
+            self.lastwhen = self._firewhens[i]
+            self._fireidx = i + 1
+            return True
+
         d = num2date(dt)
         ddate = d.date()
         if self._lastcall == ddate:  # not repeating, awaiting date change
@@ -155,7 +219,7 @@ class Timer(with_metaclass(MetaParams, object)):
 
         if d > self._nexteos:
             if self._isdata:  # eos provided by data
-                nexteos, _ = self._tzdata._getnexteos()
+                nexteos, _ = self._getnexteos(dt)
             else:  # generic eos
                 nexteos = datetime.combine(ddate, TIME_MAX)
             self._nexteos = nexteos
@@ -198,7 +262,7 @@ class Timer(with_metaclass(MetaParams, object)):
         else:
             if d > self._nexteos:
                 if self._isdata:  # eos provided by data
-                    nexteos, _ = self._tzdata._getnexteos()
+                    nexteos, _ = self._getnexteos(dt)
                 else:  # generic eos
                     nexteos = datetime.combine(ddate, TIME_MAX)
 
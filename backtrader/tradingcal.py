@@ -21,7 +21,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-
+import bisect
 from datetime import datetime, timedelta, time
 
 from .metabase import MetaParams
@@ -44,7 +44,112 @@ ISOWEEKEND = [ISOSATURDAY, ISOSUNDAY]
 ONEDAY = timedelta(days=1)
 
 
+def _todate(day):
+    '''Returns the ``date`` part of a datetime/date instance'''
+    return day.date() if isinstance(day, datetime) else day
+
+
 class TradingCalendarBase(with_metaclass(MetaParams, object)):
+    '''
+    Base class for trading calendars. The trading days are kept in an index
+    of sorted lists (days, opening/closing times and last day of
+    week/month/year flags), which is built by subclasses with
+    ``_tradingdays`` and lazily extended in chunks of ``cachesize`` days.
+    Lookups are then binary searches on the index
+
+    Params:
+
+      - ``cachesize`` (default ``365``)
+
+        Number of days to index in advance each time the index has to be
+        extended
+
+    '''
+    params = (
+        ('cachesize', 365),  # Number of days to index in advance
+    )
+
+    _ifrom = _ito = None  # range of dates covered by the index
+
+    def _tradingdays(self, start, end):
+        '''
+        Returns an iterable of tuples (day, opening, closing) with the trading
+        days (``datetime.date``) in the range [``start``, ``end``] in
+        ascending order, together with the opening and closing times as
+        understood by ``_utcschedule``
+        '''
+        raise NotImplementedError
+
+    def _utcschedule(self, tz):
+        '''
+        Returns 2 lists with the opening and closing times (naive UTC
+        ``datetime`` instances) of the indexed trading days for the timezone
+        ``tz``
+        '''
+        raise NotImplementedError
+
+    def prepare(self, start, end):
+        '''
+        Makes sure the index covers the days from ``start`` to ``end``
+        (datetime/date instances) plus ``cachesize`` days in advance. It is
+        not needed to call it, because the index is extended on demand, but
+        it saves rebuilding it in chunks when the range is known in advance
+        '''
+        start, end = _todate(start), _todate(end)
+        if self._ifrom is None or start < self._ifrom or end > self._ito:
+            self._extend(start, end)
+
+    def _extend(self, start, end):
+        csize = timedelta(days=self.p.cachesize)
+        if self._ifrom is None:
+            start, end = min(start, end), end + csize
+        elif start < self._ifrom:  # rebuild from the new start
+            start, end = start, max(end, self._ito)
+        else:  # append to the current index
+            start, end = self._ito + ONEDAY, max(end, self._ito) + csize
+
+        days, opens, closes = [], [], []
+        for day, o, c in self._tradingdays(start, end):
+            days.append(day)
+            opens.append(o)
+            closes.append(c)
+
+        if self._ifrom is None or start < self._ifrom:
+            self._idays, self._iopens, self._icloses = days, opens, closes
+            self._ifrom = start
+        else:
+            self._idays.extend(days)
+            self._iopens.extend(opens)
+            self._icloses.extend(closes)
+
+        self._ito = end
+        self._iutc = dict()  # utc schedules have to be recalculated
+
+        # isocalendar of each day and flags marking the last day of a
+        # week/month/year (the last indexed day has no successor yet)
+        days = self._idays
+        self._iisocals = isocals = [d.isocalendar() for d in days]
+        self._ilastweek = [a[1] != b[1] for a, b in zip(isocals, isocals[1:])]
+        self._ilastmonth = [a.month != b.month for a, b in zip(days, days[1:])]
+        self._ilastyear = [a.year != b.year for a, b in zip(days, days[1:])]
+
+    def _index(self, d):
+        '''
+        Returns the position in the index of the first trading day after ``d``
+        (date instance), extending the index if needed
+        '''
+        while True:
+            if self._ifrom is None or d < self._ifrom:
+                self._extend(d, d)
+                continue
+
+            i = bisect.bisect_right(self._idays, d)
+            if i == len(self._idays):
+                self._extend(d, d)
+                continue
+
+            return i
+
     def _nextday(self, day):
         '''
         Returns the next trading day (datetime/date instance) after ``day``
@@ -52,14 +157,30 @@ class TradingCalendarBase(with_metaclass(MetaParams, object)):
 
         The return value is a tuple with 2 components: (nextday, (y, w, d))
         '''
-        raise NotImplementedError
+        d = _todate(day)
+        i = self._index(d)
+        return day + (self._idays[i] - d), self._iisocals[i]
 
-    def schedule(self, day):
+    def schedule(self, day, tz=None):
         '''
-        Returns a tuple with the opening and closing times (``datetime.time``)
-        for the given ``date`` (``datetime/date`` instance)
+        Returns the opening and closing times for the first trading session
+        of ``day`` or later whose closing time is not before ``day``
+
+        The return value is a tuple with 2 components: opentime, closetime
         '''
-        raise NotImplementedError
+        d = _todate(day)
+        while True:
+            lo = self._index(d - ONEDAY)  # 1st trading day >= d
+            try:
+                opens, closes = self._iutc[tz]
+            except KeyError:
+                self._iutc[tz] = opens, closes = self._utcschedule(tz)
+
+            i = bisect.bisect_left(closes, day, lo)
+            if i < len(closes):
+                return opens[i], closes[i]
+
+            self._extend(self._ito, self._ito)  # passed over the index end
 
     def nextday(self, day):
         '''
@@ -73,34 +194,50 @@ class TradingCalendarBase(with_metaclass(MetaParams, object)):
         Returns the iso week number of the next trading day, given a ``day``
         (datetime/date) instance
         '''
-        self._nextday(day)[1][1]  # 2 elem is isocal / 0 - y, 1 - wk, 2 - day
+        return self._nextday(day)[1][1]  # 2 elem is isocal / 0 - y, 1 - wk
+
+    def _lastday(self, day, flags):
+        d = _todate(day)
+        i = self._index(d)
+        if i and self._idays[i - 1] == d:  # trading day - flag is indexed
+            return getattr(self, flags)[i - 1]
+
+        return None
 
     def last_weekday(self, day):
         '''
         Returns ``True`` if the given ``day`` (datetime/date) instance is the
         last trading day of this week
         '''
-        # Next day must be greater than day. If the week changes is enough for
-        # a week change even if the number is smaller (year change)
-        return day.isocalendar()[1] != self._nextday(day)[1][1]
+        ret = self._lastday(day, '_ilastweek')
+        if ret is None:  # not a trading day, compare against the next one
+            # If the week changes is enough for a week change even if the
+            # number is smaller (year change)
+            ret = day.isocalendar()[1] != self._nextday(day)[1][1]
+
+        return ret
 
     def last_monthday(self, day):
         '''
         Returns ``True`` if the given ``day`` (datetime/date) instance is the
         last trading day of this month
         '''
-        # Next day must be greater than day. If the week changes is enough for
-        # a week change even if the number is smaller (year change)
-        return day.month != self._nextday(day)[0].month
+        ret = self._lastday(day, '_ilastmonth')
+        if ret is None:  # not a trading day, compare against the next one
+            ret = day.month != self._nextday(day)[0].month
+
+        return ret
 
     def last_yearday(self, day):
         '''
         Returns ``True`` if the given ``day`` (datetime/date) instance is the
-        last trading day of this month
+        last trading day of this year
         '''
-        # Next day must be greater than day. If the week changes is enough for
-        # a week change even if the number is smaller (year change)
-        return day.year != self._nextday(day)[0].year
+        ret = self._lastday(day, '_ilastyear')
+        if ret is None:  # not a trading day, compare against the next one
+            ret = day.year != self._nextday(day)[0].year
+
+        return ret
 
 
 class TradingCalendar(TradingCalendarBase):
@@ -134,6 +271,10 @@ class TradingCalendar(TradingCalendarBase):
         market doesn't trade. This is usually Saturday and Sunday and hence the
         default
 
+      - ``cachesize`` (default ``365``)
+
+        Number of days to index in advance for lookup
+
     '''
     params = (
         ('open', time.min),
@@ -144,54 +285,47 @@ class TradingCalendar(TradingCalendarBase):
     )
 
     def __init__(self):
-        self._earlydays = [x[0] for x in self.p.earlydays]  # speed up searches
+        # speed up searches
+        self._holidays = set(_todate(x) for x in self.p.holidays)
+        self._earlydays = dict((_todate(x[0]), x[1:])
+                               for x in self.p.earlydays)
 
-    def _nextday(self, day):
+    def _tradingdays(self, start, end):
         '''
-        Returns the next trading day (datetime/date instance) after ``day``
-        (datetime/date instance) and the isocalendar components
-
-        The return value is a tuple with 2 components: (nextday, (y, w, d))
+        Returns an iterable of tuples (day, opening, closing) with the trading
+        days in the range [``start``, ``end``] and the local opening and
+        closing times (``datetime.time``)
         '''
-        while True:
-            day += ONEDAY
-            isocal = day.isocalendar()
-            if isocal[2] in self.p.offdays or day in self.p.holidays:
-                continue
+        regular = self.p.open, self.p.close
+        day = start
+        while day <= end:
+            if (day.isoweekday() not in self.p.offdays and
+                    day not in self._holidays):
+                o, c = self._earlydays.get(day, regular)
+                yield day, o, c
 
-            return day, isocal
+            day += ONEDAY
 
-    def schedule(self, day, tz=None):
+    def _utcschedule(self, tz):
         '''
-        Returns the opening and closing times for the given ``day``. If the
-        method is called, the assumption is that ``day`` is an actual trading
-        day
-
-        The return value is a tuple with 2 components: opentime, closetime
+        Returns 2 lists with the opening and closing times (naive UTC
+        ``datetime`` instances) of the indexed trading days for the timezone
+        ``tz``
         '''
-        while True:
-            dt = day.date()
-            try:
-                i = self._earlydays.index(dt)
-                o, c = self.p.earlydays[i][1:]
-            except ValueError:  # not found
-                o, c = self.p.open, self.p.close
-
-            closing = datetime.combine(dt, c)
+        opens, closes = [], []
+        for day, o, c in zip(self._idays, self._iopens, self._icloses):
+            opening = datetime.combine(day, o)
+            closing = datetime.combine(day, c)
             if tz is not None:
+                opening = tz.localize(opening).astimezone(UTC)
+                opening = opening.replace(tzinfo=None)
                 closing = tz.localize(closing).astimezone(UTC)
                 closing = closing.replace(tzinfo=None)
 
-            if day > closing:  # current time over eos
-                day += ONEDAY
-                continue
+            opens.append(opening)
+            closes.append(closing)
 
-            opening = datetime.combine(dt, o)
-            if tz is not None:
-                opening = tz.localize(opening).astimezone(UTC)
-                opening = opening.replace(tzinfo=None)
-
-            return opening, closing
+        return opens, closes
 
 
 class PandasMarketCalendar(TradingCalendarBase):
@@ -233,48 +367,23 @@ class PandasMarketCalendar(TradingCalendarBase):
             import pandas_market_calendars as mcal
             self._calendar = mcal.get_calendar(self._calendar)
 
-        import pandas as pd  # guaranteed because of pandas_market_calendars
-        self.dcache = pd.DatetimeIndex([0.0])
-        self.idcache = pd.DataFrame(index=pd.DatetimeIndex([0.0]))
-        self.csize = timedelta(days=self.p.cachesize)
-
-    def _nextday(self, day):
+    def _tradingdays(self, start, end):
         '''
-        Returns the next trading day (datetime/date instance) after ``day``
-        (datetime/date instance) and the isocalendar components
-
-        The return value is a tuple with 2 components: (nextday, (y, w, d))
+        Returns an iterable of tuples (day, opening, closing) with the trading
+        days in the range [``start``, ``end``] and the opening and closing
+        times as naive UTC ``datetime`` instances
         '''
-        day += ONEDAY
-        while True:
-            i = self.dcache.searchsorted(day)
-            if i == len(self.dcache):
-                # keep a cache of 1 year to speed up searching
-                self.dcache = self._calendar.valid_days(day, day + self.csize)
-                continue
-
-            d = self.dcache[i].to_pydatetime()
-            return d, d.isocalendar()
-
-    def schedule(self, day, tz=None):
+        sched = self._calendar.schedule(start, end)
+        opens, closes = sched.iloc[:, 0], sched.iloc[:, 1]
+        for day, o, c in zip(sched.index, opens, closes):
+            # Get utc naive times
+            yield (day.date(), o.tz_localize(None).to_pydatetime(),
+                   c.tz_localize(None).to_pydatetime())
+
+    def _utcschedule(self, tz):
         '''
-        Returns the opening and closing times for the given ``day``. If the
-        method is called, the assumption is that ``day`` is an actual trading
-        day
-
-        The return value is a tuple with 2 components: opentime, closetime
+        Returns 2 lists with the opening and closing times (naive UTC
+        ``datetime`` instances) of the indexed trading days. The calendar
+        already delivers them in UTC and ``tz`` is not needed
         '''
-        while True:
-            i = self.idcache.index.searchsorted(day.date())
-            if i == len(self.idcache):
-                # keep a cache of 1 year to speed up searching
-                self.idcache = self._calendar.schedule(day, day + self.csize)
-                continue
-
-            st = (x.tz_localize(None) for x in self.idcache.iloc[i, 0:2])
-            opening, closing = st  # Get utc naive times
-            if day > closing:  # passed time is over the sessionend
-                day += ONEDAY  # wrap over to next day
-                continue
-
-            return opening.to_pydatetime(), closing.to_pydatetime()
+        return self._iopens, self._icloses
@@ -23,7 +23,9 @@ from __future__ import (absolute_import, division, print_function,
 
 
 from .dateintern import (num2date, num2dt, date2num, time2num, num2time,
-                         UTC, TZLocal, Localizer, tzparse, TIME_MAX, TIME_MIN)
+                         num2datetime64, datetime642num, UTC, TZLocal,
+                         Localizer, tzparse, TIME_MAX, TIME_MIN)
 
 __all__ = ('num2date', 'num2dt', 'date2num', 'time2num', 'num2time',
-           'UTC', 'TZLocal', 'Localizer', 'tzparse', 'TIME_MAX', 'TIME_MIN')
+           'num2datetime64', 'datetime642num', 'UTC', 'TZLocal', 'Localizer',
+           'tzparse', 'TIME_MAX', 'TIME_MIN')
@@ -21,6 +21,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import bisect
 import datetime
 import math
 import time as _time
@@ -144,6 +145,7 @@ MUSECONDS_PER_SECOND = 1e6
 MINUTES_PER_DAY = MINUTES_PER_HOUR * HOURS_PER_DAY
 SECONDS_PER_DAY = SECONDS_PER_MINUTE * MINUTES_PER_DAY
 MUSECONDS_PER_DAY = MUSECONDS_PER_SECOND * SECONDS_PER_DAY
+EPOCH_ORDINAL = float(datetime.date(1970, 1, 1).toordinal())
 
 
 def num2date(x, tz=None, naive=True):
@@ -199,6 +201,194 @@ def num2time(num, tz=None, naive=True):
     return num2date(num, tz=tz, naive=naive).time()
 
 
+# Cache of utc offset transition tables: (tz, year) -> (starts, offsets)
+_TZTRANSITIONS = dict()
+
+# Sampling interval to look for utc offset changes (bisected afterwards)
+_TZSAMPLE = datetime.timedelta(hours=6)
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _utcoffset(tz, dt):
+    # utc offset in force in tz at the naive UTC datetime dt
+    return dt.replace(tzinfo=UTC).astimezone(tz).utcoffset()
+
+
+def _td2us(td):
+    return (td.days * 86400 + td.seconds) * 1000000 + td.microseconds
+
+
+def tztransitions(tz, year):
+    '''Returns the utc offset transitions of ``tz`` during ``year`` as two
+    lists: the start of each period (UTC microseconds since the epoch) and
+    the utc offset in force (microseconds).
+
+    The tables are calculated once and cached
+    '''
+    try:
+        return _TZTRANSITIONS[(tz, year)]
+    except KeyError:
+        pass
+
+    dt = datetime.datetime(year, 1, 1)
+    dtend = datetime.datetime(year + 1, 1, 1)
+    offset = _utcoffset(tz, dt)
+    starts, offsets = [_td2us(dt - _EPOCH)], [_td2us(offset)]
+    while dt < dtend:
+        dtnext = min(dt + _TZSAMPLE, dtend)
+        nextoffset = _utcoffset(tz, dtnext)
+        if nextoffset != offset:
+            # the offset changes in (lo, hi], look for it with second accuracy
+            lo, hi = dt, dtnext
+            while hi - lo > datetime.timedelta(seconds=1):
+                mid = lo + (hi - lo) // 2
+                if _utcoffset(tz, mid) == offset:
+                    lo = mid
+                else:
+                    hi = mid
+
+            starts.append(_td2us(hi - _EPOCH))
+            offsets.append(_td2us(nextoffset))
+            offset = nextoffset
+
+        dt = dtnext
+
+    _TZTRANSITIONS[(tz, year)] = table = (starts, offsets)
+    return table
+
+
+class TZTable(object):
+    '''Answers utc offset queries for ``tz`` with a binary search over its
+    (cached) transition tables, instead of converting each datetime with the
+    timezone object.
+
+    The table covers a window of years around the last query and is
+    rebuilt when a query falls outside of it. Ambiguous local times are
+    resolved like ``pytz`` does with ``is_dst=False``
+    '''
+    def __init__(self, tz):
+        self.tz = tz
+        self._nums = [float('inf')]  # utc starts (float) - empty window
+        self._locals = [datetime.datetime.max]  # local starts (naive)
+        self._offsets = [ZERO]
+
+    def _build(self, year):
+        year = min(max(year, datetime.MINYEAR + 1), datetime.MAXYEAR - 2)
+        nums, dtlocals, offsets = list(), list(), list()
+        for y in range(year - 1, year + 2):
+            starts, yoffsets = tztransitions(self.tz, y)
+            for start, offset in zip(starts, yoffsets):
+                utcdt = _EPOCH + datetime.timedelta(microseconds=start)
+                offset = datetime.timedelta(microseconds=offset)
+                nums.append(date2num(utcdt))
+                dtlocals.append(utcdt + offset)
+                offsets.append(offset)
+
+        # the last start is the limit of the window
+        nums.append(date2num(datetime.datetime(year + 2, 1, 1)))
+        dtlocals.append(datetime.datetime(year + 2, 1, 1) + offsets[-1])
+        offsets.append(offsets[-1])
+
+        self._nums, self._locals, self._offsets = nums, dtlocals, offsets
+
+    def utcoffset(self, num):
+        '''Returns the utc offset in force at the utc float datetime num'''
+        nums = self._nums
+        if not nums[0] <= num < nums[-1]:
+            self._build(num2date(num).year)
+            nums = self._nums
+
+        return self._offsets[bisect.bisect_right(nums, num) - 1]
+
+    def localoffset(self, dt):
+        '''Returns the utc offset in force at the naive local datetime dt'''
+        dtlocals = self._locals
+        if not dtlocals[0] <= dt < dtlocals[-1]:
+            self._build(dt.year)
+            dtlocals = self._locals
+
+        return self._offsets[bisect.bisect_right(dtlocals, dt) - 1]
+
+    def num2date(self, num):
+        '''Returns the naive local datetime for the utc float datetime'''
+        return num2date(num) + self.utcoffset(num)
+
+    def date2num(self, dt):
+        '''Returns the utc float datetime for the naive local datetime'''
+        return date2num(dt - self.localoffset(dt))
+
+
+def _tzoffsets(tz, us, local=False):
+    # Returns the utc offsets (microseconds) in force at the UTC (or local if
+    # local is True) times us (int64 microseconds) using the transition tables
+    import numpy as np  # keep the import local, numpy is optional
+
+    offsets = np.zeros(len(us), dtype=np.int64)
+    if not len(us):
+        return offsets
+
+    years = us.view('datetime64[us]').astype('datetime64[Y]').astype(np.int64)
+    y0 = max(int(years.min()) + 1970 - 1, datetime.MINYEAR)
+    y1 = min(int(years.max()) + 1970 + 1, datetime.MAXYEAR - 1)
+    starts, tzoffs = list(), list()
+    for year in range(y0, y1 + 1):
+        ystarts, yoffsets = tztransitions(tz, year)
+        starts.extend(ystarts)
+        tzoffs.extend(yoffsets)
+
+    starts = np.array(starts, dtype=np.int64)
+    tzoffs = np.array(tzoffs, dtype=np.int64)
+    if local:
+        # in overlaps the later (standard time) period is chosen and in gaps
+        # the earlier, which is what pytz does with is_dst=False
+        starts += tzoffs
+
+    idx = np.searchsorted(starts, us, side='right') - 1
+    return tzoffs[np.maximum(idx, 0)]
+
+
+def num2datetime64(x, tz=None):
+    '''Vectorized version of ``num2date``: converts a sequence of float
+    datetimes to a ``numpy`` array of ``datetime64[us]`` values with the same
+    rounding compensations. ``NaN`` values are converted to ``NaT``
+
+    The values are in UTC or in local (naive) time if ``tz`` is given, using
+    cached tables of utc offset transitions
+    '''
+    import numpy as np  # keep the import local, numpy is optional
+
+    x = np.asarray(x, dtype=np.float64)
+    nans = np.isnan(x)
+    x = np.where(nans, EPOCH_ORDINAL, x)
+    days = np.floor(x)
+    remainder = x - days
+    hour, remainder = np.divmod(HOURS_PER_DAY * remainder, 1)
+    minute, remainder = np.divmod(MINUTES_PER_HOUR * remainder, 1)
+    second, remainder = np.divmod(SECONDS_PER_MINUTE * remainder, 1)
+    microsecond = (MUSECONDS_PER_SECOND * remainder).astype(np.int64)
+    microsecond[microsecond < 10] = 0  # compensate for rounding errors
+    # compensate for rounding errors by going to the next second
+    rounded = microsecond > 999990
+    microsecond[rounded] = MUSECONDS_PER_SECOND
+
+    seconds = (days - EPOCH_ORDINAL) * SECONDS_PER_DAY
+    seconds += hour * 3600.0 + minute * 60.0 + second
+    us = seconds.astype(np.int64) * 1000000 + microsecond
+    if tz is not None:
+        us[~nans] += _tzoffsets(tz, us[~nans])
+
+    us[nans] = np.iinfo(np.int64).min  # NaT
+    return us.view('datetime64[us]')
+
+
+def _twosum(a, b):
+    # error free sum of a and b: a + b == s + e exactly
+    s = a + b
+    bb = s - a
+    return s, (a - (s - bb)) + (b - bb)
+
+
 def date2num(dt, tz=None):
     """
     Convert :mod:`datetime` to the Gregorian date as UTC float days,
@@ -227,6 +417,40 @@ def date2num(dt, tz=None):
     return base
 
 
+def datetime642num(x, tz=None):
+    '''Vectorized version of ``date2num``: converts a sequence of numpy
+    ``datetime64`` values (or anything numpy converts to them) to a numpy
+    array of float datetimes, equal to those of ``date2num``. ``NaT`` values
+    are converted to ``NaN``
+
+    The values are taken as UTC, or as local (naive) times in ``tz`` if
+    given, using cached tables of utc offset transitions
+    '''
+    import numpy as np  # keep the import local, numpy is optional
+
+    us = np.asarray(x).astype('datetime64[us]').view(np.int64)
+    nats = us == np.iinfo(np.int64).min
+    us = np.where(nats, 0, us)
+    if tz is not None:
+        us[~nats] -= _tzoffsets(tz, us[~nats], local=True)
+
+    days, usday = np.divmod(us, 86400000000)
+    hour, usday = np.divmod(usday, 3600000000)
+    minute, usday = np.divmod(usday, 60000000)
+    second, microsecond = np.divmod(usday, 1000000)
+
+    # same terms as date2num, summed with compensation to equal math.fsum
+    hi, lo = _twosum(hour / HOURS_PER_DAY, minute / MINUTES_PER_DAY)
+    for term in (second / SECONDS_PER_DAY, microsecond / MUSECONDS_PER_DAY):
+        hi, err = _twosum(hi, term)
+        lo += err
+
+    num, err = _twosum(days + EPOCH_ORDINAL, hi)
+    num += err + lo
+    num[nats] = np.nan
+    return num
+
+
 def time2num(tm):
     """
     Converts the hour/minute/second/microsecond part of tm (datetime.datetime
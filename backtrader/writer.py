@@ -21,18 +21,34 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
 import collections
+import datetime
 import io
 import itertools
+import json
+import struct
 import sys
+import threading
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
 
 try:  # For new Python versions
     collectionsAbc = collections.abc  # collections.Iterable -> collections.abc.Iterable
 except AttributeError:  # For old Python versions
     collectionsAbc = collections  # Используем collections.Iterable
 
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
 import backtrader as bt
-from backtrader.utils.py3 import (map, with_metaclass, string_types,
+from backtrader.utils.py3 import (map, zip, with_metaclass, string_types,
                                   integer_types)
 
 
@@ -232,3 +248,387 @@ class WriterStringIO(WriterFile):
         super(WriterStringIO, self).stop()
         # Leave the file positioned at the beginning
         self.out.seek(0)
+
+
+class WriterBuffered(WriterFile):
+    '''Writer which keeps the values of the csv stream in memory and hands
+    them over in batches to a background thread, which formats and writes
+    them out. The main loop only has to append the row of values of each bar.
+
+    It accepts the same parameters as ``WriterFile`` and additionally:
+
+      - ``csv_format`` (default: ``'csv'``)
+
+        - ``'csv'``: the rows are written to ``out`` as ``WriterFile`` does
+
+        - ``'binary'``: the rows are written in columns to ``csv_out`` using
+          the format read by ``readcolumnar``
+
+        - ``'parquet'``: the rows are written to ``csv_out`` as a Parquet
+          file. It needs ``pyarrow``
+
+        With the last two formats, ``out`` only receives the text sections
+        (separators and the final summary)
+
+      - ``csv_out`` (default: ``None``): file name or binary stream for the
+        ``binary`` and ``parquet`` formats
+
+      - ``batchsize`` (default: ``10000``): number of rows collected before
+        they are handed over to the background thread
+
+      - ``queuesize`` (default: ``4``): maximum number of batches waiting to
+        be written. The main loop blocks if the background thread falls
+        behind, to avoid accumulating all the output in memory
+
+      - ``background`` (default: ``True``): use a background thread. If
+        ``False`` the batches are written out in the main thread
+
+    The ``csv_filternan`` parameter is only observed for the ``csv`` format.
+    The other formats keep ``nan`` values
+    '''
+    params = (
+        ('csv_format', 'csv'),
+        ('csv_out', None),
+        ('batchsize', 10000),
+        ('queuesize', 4),
+        ('background', True),
+    )
+
+    FORMATS = ('csv', 'binary', 'parquet')
+
+    def __init__(self):
+        super(WriterBuffered, self).__init__()
+        if self.p.csv_format not in self.FORMATS:
+            raise ValueError('csv_format must be one of %s' %
+                             (', '.join(self.FORMATS),))
+
+        if self.p.csv_format == 'parquet' and pyarrow is None:
+            raise ImportError('pyarrow is needed for the parquet format')
+
+        self.rows = list()
+        self._rowcount = 0
+        self._thread = None
+        self._error = None
+        self._colout = None
+
+    def start(self):
+        self._start_output()
+
+        if self.p.background:
+            self._queue = queue.Queue(maxsize=max(1, self.p.queuesize))
+            self._thread = threading.Thread(target=self._t_write)
+            self._thread.daemon = True
+            self._thread.start()
+
+        if self.p.csv:
+            self.writelineseparator()
+            if self.p.csv_format == 'csv':
+                self.writeiterable(self.headers, counter='Id')
+            else:
+                self._emit(self._colstart, self._colnames())
+
+    def stop(self):
+        self._flush()
+        self._emit(self._colstop)
+
+        if self._thread is not None:
+            self._queue.put(None)  # sentinel to end the thread
+            self._thread.join()
+            self._thread = None
+
+        super(WriterBuffered, self).stop()
+
+        if self._error is not None:
+            raise self._error
+
+    def next(self):
+        if self.p.csv:
+            self.rows.append(self.values)
+            self.values = list()
+            if len(self.rows) >= self.p.batchsize:
+                self._flush()
+
+    def addvalues(self, values):
+        if self.p.csv:
+            self.values.extend(values)  # nan filtering done when formatting
+
+    def writeline(self, line):
+        self._flush()  # keep the order of the output
+        self._emit(self._write, line + '\n')
+
+    def writelines(self, lines):
+        self.writeline('\n'.join(lines))
+
+    def _flush(self):
+        if self.rows:
+            self._emit(self._writerows, self.rows, self._rowcount)
+            self._rowcount += len(self.rows)
+            self.rows = list()
+
+    def _emit(self, func, *args):
+        if self._thread is not None:
+            self._queue.put((func, args))  # blocks if the queue is full
+        elif self._error is None:
+            func(*args)
+
+    def _t_write(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            if self._error is not None:
+                continue  # keep draining to unblock the main loop
+
+            func, args = item
+            try:
+                func(*args)
+            except Exception as e:
+                self._error = e
+
+    def _write(self, text):
+        self.out.write(text)
+
+    def _writerows(self, rows, rowcount):
+        if self.p.csv_format != 'csv':
+            self._colout.write(self._columns(rows, rowcount))
+            return
+
+        if self.p.csv_filternan:
+            rows = ([x if x == x else '' for x in row] for row in rows)
+
+        sep = self.p.csvsep
+        lines = (sep.join(map(str, row)) for row in rows)
+        if self.p.csv_counter:
+            counter = itertools.count(rowcount + 1)
+            lines = (str(next(counter)) + sep + line for line in lines)
+
+        self.out.write('\n'.join(lines) + '\n')
+
+    def _colnames(self):
+        names = list()
+        if self.p.csv_counter:
+            names.append('Id')
+
+        # column names have to be unique in the columnar formats
+        seen = collections.Counter()
+        for header in self.headers:
+            name = header
+            while name in seen:
+                name = '%s_%d' % (header, seen[header])
+                seen[header] += 1
+            seen[name] += 1
+            names.append(name)
+
+        return names
+
+    def _columns(self, rows, rowcount):
+        # Transposes the rows into (name, typecode, values) with typed values
+        columns = list()
+        if self.p.csv_counter:
+            counter = range(rowcount + 1, rowcount + len(rows) + 1)
+            columns.append(array.array(str('q'), counter))
+
+        columns.extend(_typedcolumn(col) for col in zip(*rows))
+        return columns
+
+    def _colstart(self, names):
+        if self.p.csv_format == 'binary':
+            self._colout = _BinaryColumnsOut(self.p.csv_out, names)
+        else:
+            self._colout = _ParquetColumnsOut(self.p.csv_out, names)
+
+    def _colstop(self):
+        if self._colout is not None:
+            self._colout.close()
+            self._colout = None
+
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_USECS = datetime.timedelta(microseconds=1)
+
+
+def _typedcolumn(values):
+    '''Returns the values as an array of integers ("q"), floats ("d"),
+    integer microseconds since the epoch ("T" in a subclass of ``list``) or
+    strings (a ``list``)'''
+    if all(isinstance(v, datetime.datetime) for v in values):
+        return _DateTimes((v - _EPOCH) // _USECS for v in values)
+
+    if not any(isinstance(v, string_types) and v for v in values):
+        # numeric column, but for "" placeholders for lines with no length
+        nums = [v for v in values if not isinstance(v, string_types)]
+        if all(isinstance(v, integer_types) for v in nums) and \
+                len(nums) == len(values):
+            return array.array(str('q'), values)
+
+        try:
+            return array.array(
+                str('d'),
+                (float('NaN') if v == '' else v for v in values))
+        except TypeError:
+            pass  # something unknown in the values
+
+    return [str(v) for v in values]
+
+
+class _DateTimes(list):
+    pass
+
+
+def _coltype(column):
+    if isinstance(column, array.array):
+        return column.typecode
+    if isinstance(column, _DateTimes):
+        return 'T'
+    return 's'
+
+
+class _ColumnsOut(object):
+    def __init__(self, out, names):
+        self.names = names
+        if isinstance(out, string_types):
+            self.out = open(out, 'wb')
+            self.close_out = True
+        else:
+            self.out = out
+            self.close_out = False
+
+    def close(self):
+        if self.close_out:
+            self.out.close()
+
+
+class _BinaryColumnsOut(_ColumnsOut):
+    '''Writes a header with the column names, followed by blocks of rows.
+    Each block: number of rows and for each column a typecode and the
+    values. See ``readcolumnar``'''
+    def __init__(self, out, names):
+        super(_BinaryColumnsOut, self).__init__(out, names)
+        self.out.write(_BINMAGIC)
+        _writeblob(self.out, json.dumps(names).encode('utf-8'))
+
+    def write(self, columns):
+        self.out.write(struct.pack('<I', len(columns[0])))
+        for column in columns:
+            ctype = _coltype(column)
+            self.out.write(ctype.encode('ascii'))
+            if ctype == 'T':
+                column = array.array(str('q'), column)
+            elif ctype == 's':
+                _writeblob(self.out, json.dumps(column).encode('utf-8'))
+                continue
+
+            if sys.byteorder != 'little':
+                column = array.array(column.typecode, column)
+                column.byteswap()
+
+            self.out.write(column.tobytes())
+
+
+class _ParquetColumnsOut(_ColumnsOut):
+    ARROWTYPES = dict(q='int64', d='float64', s='string')
+
+    def __init__(self, out, names):
+        super(_ParquetColumnsOut, self).__init__(out, names)
+        self.writer = None
+
+    def write(self, columns):
+        if self.writer is None:  # schema taken from the 1st batch
+            fields = list()
+            for name, column in zip(self.names, columns):
+                ctype = _coltype(column)
+                if ctype == 'T':
+                    atype = pyarrow.timestamp('us')
+                else:
+                    atype = getattr(pyarrow, self.ARROWTYPES[ctype])()
+                fields.append(pyarrow.field(name, atype))
+
+            self.schema = pyarrow.schema(fields)
+            self.writer = pyarrow.parquet.ParquetWriter(self.out, self.schema)
+
+        arrays = list()
+        for field, column in zip(self.schema, columns):
+            arrays.append(pyarrow.array(_arrowvalues(column, field.type),
+                                        type=field.type))
+
+        self.writer.write_table(
+            pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        super(_ParquetColumnsOut, self).close()
+
+
+def _arrowvalues(column, atype):
+    # values of later batches may not match the type of the 1st batch
+    if pyarrow.types.is_timestamp(atype):
+        if isinstance(column, _DateTimes):
+            return [_EPOCH + v * _USECS for v in column]
+        return [None] * len(column)
+
+    if pyarrow.types.is_string(atype):
+        return [str(v) for v in column]
+
+    if isinstance(column, array.array):
+        if pyarrow.types.is_integer(atype) and column.typecode != 'q':
+            return [None if v != v else int(v) for v in column]
+        return column
+
+    return [None] * len(column)
+
+
+_BINMAGIC = b'BTCOLS\x01\n'
+
+
+def _writeblob(out, blob):
+    out.write(struct.pack('<I', len(blob)))
+    out.write(blob)
+
+
+def _readblob(fin):
+    size, = struct.unpack('<I', fin.read(4))
+    return fin.read(size)
+
+
+def readcolumnar(fin):
+    '''Reads the output of ``WriterBuffered`` with ``csv_format='binary'``
+
+    ``fin`` can be a file name or a binary stream. Returns a ``OrderedDict``
+    with the column names as keys and lists of values. Integer microseconds
+    are converted back to ``datetime.datetime`` instances
+    '''
+    if isinstance(fin, string_types):
+        with open(fin, 'rb') as f:
+            return readcolumnar(f)
+
+    if fin.read(len(_BINMAGIC)) != _BINMAGIC:
+        raise ValueError('Not a binary columnar writer file')
+
+    names = json.loads(_readblob(fin).decode('utf-8'))
+    columns = collections.OrderedDict((name, list()) for name in names)
+
+    while True:
+        head = fin.read(4)
+        if not head:
+            break
+
+        nrows, = struct.unpack('<I', head)
+        for column in columns.values():
+            ctype = fin.read(1).decode('ascii')
+            if ctype == 's':
+                column.extend(json.loads(_readblob(fin).decode('utf-8')))
+                continue
+
+            values = array.array(str('q' if ctype == 'T' else ctype))
+            values.frombytes(fin.read(nrows * values.itemsize))
+            if sys.byteorder != 'little':
+                values.byteswap()
+
+            if ctype == 'T':
+                column.extend(_EPOCH + v * _USECS for v in values)
+            else:
+                column.extend(values)
+
+    return columns
@@ -25,6 +25,11 @@ import argparse
 import datetime
 import time
 
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
 from backtrader.utils.py3 import range
 
 import backtrader as bt
@@ -56,7 +61,8 @@ def runstrat():
                          runonce=not args.no_runonce,
                          exactbars=args.exactbars,
                          optdatas=not args.no_optdatas,
-                         optreturn=not args.no_optreturn)
+                         optreturn=not args.no_optreturn,
+                         statsonly=False if args.no_statsonly else None)
 
     # Add a strategy
     cerebro.optstrategy(
@@ -81,13 +87,13 @@ def runstrat():
     cerebro.adddata(data)
 
     # clock the start of the process
-    tstart = time.clock()
+    tstart = time.time()
 
     # Run over everything
     stratruns = cerebro.run()
 
     # clock the end of the process
-    tend = time.clock()
+    tend = time.time()
 
     print('==================================================')
     for stratrun in stratruns:
@@ -99,6 +105,11 @@ def runstrat():
 
     # print out the result
     print('Time used:', str(tend - tstart))
+    if resource is not None:
+        # ru_maxrss is in kilobytes (linux) ... children are the workers
+        for who in ['RUSAGE_SELF', 'RUSAGE_CHILDREN']:
+            rusage = resource.getrusage(getattr(resource, who))
+            print('Max memory ({}): {} kB'.format(who, rusage.ru_maxrss))
 
 
 def parse_args():
@@ -149,6 +160,11 @@ def parse_args():
         '--no-optreturn', action='store_true', required=False,
         help='Do not optimize the returned values to save time')
 
+    parser.add_argument(
+        '--no-statsonly', action='store_true', required=False,
+        help=('Keep plotting-only observers and full length observer lines\n'
+              'even if the results will not be plotted'))
+
     parser.add_argument(
         '--ma_low', type=int,
         default=10, required=False,
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+
+NAMES = ['d0', 'd1', 'd2']
+
+
+class BaselineTransactions(bt.analyzers.Transactions):
+    '''Records the entries by scanning all the datas in their order'''
+    def next(self):
+        entries = []
+        for i, dname in enumerate(self.strategy.getdatanames()):
+            pos = self._positions.get(dname, None)
+            if pos is not None:
+                size, price = pos.size, pos.price
+                if size:
+                    entries.append([size, price, i, dname, -size * price])
+
+        if entries:
+            self.rets[self.strategy.datetime.datetime()] = entries
+
+        self._positions.clear()
+
+
+class TestStrategy(bt.Strategy):
+    def next(self):
+        d0, d1, d2 = self.datas
+        # orders are issued (and executed) in an order different to that of
+        # the datas and several of them go to the same data in the same bar
+        if len(self) == 10:
+            self.sell(data=d2, size=3)
+            self.buy(data=d0, size=1)
+            self.buy(data=d0, size=2)
+            self.buy(data=d1, size=5)
+        elif len(self) == 20:
+            self.close(data=d1)
+            self.buy(data=d2, size=3)
+            self.sell(data=d0, size=1)
+        elif len(self) == 30:
+            self.buy(data=d0, size=4)
+            self.sell(data=d0, size=4)  # nets out: no entry for d0
+
+
+def runstrat(**kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    for name in NAMES:
+        cerebro.adddata(testcommon.getdata(0), name=name)
+
+    cerebro.broker.setcash(1000000.0)
+    cerebro.addstrategy(TestStrategy)
+    cerebro.addanalyzer(bt.analyzers.Transactions, _name='trans',
+                        headers=True)
+    cerebro.addanalyzer(BaselineTransactions, _name='base', headers=True)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        strat = runstrat(runonce=runonce)
+        trans = strat.analyzers.trans.get_analysis()
+        base = strat.analyzers.base.get_analysis()
+        if main:
+            for dt, entries in trans.items():
+                print(dt, entries)
+
+        assert list(trans.items()) == list(base.items())
+
+        records = list(trans.values())
+        assert records[0] == [['amount', 'price', 'sid', 'symbol', 'value']]
+        assert len(records) == 3
+        sids = [[entry[2:4] for entry in entries] for entries in records[1:]]
+        assert sids == [[[0, 'd0'], [1, 'd1'], [2, 'd2']],
+                        [[0, 'd0'], [1, 'd1'], [2, 'd2']]]
+
+        amounts = [[entry[0] for entry in entries] for entries in records[1:]]
+        assert amounts == [[3, 5, -3], [-1, -5, 3]]
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os
+import shutil
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+
+
+class RecordStrategy(bt.Strategy):
+    params = (('cache', None),)
+
+    def start(self):
+        self.bars = list()
+
+    def next(self):
+        self.bars.append((self.data.datetime[0], self.data.close[0]))
+        if self.p.cache is not None:
+            self.p.cache.record(self.data)
+
+
+def runcerebro(data, cache=None):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(data)
+    cerebro.addstrategy(RecordStrategy, cache=cache)
+    return cerebro.run()[0].bars
+
+
+def test_run(main=False):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        def getcache():
+            return bt.feeds.BarCache(tmpdir, 'TEST', bt.TimeFrame.Days, 1)
+
+        # First session up to mid year. The last recorded bar is never
+        # cached because it could still be incomplete
+        cache = getcache()
+        half = runcerebro(
+            testcommon.getdata(0, todate=datetime.datetime(
+                2006, 6, 30)),
+            cache=cache)
+        cache.close()
+        assert getcache().last() == half[-2][0]
+
+        # Second session over the full year only appends the newer bars
+        cache = getcache()
+        full = runcerebro(testcommon.getdata(0), cache=cache)
+        cache.close()
+
+        # Interrupted write: incomplete record is ignored and dropped
+        with open(cache.fname, 'ab') as f:
+            f.write(b'\x00' * 12)
+
+        cached = runcerebro(bt.feeds.BarCacheData(dataname=getcache()))
+        cache = getcache()
+        assert cache.last() == full[-2][0]
+        assert not cache.append((full[10][0],) + (0.0,) * 6)
+        cache.close()
+
+        if main:
+            print(len(half), len(full), len(cached))
+            print(cached[-1])
+        else:
+            assert cached == full[:-1]
+            expected = bt.feeds.BarCache.filename('TEST', bt.TimeFrame.Days, 1)
+            assert os.listdir(tmpdir) == [expected]
+            assert os.path.getsize(cache.fname) == 8 + 56 * len(cached)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+from backtrader.linebuffer import LineBuffer
+
+LOOKBACK = 40
+
+
+class FailStrategy(bt.Strategy):
+    failed = []
+
+    def next(self):
+        self.failed.append(self)
+        raise ValueError('failed during the warm-up')
+
+
+class OtherStrategy(bt.Strategy):
+    '''Reads a buffer which is not part of the run during the warm-up'''
+    def __init__(self):
+        self.other = LineBuffer()
+        for i in range(10):
+            self.other.forward(value=float(i))
+        self.checked = False
+
+    def next(self):
+        if len(self) >= LOOKBACK:  # warm-up over
+            return
+
+        # only the lines of the run record look-backs
+        assert type(self.data.close) is not LineBuffer
+        assert type(self.other) is LineBuffer
+        assert self.other[-5] == 4.0
+        assert self.other._lookback == 0
+        self.checked = True
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = btind.SMA(period=15)
+        self.vals = []
+
+    def next(self):
+        # look back further than any minimum period in the system
+        if len(self) > LOOKBACK:
+            self.vals.append((self.data.close[-LOOKBACK], self.sma[-5],
+                              tuple(self.data.close.get(ago=-2, size=3))))
+
+
+def runstrat(**kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(TestStrategy)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    full = runstrat()
+    for warmup in [LOOKBACK + 10, 10000]:  # 10000: longer than the data
+        strat = runstrat(exactbars=1, bufferwarmup=warmup)
+        assert strat.vals == full.vals
+
+        report = dict((name, (lookback, values))
+                      for name, lookback, values in strat.getbufferreport())
+        if main:
+            print(warmup, report)
+
+        assert report['2006-day-001'][0] == LOOKBACK
+        assert report['SMA'][0] == 5
+
+    # a failed run restores the regular (non recording) accessors
+    cerebro = bt.Cerebro(exactbars=1, bufferwarmup=LOOKBACK)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(FailStrategy)
+    try:
+        cerebro.run()
+    except ValueError:
+        pass
+    else:
+        assert False
+
+    strat = FailStrategy.failed[0]
+    for data in strat.datas:
+        assert all(type(line) is LineBuffer for line in data.lines)
+
+    # buffers outside of the run are not recording
+    cerebro = bt.Cerebro(exactbars=1, bufferwarmup=LOOKBACK)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(OtherStrategy)
+    strat = cerebro.run()[0]
+    assert strat.checked
+    assert type(strat.data.close) is LineBuffer
+
+    # without warm-up only the minimum period is kept
+    try:
+        runstrat(exactbars=1)
+    except IndexError:
+        pass
+    else:
+        assert False
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class RunStrategy(bt.Strategy):
+    params = (('period', 15),)
+
+    def __init__(self):
+        self.cross = btind.CrossOver(self.data.close,
+                                     btind.SMA(period=self.p.period))
+
+    def next(self):
+        if not self.position and self.cross > 0.0:
+            self.buy()
+        elif self.position and self.cross < 0.0:
+            self.close()
+
+    def stop(self):
+        self.obsnames = sorted(type(o).__name__ for o in self.getobservers())
+        self.obslens = [len(o.lines[0].array) for o in self.getobservers()]
+        self.endvalue = self.broker.getvalue()
+
+
+def runcerebro(statsonly, runonce, optimize=False):
+    cerebro = bt.Cerebro(runonce=runonce, statsonly=statsonly,
+                         optreturn=False, maxcpus=1)
+    cerebro.adddata(testcommon.getdata(0))
+    if optimize:
+        cerebro.optstrategy(RunStrategy, period=[15])
+        return cerebro.run()[0][0]
+
+    cerebro.addstrategy(RunStrategy)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        full = runcerebro(statsonly=False, runonce=runonce)
+        stats = runcerebro(statsonly=True, runonce=runonce)
+
+        if main:
+            print(full.obsnames, full.obslens, full.endvalue)
+            print(stats.obsnames, stats.obslens, stats.endvalue)
+            continue
+
+        assert full.obsnames == ['Broker', 'BuySell', 'Trades']
+        assert stats.obsnames == ['Broker']
+        assert all(x >= len(full) for x in full.obslens)
+        assert all(x == 1 for x in stats.obslens)
+        assert full.endvalue == stats.endvalue
+
+        # optreturn=False keeps full strategies: no automatic activation
+        opt = runcerebro(statsonly=None, runonce=runonce, optimize=True)
+        assert opt.obsnames == full.obsnames
+
+
+if __name__ == '__main__':
+    test_run(main=True)
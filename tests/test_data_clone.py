@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+
+
+class RecordStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.indicators.SMA(self.data1, period=15)
+
+    def start(self):
+        self.bars = list()
+
+    def next(self):
+        self.bars.append(tuple(d.close[0] for d in self.datas) +
+                         (self.sma[0], len(self.data1), len(self.data2)))
+
+
+def runcerebro(preload, runonce):
+    data = testcommon.getdata(0)
+    cerebro = bt.Cerebro(stdstats=False, preload=preload, runonce=runonce)
+    cerebro.adddata(data)
+    cerebro.adddata(data.clone())
+    cerebro.adddata(data.copyas('copy'))
+    cerebro.addstrategy(RecordStrategy)
+    strat = cerebro.run()[0]
+    return strat, data
+
+
+def test_run(main=False):
+    results = list()
+    for preload, runonce in ((True, True), (True, False), (False, False)):
+        strat, data = runcerebro(preload, runonce)
+        results.append(strat.bars)
+
+        # preloaded clones reference the storage of the data
+        for clone in strat.datas[1:]:
+            for line, dline in zip(clone.lines, data.lines):
+                assert (line.array is dline.array) == preload
+
+            assert clone.buflen() == data.buflen()
+
+        if main:
+            print(preload, runonce, len(strat.bars), strat.bars[-1])
+
+    # and deliver the same as copied bar by bar
+    assert results[0] == results[1] == results[2]
+    assert all(b[0] == b[1] == b[2] for b in results[0])
+
+
+if __name__ == '__main__':
+    test_run(main=True)
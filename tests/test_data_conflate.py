@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import importlib
+
+import pytest
+
+from backtrader.utils.py3 import queue
+
+EPOCH = 1577836800  # 2020-01-01 00:00:00 UTC
+# seconds past EPOCH of the queued ticks, with conflate=1 the windows are
+# right-closed like bars: (9, 10], (10, 11], (11, 12]
+TICKS = [9.8, 10.2, 10.7, 11.0, 11.001, 11.5, 12.0, 12.3]
+WINDOWS = [[9.8], [10.2, 10.7, 11.0], [11.001, 11.5, 12.0], [12.3]]
+
+
+class Params(object):
+    conflate = 1
+
+
+def conflateall(cls, msgs, tosecs):
+    # Runs _conflate over the queued msgs as the feed does: the 1st message
+    # not belonging to a window is kept in _storedmsg for the next round
+    data = object.__new__(cls)  # only _conflate is exercised
+    data.p = Params()
+    data._storedmsg = dict()
+    data.qlive = queue.Queue()
+    for msg in msgs[1:]:
+        data.qlive.put(msg)
+
+    windows = []
+    msg = msgs[0]
+    while msg is not None:
+        windows.append([tosecs(m) for m in data._conflate(msg)])
+        msg = data._storedmsg.pop(None, None)
+
+    assert data.qlive.empty()
+    return windows
+
+
+def check_ibdata(ibdata):
+    RTVolume = ibdata.ibstore.RTVolume
+    msgs = [RTVolume('%f;1;%d;%d;1.0;true' % (100.0 + i, ms, i))
+            for i, ms in enumerate(int(round((EPOCH + t) * 1000))
+                                   for t in TICKS)]
+
+    def tosecs(rtvol):
+        secs = (rtvol.datetime - ibdata.IBData._EPOCH).total_seconds()
+        return round(secs - EPOCH, 4)
+
+    assert conflateall(ibdata.IBData, msgs, tosecs) == WINDOWS
+
+
+def check_oanda(oanda):
+    msgs = [dict(time=str(int(round((EPOCH + t) * 10 ** 6))), bid=1.0,
+                 ask=1.0) for t in TICKS]
+
+    def tosecs(msg):
+        return round(int(msg['time']) / 10 ** 6 - EPOCH, 4)
+
+    assert conflateall(oanda.OandaData, msgs, tosecs) == WINDOWS
+
+
+def test_run(main=False):
+    checked = 0
+    for modname, check in [('backtrader.feeds.ibdata', check_ibdata),
+                           ('backtrader.feeds.oanda', check_oanda)]:
+        try:
+            mod = importlib.import_module(modname)
+        except ImportError:  # the broker package is not installed
+            continue
+
+        check(mod)
+        checked += 1
+        if main:
+            print(modname, 'conflation windows', WINDOWS)
+
+    if not checked:
+        pytest.skip('neither ibpy nor oandapy are installed')
+
+
+if __name__ == '__main__':
+    test_run(main=True)
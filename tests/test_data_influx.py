@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import backtrader as bt
+
+EPOCH = 1577836800  # 2020-01-01 00:00:00 UTC
+DAY = 86400
+# one bar per day with a gap every 7 days, to check the cursor skips gaps
+TIMES = [EPOCH + i * DAY for i in range(35) if i % 7 != 5]
+COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume', 'openinterest']
+
+
+def utc(t):
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=t)
+
+
+def barvalues(t):
+    i = (t - EPOCH) // DAY
+    return [t, 100.0 + i, 101.0 + i, 99.0 + i, 100.5 + i, 1000.0 * i, None]
+
+
+class FakeInfluxHandler(BaseHTTPRequestHandler):
+    # Answers the InfluxQL queries of the feed from TIMES, honoring the time
+    # bounds and the LIMIT and recording each query
+    queries = []
+
+    def log_message(self, *args):
+        pass  # keep the test output quiet
+
+    def do_GET(self):
+        q = parse_qs(urlparse(self.path).query)['q'][0]
+        self.queries.append(q)
+
+        lo = int(re.search(r'time >= (\d+)s', q).group(1))
+        hi = int(re.search(r'time <= (\d+)s', q).group(1))
+        times = [t for t in TIMES if lo <= t <= hi]
+        limit = re.search(r'LIMIT (\d+)', q)
+        if limit:
+            times = times[:int(limit.group(1))]
+
+        result = dict(statement_id=0)
+        if times:
+            result['series'] = [dict(name='bars', columns=COLUMNS,
+                                     values=[barvalues(t) for t in times])]
+
+        body = json.dumps(dict(results=[result])).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def runfeed(port, chunksize, **kwargs):
+    FakeInfluxHandler.queries = []
+    data = bt.feeds.InfluxDB(
+        dataname='bars', port=port, database='db', chunksize=chunksize,
+        fromdate=datetime.datetime(2020, 1, 3),
+        todate=datetime.datetime(2020, 2, 1), **kwargs)
+
+    cerebro = bt.Cerebro(**kwargs.pop('cerebro', {}))
+    cerebro.adddata(data)
+    cerebro.addstrategy(bt.Strategy)
+    cerebro.run()
+    return data, FakeInfluxHandler.queries
+
+
+def test_run(main=False):
+    pytest.importorskip('influxdb')
+    from backtrader.feeds.influxfeed import _epoch2num
+
+    server = HTTPServer(('127.0.0.1', 0), FakeInfluxHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    port = server.server_address[1]
+
+    # expected bars: the range of fromdate/todate, both included
+    expected = [t for t in TIMES if EPOCH + 2 * DAY <= t <= EPOCH + 31 * DAY]
+    try:
+        # chunksize not dividing the number of bars and dividing it (the last
+        # query returns nothing), bulk preload, bar by bar and no preload
+        for chunksize in [7, len(expected) // 2, 0]:
+            for preload, bulk in [(True, True), (True, False), (False, True)]:
+                data, queries = runfeed(port, chunksize, bulkpreload=bulk,
+                                        cerebro=dict(preload=preload))
+                if main:
+                    print('chunksize', chunksize, 'preload', preload, 'bulk',
+                          bulk, 'queries', len(queries))
+
+                # all bars, in order, no duplicates at the chunk boundaries
+                if preload:
+                    dts = list(data.lines.datetime.array)
+                    assert dts == [_epoch2num(t) for t in expected]
+                    close = list(data.lines.close.array)
+                    assert close == [barvalues(t)[4] for t in expected]
+
+                assert len(data) == len(expected)
+                assert data.datetime.datetime(0) == utc(expected[-1])
+                if preload:
+                    assert data.datetime.datetime(-len(data) + 1) == \
+                        utc(expected[0])
+
+                if not chunksize:
+                    assert len(queries) == 1
+                    assert 'LIMIT' not in queries[0]
+                    continue
+
+                # one query per chunk plus one if the last chunk was full
+                assert len(queries) == len(expected) // chunksize + 1
+                cursors = [int(re.search(r'time >= (\d+)s', q).group(1))
+                           for q in queries]
+                assert cursors[0] == expected[0]
+                for i, cursor in enumerate(cursors[1:], 1):
+                    # one bucket past the last bar of the previous chunk
+                    assert cursor == expected[i * chunksize - 1] + DAY
+
+                assert all('LIMIT %d' % chunksize in q for q in queries)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import random
+
+import testcommon
+
+import backtrader as bt
+from backtrader.utils import (date2num, num2date, datetime642num,
+                              num2datetime64)
+from backtrader.utils.dateintern import TZTable
+
+
+class SummerTZ(datetime.tzinfo):
+    '''One hour ahead of UTC from April to September (UTC months)'''
+    HOUR = datetime.timedelta(hours=1)
+    ZERO = datetime.timedelta()
+
+    def utcoffset(self, dt):
+        return self.HOUR if 4 <= dt.month < 10 else self.ZERO
+
+    def dst(self, dt):
+        return self.utcoffset(dt)
+
+    def fromutc(self, dt):
+        return dt + self.utcoffset(dt)
+
+    def localize(self, dt):
+        return dt.replace(tzinfo=self)
+
+
+def ambiguous(dt):
+    # local times inside the gap/overlap around a change of SummerTZ
+    return dt.month in (4, 10) and dt.day == 1 and dt.hour < 2
+
+
+def test_run(main=False):
+    tz = SummerTZ()
+    dtbase = datetime.datetime(2000, 1, 1)
+
+    # scalar conversions by binary search over the transitions
+    tztable = TZTable(tz)
+    hours = [dtbase + datetime.timedelta(hours=7 * i) for i in range(5000)]
+    for x in hours:
+        num = date2num(x)
+        assert tztable.num2date(num) == num2date(num, tz)
+        if not ambiguous(x):
+            assert tztable.date2num(x) == date2num(x, tz)
+
+    # the datetime of a bar is computed once and cached
+    cerebro = bt.Cerebro()
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(bt.Strategy)
+    data = cerebro.run()[0].data
+    assert data.datetime.datetime(0) is data.datetime.datetime(0)
+    assert data.datetime.datetime(-1) != data.datetime.datetime(0)
+
+    try:
+        import numpy as np
+    except ImportError:
+        return  # numpy is optional
+
+    rnd = random.Random(7)
+    dts = [dtbase + datetime.timedelta(microseconds=rnd.randrange(10 ** 15))
+           for i in range(2000)]
+    dts += [datetime.datetime(2006, 1, 2, 23, 59, 59, 999989)]
+    dts = [x for x in dts if not ambiguous(x)]
+
+    nums = [date2num(x) for x in dts]
+    localnums = [date2num(x, tz) for x in dts]
+
+    vdts = num2datetime64(nums + [float('nan')])
+    vlocal = num2datetime64(localnums, tz=tz)
+    vnums = datetime642num(np.array(dts, dtype='datetime64[us]'))
+    vlocalnums = datetime642num(np.array(dts, dtype='datetime64[us]'), tz=tz)
+
+    if main:
+        print(vdts[:2], vlocal[:2])
+        print(vnums[:2], vlocalnums[:2])
+    else:
+        assert vdts.tolist() == [num2date(x) for x in nums] + [None]
+        assert vlocal.tolist() == [num2date(x, tz) for x in localnums]
+        assert vnums.tolist() == nums
+        assert vlocalnums.tolist() == localnums
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+def getdata(name):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath, name)
+    return bt.feeds.YahooFinanceCSVData(dataname=datapath, adjclose=False)
+
+
+class CointStrategy(bt.Strategy):
+    params = (('period', 30),)
+
+    def __init__(self):
+        # rolling fast path and per bar statsmodels calculation (fallback)
+        self.fast = btind.CointN(self.data0, self.data1, period=self.p.period,
+                                 maxlag=0, autolag=None)
+        self.slow = btind.CointN(self.data0, self.data1, period=self.p.period)
+        self.vals = []
+
+    def next(self):
+        self.vals.append((self.data0.get(size=self.p.period),
+                          self.data1.get(size=self.p.period),
+                          self.fast.score[0], self.fast.pvalue[0],
+                          self.slow.score[0], self.slow.pvalue[0]))
+
+
+def test_run(main=False):
+    import pytest
+    pd = pytest.importorskip('pandas')
+    stattools = pytest.importorskip('statsmodels.tsa.stattools')
+
+    for runonce in [True, False]:
+        cerebro = bt.Cerebro(runonce=runonce)
+        cerebro.adddata(getdata('orcl-2014.txt'))
+        cerebro.adddata(getdata('nvda-2014.txt'))
+        cerebro.addstrategy(CointStrategy)
+        strat = cerebro.run()[0]
+        assert len(strat.vals) == 252 - 30 + 1
+
+        for x, y, fscore, fpvalue, score, pvalue in strat.vals:
+            x, y = pd.Series(list(x)), pd.Series(list(y))
+            fast = stattools.coint(x, y, maxlag=0, autolag=None)
+            assert abs(fscore - fast[0]) < 1e-6
+            assert abs(fpvalue - fast[1]) < 1e-6
+
+            slow = stattools.coint(x, y)  # statsmodels defaults
+            assert (score, pvalue) == tuple(slow[:2])
+
+        if main:
+            print('runonce', runonce, 'checked', len(strat.vals))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
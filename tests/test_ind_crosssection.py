@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+import backtrader.indicators.crosssection as btcs
+
+NAN = float('NaN')
+
+
+class NaNEvery(bt.Indicator):
+    '''Delivers the data with NaN every ``mod`` bars'''
+    lines = ('value',)
+    params = (('mod', 3),)
+
+    def next(self):
+        self.lines.value[0] = NAN if not len(self) % self.p.mod else self.data[0]
+
+    def once(self, start, end):
+        src, dst = self.data.array, self.lines.value.array
+        for i in range(start, end):
+            dst[i] = NAN if not (i + 1) % self.p.mod else src[i]
+
+
+class CSStrategy(bt.Strategy):
+    def __init__(self):
+        c = self.data.close
+        # all inputs are NaN every 12 bars
+        self.ins = [NaNEvery(c, mod=12),
+                    NaNEvery(btind.SMA(c, period=5), mod=6),
+                    NaNEvery(btind.SMA(c, period=10), mod=4),
+                    NaNEvery(btind.SMA(c, period=10), mod=4),
+                    NaNEvery(btind.EMA(c, period=20), mod=3)]
+
+        self.inds = [
+            btind.CSRank(*self.ins),
+            btind.CSRank(*self.ins, pct=True),
+            btind.CSQuantile(*self.ins, bins=3),
+            btind.CSDemean(*self.ins),
+            btind.CSZScore(*self.ins),
+        ]
+        self.vals = []
+
+    def next(self):
+        values = [x[0] for x in self.ins]
+        valid = [v for v in values if v == v]
+        n = len(valid)
+        if n:
+            mean = sum(valid) / n
+            std = math.sqrt(sum((v - mean) ** 2 for v in valid) / n)
+
+        out = []
+        for i, v in enumerate(values):
+            if v != v:
+                out.append([NAN] * len(self.inds))
+                continue
+
+            rank = (sum(w < v for w in valid) + 1 +
+                    (sum(w == v for w in valid) - 1) / 2.0)
+            out.append([rank, rank / n, min(2, (rank - 1) * 3 // n),
+                        v - mean, (v - mean) / std if std else NAN])
+
+        vals = []
+        for i, expected in enumerate(out):
+            for ind, exp in zip(self.inds, expected):
+                val = ind.getline(self.ins[i])[0]
+                vals.append(val)
+                if exp != exp:
+                    assert val != val
+                else:
+                    assert abs(val - exp) < 1e-6
+
+        self.vals.append(vals)
+
+
+def test_run(main=False):
+    vals = []
+    for vectorized in [True, False]:
+        if not vectorized:
+            np, btcs.np = btcs.np, None  # pure python path
+        elif btcs.np is None:
+            continue  # numpy is optional
+
+        try:
+            for runonce in [True, False]:
+                cerebro = bt.Cerebro(runonce=runonce)
+                cerebro.adddata(testcommon.getdata(0))
+                cerebro.addstrategy(CSStrategy)
+                strat = cerebro.run()[0]
+                # one line per data and minimum period of the slowest input
+                assert strat.inds[0].lines.size() == len(strat.ins)
+                assert len(strat.vals) == len(strat) - 19
+                vals.append(strat.vals)
+                if main:
+                    print('vectorized', vectorized, 'runonce', runonce,
+                          'checked', len(strat.vals))
+        finally:
+            if not vectorized:
+                btcs.np = np
+
+    for v1, v2 in zip(vals, vals[1:]):
+        for x1, x2 in zip(v1, v2):
+            for a, b in zip(x1, x2):
+                assert (a != a and b != b) or abs(a - b) < 1e-9
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+import operator
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+try:
+    import numpy  # noqa: F401 (Hurst needs it)
+except ImportError:
+    numpy = None
+
+
+def lepctrank(d):
+    return math.fsum(x <= d[-1] for x in d) / len(d)
+
+
+class FirstN(btind.Highest):
+    '''Only func changes: the rolling max of Highest must not be used'''
+    func = operator.itemgetter(0)
+
+
+class LePctRank(btind.PercentRank):
+    '''Only the default func changes: the default vfunc must not be used'''
+    params = (('func', lepctrank),)
+
+
+class MeanN(btind.OperationN):
+    lines = ('mean',)
+    func = staticmethod(lambda d: math.fsum(d) / len(d))
+    vfunc = staticmethod(lambda w: w.mean(axis=1))
+
+
+class LastN(MeanN):
+    '''Only func changes: the vfunc of MeanN must not be used'''
+    func = operator.itemgetter(-1)
+
+
+class OnceNextStrategy(bt.Strategy):
+    def __init__(self):
+        d = self.data
+        self.inds = [
+            btind.Highest(d, period=14), btind.Lowest(d, period=14),
+            btind.SumN(d, period=14),
+            btind.PercentRank(d, period=14),
+            btind.PercentRank(d, period=14, func=lepctrank),
+            FirstN(d, period=14), LePctRank(d, period=14),
+            MeanN(d, period=14), LastN(d, period=14),
+        ]
+        if numpy is not None:
+            self.inds.append(btind.Hurst(d, period=40))
+
+        self.vals = []
+
+    def next(self):
+        self.vals.append([ind[0] for ind in self.inds])
+
+
+def test_run(main=False):
+    vals = []
+    for runonce in [True, False]:
+        cerebro = bt.Cerebro(runonce=runonce)
+        cerebro.adddata(testcommon.getdata(0))
+        cerebro.addstrategy(OnceNextStrategy)
+        strat = cerebro.run()[0]
+        vals.append(strat.vals)
+        if main:
+            print('runonce', runonce, 'bars', len(strat.vals))
+
+    once, nxt = vals
+    minperiod = 14 if numpy is None else 40
+    assert len(once) == len(nxt) == len(strat) - minperiod + 1
+    for i, (v1, v2) in enumerate(zip(once, nxt)):
+        for a, b in zip(v1, v2):
+            assert abs(a - b) < 1e-9, (i, v1, v2)
+
+    # the pure python path of the changed func is the reference
+    d = strat.data.close.array
+    for i, v in enumerate(once, len(d) - len(once)):
+        window = d[i - 13:i + 1]
+        assert v[4] == v[6] == lepctrank(window)
+        assert v[5] == window[0]
+        assert v[8] == window[-1]
+
+
+if __name__ == '__main__':
+    test_run(main=True)
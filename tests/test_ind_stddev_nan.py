@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+NANBAR = 50  # the input is NaN only on this bar
+
+
+class NaNOnce(bt.Indicator):
+    '''Delivers the data with NaN on bar ``NANBAR``'''
+    lines = ('value',)
+
+    def next(self):
+        self.lines.value[0] = float('NaN') if len(self) == NANBAR else \
+            self.data[0]
+
+    def once(self, start, end):
+        src, dst = self.data.array, self.lines.value.array
+        for i in range(start, end):
+            dst[i] = float('NaN') if i + 1 == NANBAR else src[i]
+
+
+class StdDevStrategy(bt.Strategy):
+    def __init__(self):
+        data = NaNOnce(self.data)
+        self.stddev = btind.StdDev(data, period=10)
+        self.bbands = btind.BollingerBands(data, period=10)
+
+        # the formula with moving averages, which does not carry the NaN over
+        mean = btind.SMA(data, period=10)
+        meansq = btind.SMA(pow(data, 2), period=10)
+        self.expected = pow(abs(meansq - pow(mean, 2)), 0.5)
+        self.exptop = mean + 2.0 * self.expected
+
+        self.nans = 0
+
+    def next(self):
+        vals = [(self.stddev[0], self.expected[0]),
+                (self.bbands.top[0], self.exptop[0])]
+        for val, exp in vals:
+            if exp != exp:
+                assert val != val
+            else:
+                assert abs(val - exp) <= 1e-6 * max(1.0, abs(exp))
+
+        self.nans += self.stddev[0] != self.stddev[0]
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        cerebro = bt.Cerebro(runonce=runonce)
+        cerebro.adddata(testcommon.getdata(0))
+        cerebro.addstrategy(StdDevStrategy)
+        strat = cerebro.run()[0]
+        if main:
+            print('runonce', runonce, 'NaN outputs', strat.nans)
+
+        assert strat.nans == 10  # only while the NaN is in the window
+
+
+if __name__ == '__main__':
+    test_run(main=True)
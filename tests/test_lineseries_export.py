@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import pytest
+
+import testcommon
+
+import backtrader as bt
+
+
+class RunStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.indicators.SMA(period=15)
+
+
+def test_run(main=False):
+    np = pytest.importorskip('numpy')  # to_numpy needs numpy
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        pandas = None  # only the to_numpy part can be checked
+
+    for exactbars in [False, 1]:
+        cerebro = bt.Cerebro(exactbars=exactbars)
+        cerebro.adddata(testcommon.getdata(0))
+        cerebro.addstrategy(RunStrategy)
+        strat = cerebro.run()[0]
+        data = strat.data
+
+        arrays = data.to_numpy()
+        if main:
+            print(list(arrays))
+
+        assert list(arrays) == list(data.lines.getlinealiases())
+        assert arrays['close'][-1] == data.close[0] == 4119.94
+        assert arrays['datetime'][-1] == np.datetime64(
+            data.datetime.datetime(0))
+
+        if not exactbars:
+            assert all(len(x) == len(data) == 255 for x in arrays.values())
+            assert arrays['datetime'][0] == np.datetime64(
+                data.datetime.datetime(-254))
+            # unbounded buffers are exported without copying
+            assert np.shares_memory(
+                arrays['close'], np.frombuffer(data.close.array))
+        else:
+            # qbuffer: only the values still held
+            assert len(arrays['close']) == data.close.buflen()
+
+        if pandas is None:
+            continue
+
+        frame = data.to_frame()
+        smaframe = strat.sma.to_frame()
+        obsframe = strat.observers[0].to_frame()
+
+        if main:
+            print(frame.shape, smaframe.shape, obsframe.shape)
+            print(frame.tail(1))
+            print(smaframe.tail(1))
+
+        assert list(frame.columns) == [x for x in arrays if x != 'datetime']
+        assert frame.index[-1] == data.datetime.datetime(0)
+        assert frame['close'].iloc[-1] == data.close[0]
+        assert smaframe.index[-1] == data.datetime.datetime(0)
+        assert round(smaframe['sma'].iloc[-1], 3) == 4095.012
+        assert list(obsframe.columns) == ['cash', 'value']
+
+        if not exactbars:
+            assert len(frame) == len(smaframe) == len(data) == 255
+            assert frame.index[0] == data.datetime.datetime(-254)
+        else:
+            # qbuffer: aligned to the end and as long as the shortest line
+            assert len(frame) == min(line.buflen() for line in data.lines)
+            assert len(smaframe) < 255
+
+    if pandas is None and not main:
+        pytest.skip('pandas is not installed: to_frame not checked')
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+import random
+
+import backtrader.mathsupport as bm
+
+
+def _window(x, i, period):
+    return x[i - period + 1:i + 1]
+
+
+def _close(a, b):
+    return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+
+
+def test_run(main=False):
+    rnd = random.Random(2006)
+    period = 25
+    x = [rnd.gauss(100.0, 5.0) for i in range(500)]
+    y = [0.5 * v + rnd.gauss(0.0, 1.0) for v in x]
+
+    rmean = bm.rolling_mean(x, period)
+    rstd = bm.rolling_stddev(x, period)
+    rmax = bm.rolling_max(x, period)
+    rmin = bm.rolling_min(x, period)
+    rmed = bm.rolling_quantile(x, period, q=0.5)
+    rbeta = bm.rolling_beta(y, x, period)
+
+    assert all(math.isnan(v) for v in rstd[:period - 1])
+
+    for i in range(period - 1, len(x)):
+        wx = _window(x, i, period)
+        wy = _window(y, i, period)
+        avg = bm.average(wx)
+        avgy = bm.average(wy)
+
+        assert _close(rmean[i], avg)
+        assert _close(rstd[i], bm.standarddev(wx))
+        assert rmax[i] == max(wx)
+        assert rmin[i] == min(wx)
+        assert _close(rmed[i], sorted(wx)[period // 2])
+
+        cov = math.fsum((a - avg) * (b - avgy) for a, b in zip(wx, wy))
+        var = math.fsum((a - avg) ** 2 for a in wx)
+        assert _close(rbeta[i], cov / var)
+
+    # replace the last value as done during replay
+    rolling = bm.RollingMeanVar(3)
+    for v in [1.0, 2.0, 3.0, 4.0]:
+        rolling.push(v)
+    rolling.replace(8.0)
+    assert _close(rolling.mean(), bm.average([2.0, 3.0, 8.0]))
+    assert _close(rolling.stddev(), bm.standarddev([2.0, 3.0, 8.0]))
+
+    rolling = bm.RollingMinMax(3)
+    for v in [5.0, 1.0, 7.0, 4.0]:
+        rolling.push(v)
+    rolling.replace(0.5)  # window: 1.0, 7.0, 0.5
+    assert (rolling.min(), rolling.max()) == (0.5, 7.0)
+    rolling.replace(9.0)  # window: 1.0, 7.0, 9.0
+    assert (rolling.min(), rolling.max()) == (1.0, 9.0)
+    rolling.push(2.0)  # window: 7.0, 9.0, 2.0
+    assert (rolling.min(), rolling.max()) == (2.0, 9.0)
+
+    # NaN values are skipped by the quantile and can leave the window
+    nan = float('NaN')
+    rolling = bm.RollingQuantile(3)
+    for v in [3.0, nan, 1.0]:
+        rolling.push(v)
+    assert rolling.sorted == [1.0, 3.0]
+    assert rolling.quantile() == 2.0
+    rolling.push(2.0)  # 3.0 leaves: nan, 1.0, 2.0
+    rolling.push(5.0)  # nan leaves: 1.0, 2.0, 5.0
+    assert rolling.sorted == [1.0, 2.0, 5.0]
+    rolling.replace(nan)  # 1.0, 2.0, nan
+    assert rolling.sorted == [1.0, 2.0]
+    assert rolling.rank(2.0) == 0.5
+
+    # non-finite values give NaN (or inf for the mean) while in the window
+    # and leave no trace in the estimator once they have left it
+    inf = float('inf')
+    xs = list(x[:60])
+    xs[10], xs[30], xs[31] = nan, inf, -inf
+    rolling = bm.RollingMeanVar(period)
+    for i, v in enumerate(xs):
+        rolling.push(v)
+        if i == 33:  # replay: a finite value replaced by NaN and back
+            rolling.replace(nan)
+            assert math.isnan(rolling.mean())
+            assert math.isnan(rolling.stddev())
+            rolling.replace(v)
+
+        wx = xs[max(0, i - period + 1):i + 1]
+        finite = all(v - v == 0.0 for v in wx)
+        if finite:
+            assert _close(rolling.mean(), bm.average(wx))
+            assert _close(rolling.stddev(), bm.standarddev(wx))
+        else:
+            assert math.isnan(rolling.stddev())
+            avg = sum(wx)
+            assert math.isnan(rolling.mean()) == math.isnan(avg)
+            assert math.isnan(avg) or rolling.mean() == avg
+
+    assert rolling.nonfinite == 0 and rolling.welford.count == period
+
+    if main:
+        print('rolling statistics ok')
+
+
+if __name__ == '__main__':
+    test_run(main=True)
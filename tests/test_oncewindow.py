@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os.path
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class NextOnly(bt.Indicator):
+    # calculated with the default once implementation (via next)
+    lines = ('diff',)
+    params = (('period', 5),)
+
+    def __init__(self):
+        self.addminperiod(self.p.period)
+
+    def next(self):
+        self.lines.diff[0] = max(self.data.get(size=self.p.period)) - \
+            self.data[-1]
+
+
+class RecordStrategy(bt.Strategy):
+    def __init__(self):
+        self.inds = [
+            btind.SMA(period=15),
+            btind.EMA(period=20),
+            btind.RSI(),
+            btind.MACD(),
+            btind.Stochastic(),
+            NextOnly(self.data.close),
+            self.data.close - self.data.open,
+            btind.CrossOver(btind.SMA(period=5), btind.SMA(period=12)),
+            btind.SMA(self.data1, period=3),
+        ]
+
+    def start(self):
+        self.values = list()
+
+    def next(self):
+        self.values.append(
+            (len(self), len(self.data1), self.data.close[-3]) +
+            tuple(ind[0] for ind in self.inds))
+
+        if len(self) % 10 == 0:
+            if self.position:
+                self.close()
+            else:
+                self.buy()
+
+
+class DelayStrategy(bt.Strategy):
+    # delayed (past) and pushed (future) lines over nested indicators
+    def __init__(self):
+        close = self.data.close
+        self.inds = [
+            btind.Ichimoku(),
+            btind.DPO(period=20),
+            btind.SMA(btind.Highest(close, period=30)(-12), period=5),
+            btind.SMA(close(5), period=10),  # over a line from the future
+            close(3)(4),  # future of the future
+            btind.EMA(close(7), period=8)(-20),  # past of the future
+        ]
+
+    def start(self):
+        self.values = list()
+
+    def next(self):
+        values = []
+        for ind in self.inds:
+            values.extend(line[0] for line in ind.lines)
+
+        self.values.append(tuple(values))
+
+
+def rundelays(**kwargs):
+    cerebro = bt.Cerebro(stdstats=False, **kwargs)
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            'orcl-1995-2014.txt')
+    cerebro.adddata(bt.feeds.YahooFinanceCSVData(dataname=datapath))
+    cerebro.addstrategy(DelayStrategy)
+    return cerebro.run()[0]
+
+
+def runcerebro(**kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.adddata(testcommon.getdata(1))
+    cerebro.addstrategy(RecordStrategy)
+    strat = cerebro.run()[0]
+    return strat, cerebro.broker.getvalue()
+
+
+def test_run(main=False):
+    strat, value = runcerebro()
+    values = [str(x) for x in strat.values]
+
+    for oncewindow in (1, 7, 64):
+        wstrat, wvalue = runcerebro(oncewindow=oncewindow)
+        assert [str(x) for x in wstrat.values] == values
+        assert wvalue == value
+
+        # only the values needed for the minimum period are kept
+        assert wstrat.data.buflen() < oncewindow + 2 * wstrat._minperiod
+        assert wstrat.inds[0].buflen() == wstrat.data.buflen()
+
+        if main:
+            print(oncewindow, len(wstrat.values), wstrat.data.buflen(),
+                  wvalue)
+
+
+    # the values at each bar, including those taken from future bars, are the
+    # same as with a full once pass
+    values = rundelays().values
+    for oncewindow in (1, 25, 60, 100, 1000):
+        wstrat = rundelays(oncewindow=oncewindow)
+        assert len(wstrat.values) == len(values)
+        for i, (vals, wvals) in enumerate(zip(values, wstrat.values)):
+            for val, wval in zip(vals, wvals):
+                assert val == wval or (val != val and wval != wval), \
+                    (oncewindow, i, vals, wvals)
+
+        if main:
+            print('delays', oncewindow, len(wstrat.values),
+                  wstrat.data.buflen())
+
+
+if __name__ == '__main__':
+    test_run(main=True)
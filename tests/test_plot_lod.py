@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import testcommon
+
+import backtrader as bt
+
+
+class PlotStrategy(bt.Strategy):
+    def __init__(self):
+        bt.indicators.SMA(period=10)
+
+
+def test_run(main=False):
+    import pytest
+    pytest.importorskip('matplotlib')  # needed by the plot package
+    from backtrader.plot.lod import (lodfactor, buckets, lod_ohlc,
+                                     lod_minmax, lod_sample)
+
+    # bars per bucket: no aggregation without maxbars or if it fits
+    assert lodfactor(100, 0) == 1
+    assert lodfactor(100, 100) == 1
+    assert lodfactor(101, 100) == 2
+    assert lodfactor(1000, 300) == 4  # 250 buckets, k does not divide
+
+    # the last bucket is incomplete if k does not divide the bars
+    xs = list(range(10))
+    assert list(buckets(xs, 3)) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+    # positions with gaps (other timeframes): buckets by position
+    assert list(buckets([0, 1, 5, 6, 7], 3)) == [(0, 2), (2, 3), (3, 5)]
+
+    opens = [10.0, 11, 12, 13, 14, 15, 16, 17, 18, 19]
+    highs = [x + 2 for x in opens]
+    lows = [x - 2 for x in opens]
+    closes = [x + 1 for x in opens]
+    volumes = [1.0] * 10
+    x, o, h, l, c, v = lod_ohlc(xs, opens, highs, lows, closes, volumes, 3)
+    assert x == [1.0, 4.0, 7.0, 10.0]  # middle of the bucket
+    assert o == [10.0, 13, 16, 19]
+    assert h == [14.0, 17, 20, 21]
+    assert l == [8.0, 11, 14, 17]
+    assert c == [13.0, 16, 19, 20]
+    assert v == [3.0, 3, 3, 1]
+
+    nan = float('NaN')
+    ys = [1.0, 5, 2, nan, nan, nan, 3, nan, 0, 4]
+    xout, yout = lod_minmax(xs, ys, 3)
+    if main:
+        print(xout, yout)
+
+    # min/max in order of appearance, NaN bucket kept as a gap, NaN values
+    # skipped inside a bucket and a single value if min == max
+    assert xout == [0, 1, 3, 6, 8, 9]
+    assert yout[:2] == [1.0, 5] and yout[3:] == [3, 0, 4]
+    assert math.isnan(yout[2])
+
+    xout, yout = lod_sample(xs, ys, 4)
+    assert xout == [0, 4, 8]
+    assert yout[0] == 1.0 and yout[2] == 0 and math.isnan(yout[1])
+
+    # zooming re-aggregates the lines of the figures of every strategy
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(PlotStrategy)
+    cerebro.addstrategy(PlotStrategy)
+    cerebro.run()
+    figs = cerebro.plot(iplot=False, maxbars=50, numfigs=2)
+    for fig in (figs[0][0], figs[1][1]):
+        ax = [x for x in fig.axes if x.lines][0]
+        line = max(ax.lines, key=lambda x: len(x.get_xdata()))
+        xdata = list(line.get_xdata())
+        ax.set_xlim(xdata[0], xdata[0] + 20)  # no aggregation needed
+        zoomed = list(line.get_xdata())
+        assert zoomed != xdata
+        assert zoomed == list(range(int(xdata[0]), int(xdata[0]) + 31))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
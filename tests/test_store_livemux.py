@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import socket
+import socketserver
+import threading
+import time
+
+import backtrader as bt
+from backtrader.store import StorePool, livequeue
+from backtrader.utils.py3 import queue
+
+NBARS = 25
+BARDELAY = 0.01
+QCHECK = 5.0  # a single full wait would make the test fail
+
+
+class FakeBrokerHandler(socketserver.StreamRequestHandler):
+    # Sends the symbol requested by the client NBARS times as one line per bar
+    def handle(self):
+        symbol = self.rfile.readline().strip().decode('ascii')
+        for i in range(NBARS):
+            self.wfile.write(('%s,%d\n' % (symbol, i)).encode('ascii'))
+            self.wfile.flush()
+            time.sleep(BARDELAY)
+
+
+class FakeStore(bt.Store):
+    params = (('port', None),)
+
+    def start(self, data=None, broker=None):
+        super(FakeStore, self).start(data=data, broker=broker)
+        StorePool().attach(self)
+
+    def stop(self):
+        StorePool().detach(self)
+
+    def streambars(self, symbol, q):
+        StorePool().submit(self._streambars, symbol, q)
+
+    def _streambars(self, symbol, q):
+        sock = socket.create_connection(('127.0.0.1', self.p.port))
+        sock.sendall((symbol + '\n').encode('ascii'))
+        for line in sock.makefile('rb'):
+            _, value = line.decode('ascii').strip().split(',')
+            q.put(float(value))
+
+        sock.close()
+        q.put(None)  # end of transmission
+
+
+class FakeData(bt.DataBase):
+    params = (('qcheck', QCHECK),)
+
+    def islive(self):
+        return True
+
+    def haslivedata(self):
+        return not self.qlive.empty()
+
+    def start(self):
+        super(FakeData, self).start()
+        self.store = FakeStore()
+        self.store.start(data=self)
+        self.qlive = livequeue(self._env)
+        self.store.streambars(self._dataname, self.qlive)
+        self.dtbase = datetime.datetime(2020, 1, 1)
+        self.done = False
+
+    def stop(self):
+        super(FakeData, self).stop()
+        self.store.stop()
+
+    def _load(self):
+        if self.done:
+            return False
+
+        try:
+            value = self.qlive.get(timeout=self._qcheck)
+        except queue.Empty:
+            return None  # no bar but not done
+
+        if value is None:
+            self.done = True
+            return False
+
+        if self._laststatus != self.LIVE:
+            self.put_notification(self.LIVE)
+
+        dtime = self.dtbase + datetime.timedelta(minutes=value)
+        self.lines.datetime[0] = self.date2num(dtime)
+        for line in ('open', 'high', 'low', 'close'):
+            getattr(self.lines, line)[0] = value
+        return True
+
+
+class RunStrategy(bt.Strategy):
+    def __init__(self):
+        self.values = [list() for d in self.datas]
+        self.lens = [0] * len(self.datas)
+
+    def next(self):
+        for i, d in enumerate(self.datas):
+            if len(d) > self.lens[i]:  # record only new bars
+                self.lens[i] = len(d)
+                self.values[i].append(d.close[0])
+
+
+def runcerebro(liveqsize):
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0),
+                                             FakeBrokerHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cerebro = bt.Cerebro(stdstats=False, liveqsize=liveqsize)
+    FakeStore._singleton = None  # fresh store for the new server port
+    FakeStore(port=server.server_address[1])
+    for symbol in ['AAA', 'BBB', 'CCC']:
+        cerebro.adddata(FakeData(dataname=symbol))
+
+    cerebro.addstrategy(RunStrategy)
+    tstart = time.time()
+    strat = cerebro.run()[0]
+    elapsed = time.time() - tstart
+
+    server.shutdown()
+    server.server_close()
+    return strat, elapsed
+
+
+def test_run(main=False):
+    for liveqsize in [0, 2]:
+        strat, elapsed = runcerebro(liveqsize)
+        if main:
+            print(liveqsize, elapsed, [len(v) for v in strat.values])
+            continue
+
+        assert elapsed < QCHECK
+        for values in strat.values:
+            assert values == [float(i) for i in range(NBARS)]
+
+        # the shared pool is stopped with the store (started again on demand)
+        assert StorePool().executor is None
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import time
+
+from backtrader.store import RequestPacer
+
+
+def check_rules():
+    pacer = RequestPacer(maxreqs=3, period=10.0, keyreqs=2, keyperiod=1.0,
+                         identical=5.0, maxactive=4)
+
+    assert pacer.delay('a', 'k1', now=0.0) == 0.0
+    pacer.sent(1, 'a', 'k1', now=0.0)
+    assert pacer.delay('a', 'k1', now=0.5) == 4.5  # identical request
+    assert pacer.delay('b', 'k1', now=0.5) == 0.0
+    pacer.sent(2, 'b', 'k1', now=0.5)
+    assert pacer.delay('c', 'k1', now=0.6) == 0.4  # same key in 1 second
+    assert pacer.delay('c', 'k2', now=0.6) == 0.0
+    pacer.sent(3, 'c', 'k2', now=0.6)
+    assert pacer.delay('d', 'k3', now=1.0) == 9.0  # 3 requests in 10 secs
+    assert pacer.delay('d', 'k3', now=10.0) == 0.0
+    pacer.sent(4, 'd', 'k3', now=10.0)
+    assert pacer.delay('e', 'k4', now=20.0) is None  # 4 requests active
+    pacer.done(1)
+    assert pacer.delay('e', 'k4', now=20.0) == 0.0
+
+
+def check_dispatch():
+    pacer = RequestPacer(maxreqs=2, period=0.2, maxactive=3)
+    times = dict()
+
+    def send(i):
+        times[i] = time.time()
+
+    tstart = time.time()
+    for i in range(5):
+        pacer.submit(i, lambda i=i: send(i))
+
+    pacer.done(4)  # not sent yet: it is simply dequeued
+
+    # the 4th request needs the end of an active one to go through
+    time.sleep(0.5)
+    assert sorted(times) == [0, 1, 2]
+    pacer.done(0)
+    time.sleep(0.1)
+    assert sorted(times) == [0, 1, 2, 3]  # and 4 was never sent
+    assert pacer._thread is None  # the sender ends with nothing pending
+
+    return [times[i] - tstart for i in range(4)]
+
+
+def test_run(main=False):
+    check_rules()
+    elapsed = check_dispatch()
+    if main:
+        print(elapsed)
+    else:
+        assert elapsed[1] < 0.1  # 2 requests in the 1st window
+        assert elapsed[2] >= 0.2 - 0.01  # 3rd waits for the window
+
+
+if __name__ == '__main__':
+    test_run(main=True)
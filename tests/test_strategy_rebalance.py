@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+
+WEIGHTS = [0.40, 0.05, 0.30, 0.0]
+
+
+class RebalanceStrategy(bt.Strategy):
+    params = (('batch', True), ('scale', 1.0), ('prebuy', 0.0),)
+
+    def start(self):
+        self.statuses = list()
+        self.values = list()
+
+    def notify_order(self, order):
+        self.statuses.append(order.status)
+
+    def next(self):
+        if len(self) % 10:
+            return
+
+        # rotate the weights across the datas
+        n = len(self) // 10
+        if self.p.prebuy:  # still open when rebalancing, takes cash first
+            d = self.datas[-1]
+            value = self.broker.getvalue()
+            self.buy(data=d, size=int(self.p.prebuy * value / d.close[0]))
+
+        targets = dict((d, self.p.scale * WEIGHTS[(i + n) % len(WEIGHTS)])
+                       for i, d in enumerate(self.datas))
+
+        if self.p.batch:
+            orders = self.rebalance(targets)
+            sells = [o for o in orders if o.issell()]
+            assert orders[:len(sells)] == sells  # sells go first
+        else:
+            value = self.broker.getvalue()
+            for reducing in (True, False):
+                for d, target in targets.items():
+                    dvalue = self.broker.getvalue(datas=[d])
+                    if (target * value < dvalue) == reducing:
+                        self.order_target_percent(d, target=target)
+
+        self.values.append(self.broker.getvalue())
+
+
+def runstrat(batch, scale=1.0, prebuy=0.0):
+    data = testcommon.getdata(0)
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(data)
+    for i in range(len(WEIGHTS) - 1):
+        cerebro.adddata(data.clone())
+
+    cerebro.broker.setcash(100000.0)
+    cerebro.addstrategy(RebalanceStrategy, batch=batch, scale=scale,
+                        prebuy=prebuy)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    for scale in [1.0, 1.6]:  # 1.6: not enough cash for some buys
+        batch = runstrat(True, scale)
+        single = runstrat(False, scale)
+        if main:
+            print(scale, batch.values[-1], single.values[-1])
+
+        assert batch.values == single.values
+
+        # enough cash: accepted without the individual check (no Submitted)
+        assert (bt.Order.Submitted in batch.statuses) == (scale > 1.0)
+        assert (bt.Order.Margin in batch.statuses) == (scale > 1.0)
+
+    # the open buy leaves not enough cash: the individual checks are made
+    batch = runstrat(True, prebuy=0.5)
+    single = runstrat(False, prebuy=0.5)
+    if main:
+        print('prebuy', batch.values[-1], single.values[-1])
+
+    assert batch.values == single.values
+    assert batch.statuses == single.statuses
+    assert bt.Order.Margin in batch.statuses
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class SMADiff(bt.Indicator):
+    lines = ('signal',)
+    params = (('period', 10),)
+
+    def __init__(self):
+        self.lines.signal = self.data - btind.SMA(period=self.p.period)
+
+
+class SMACross(bt.Indicator):
+    lines = ('signal',)
+
+    def __init__(self):
+        self.lines.signal = btind.CrossOver(btind.SMA(period=5),
+                                            btind.SMA(period=15))
+
+
+chksignals = [
+    [(bt.SIGNAL_LONGSHORT, SMADiff)],
+    [(bt.SIGNAL_LONG, SMADiff), (bt.SIGNAL_LONGEXIT, SMACross)],
+    [(bt.SIGNAL_SHORT_INV, SMADiff), (bt.SIGNAL_SHORTEXIT_ANY, SMACross)],
+]
+
+chkvals = [
+    ['9790.350000', '7526.530000'],
+    ['10396.930000', '10593.820000'],
+    ['9868.840000', '10494.240000'],
+]
+
+
+def test_run(main=False):
+    for signals, vals in zip(chksignals, chkvals):
+        for kwargs in [dict(runonce=True), dict(runonce=True, oncewindow=50),
+                       dict(runonce=False)]:
+            for accumulate, val in zip([False, True], vals):
+                cerebro = bt.Cerebro(**kwargs)
+                cerebro.adddata(testcommon.getdata(0))
+                for sigtype, sigcls in signals:
+                    cerebro.add_signal(sigtype, sigcls)
+
+                cerebro.signal_accumulate(accumulate)
+                strat = cerebro.run()[0]
+                value = '%f' % cerebro.broker.getvalue()
+                if main:
+                    print(kwargs, accumulate, value)
+                else:
+                    assert value == val
+                    # runonce looks up the precalculated signal actions
+                    assert (strat._sigcodes is not None) == kwargs['runonce']
+
+
+if __name__ == '__main__':
+    test_run(main=True)
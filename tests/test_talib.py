@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import testcommon
+
+import backtrader as bt
+
+
+class TALibStrategy(bt.Strategy):
+    def __init__(self):
+        d = self.data
+        self.inds = [
+            bt.talib.SMA(d, timeperiod=10),
+            bt.talib.EMA(d, timeperiod=10),  # unstable
+            bt.talib.RSI(d, timeperiod=14),  # unstable
+            bt.talib.BBANDS(d, timeperiod=20),  # several outputs
+            bt.talib.SAR(d.high, d.low),  # known unstable
+            bt.talib.CDLDOJI(d.open, d.high, d.low, d.close),  # candle
+        ]
+        self.vals = []
+
+    def next(self):
+        self.vals.append([line[0] for ind in self.inds for line in ind.lines])
+
+
+def equal(x, y):
+    if math.isnan(x) or math.isnan(y):
+        return math.isnan(x) and math.isnan(y)
+
+    return abs(x - y) <= 1e-9 * max(1.0, abs(x))
+
+
+def test_run(main=False):
+    import pytest
+    pytest.importorskip('talib')
+
+    vals = []
+    for runonce in [True, False]:
+        cerebro = bt.Cerebro(runonce=runonce)
+        cerebro.adddata(testcommon.getdata(0))
+        cerebro.addstrategy(TALibStrategy)
+        strat = cerebro.run()[0]
+        vals.append(strat.vals)
+        if main:
+            print('runonce', runonce, strat.vals[-1])
+
+    # next (stream handles, stream functions or windows) matches once
+    assert len(vals[0]) == len(vals[1])
+    for v1, v2 in zip(*vals):
+        assert all(equal(x1, x2) for x1, x2 in zip(v1, v2))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+
+class TimerStrategy(bt.Strategy):
+    def __init__(self):
+        self.fired = list()
+        ptime, pdelta = datetime.time, datetime.timedelta
+        self.add_timer(when=bt.timer.SESSION_START,
+                       offset=pdelta(minutes=15), repeat=pdelta(minutes=30))
+        self.add_timer(when=ptime(10, 0), monthdays=[1, 15, 31], cheat=True)
+        self.add_timer(when=ptime(15, 0), weekdays=[2, 4], weekcarry=True)
+        self.add_timer(when=bt.timer.SESSION_END,
+                       allow=lambda d: d.day % 3 == 0)
+        self.add_timer(when=ptime(9, 0), tzdata=self.data1)
+
+    def notify_timer(self, timer, when, *args, **kwargs):
+        self.fired.append((timer.p.tid, len(self), when))
+
+
+def runtimers(preload, runonce):
+    datapath = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            '2006-min-005.txt')
+    data = bt.feeds.BacktraderCSVData(
+        dataname=datapath,
+        timeframe=bt.TimeFrame.Minutes, compression=5,
+        sessionstart=datetime.time(9, 0), sessionend=datetime.time(17, 30))
+
+    cerebro = bt.Cerebro(stdstats=False, preload=preload, runonce=runonce)
+    cerebro.adddata(data)
+    cerebro.adddata(data.clone())
+    cerebro.addstrategy(TimerStrategy)
+    strat = cerebro.run()[0]
+    return strat
+
+
+def test_run(main=False):
+    # runonce precomputes the timers, next mode checks them bar by bar
+    strat = runtimers(preload=True, runonce=True)
+    assert all(t._firedts is not None for t in strat.cerebro._timers)
+
+    fired = strat.fired
+    assert fired == runtimers(preload=True, runonce=False).fired
+    assert fired == runtimers(preload=False, runonce=False).fired
+
+    tids = set(x[0] for x in fired)
+    assert len(tids) == 5  # all timers fired
+
+    if main:
+        for x in fired[:20]:
+            print(x)
+        print('Fired:', len(fired))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+
+import backtrader as bt
+from backtrader.utils import UTC
+
+HOLIDAYS = [
+    datetime.date(2016, 1, 1),
+    datetime.date(2016, 1, 18),
+    datetime.date(2016, 2, 15),
+    datetime.date(2016, 3, 25),
+    datetime.date(2016, 5, 30),
+    datetime.date(2016, 7, 4),
+    datetime.date(2016, 9, 5),
+    datetime.date(2016, 11, 24),
+    datetime.date(2016, 12, 26),
+]
+
+EARLYDAYS = [
+    (datetime.date(2016, 11, 25), datetime.time(9, 30), datetime.time(13)),
+]
+
+OPEN, CLOSE = datetime.time(9, 30), datetime.time(16)
+
+ONEDAY = datetime.timedelta(days=1)
+
+
+class EST(datetime.tzinfo):
+    # pytz like fixed offset timezone
+    def utcoffset(self, dt):
+        return datetime.timedelta(hours=-5)
+
+    def dst(self, dt):
+        return datetime.timedelta()
+
+    def localize(self, dt):
+        return dt.replace(tzinfo=self)
+
+
+def nextday(day):
+    # reference implementation stepping day by day
+    while True:
+        day += ONEDAY
+        if day.isoweekday() in (6, 7) or day in HOLIDAYS:
+            continue
+
+        return day
+
+
+def schedule(day, tz):
+    while True:
+        dt = day.date()
+        while dt.isoweekday() in (6, 7) or dt in HOLIDAYS:
+            dt += ONEDAY
+
+        o, c = dict((x[0], x[1:]) for x in EARLYDAYS).get(dt, (OPEN, CLOSE))
+        opening, closing = (
+            tz.localize(datetime.datetime.combine(dt, x)).astimezone(UTC)
+            .replace(tzinfo=None) for x in (o, c))
+
+        if day > closing:
+            day = datetime.datetime.combine(dt + ONEDAY, datetime.time.min)
+            continue
+
+        return opening, closing
+
+
+def test_run(main=False):
+    cal = bt.TradingCalendar(holidays=HOLIDAYS, earlydays=EARLYDAYS,
+                             open=OPEN, close=CLOSE, cachesize=30)
+
+    day = datetime.date(2015, 12, 20)
+    while day < datetime.date(2017, 1, 10):
+        nday = nextday(day)
+        assert cal.nextday(day) == nday
+        assert cal.nextday_week(day) == nday.isocalendar()[1]
+        assert cal.last_weekday(day) == (
+            day.isocalendar()[1] != nday.isocalendar()[1])
+        assert cal.last_monthday(day) == (day.month != nday.month)
+        assert cal.last_yearday(day) == (day.year != nday.year)
+        day += ONEDAY
+
+    # datetime instances keep the time part
+    dt = datetime.datetime(2016, 1, 15, 10, 30)
+    assert cal.nextday(dt) == datetime.datetime(2016, 1, 19, 10, 30)
+
+    tz = EST()
+    dt = datetime.datetime(2016, 2, 1)
+    while dt < datetime.datetime(2016, 12, 31):
+        if main:
+            print(dt, cal.schedule(dt, tz))
+        assert cal.schedule(dt, tz) == schedule(dt, tz)
+        dt += datetime.timedelta(hours=7)
+
+    # a calendar built in a single go delivers the same
+    cal2 = bt.TradingCalendar(holidays=HOLIDAYS, earlydays=EARLYDAYS,
+                              open=OPEN, close=CLOSE)
+    cal2.prepare(datetime.date(2016, 1, 1), datetime.date(2016, 12, 31))
+    dt = datetime.datetime(2016, 11, 25, 19)  # early close, next is Monday
+    assert cal2.schedule(dt, tz) == cal.schedule(dt, tz)
+    assert cal2.schedule(dt, tz)[1] == datetime.datetime(2016, 11, 28, 21)
+    assert cal2.last_monthday(datetime.date(2016, 9, 30))
+    assert not cal2.last_monthday(datetime.date(2016, 9, 29))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2023 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class RunStrategy(bt.Strategy):
+    def __init__(self):
+        btind.SMA(period=15).csv = True
+
+
+def runcerebro(wrcls, **kwargs):
+    cerebro = bt.Cerebro()
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(RunStrategy)
+    cerebro.addwriter(wrcls, csv=True, **kwargs)
+    cerebro.run()
+
+
+def test_run(main=False):
+    outfile = io.StringIO()
+    runcerebro(bt.WriterFile, out=outfile)
+
+    for background in [True, False]:
+        outbuf = io.StringIO()
+        runcerebro(bt.WriterBuffered, out=outbuf, batchsize=50,
+                   background=background)
+        if not main:
+            assert outbuf.getvalue() == outfile.getvalue()
+
+    outbin = io.BytesIO()
+    runcerebro(bt.WriterBuffered, out=io.StringIO(), batchsize=50,
+               csv_format='binary', csv_out=outbin)
+    outbin.seek(0)
+    columns = bt.readcolumnar(outbin)
+
+    if main:
+        print(list(columns))
+        print(columns['Id'][-1], columns['close'][-1], columns['sma'][-1])
+    else:
+        assert columns['Id'] == list(range(1, 256))
+        assert columns['len'] == columns['Id']
+        assert columns['close'][-1] == 4119.94
+        assert round(columns['sma'][-1], 3) == 4095.012
+
+
+if __name__ == '__main__':
+    test_run(main=True)